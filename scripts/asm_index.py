@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Include graph and symbol index of SPECT firmware sources.
+
+Every `.s` file under src/ is parsed once into its `.include` directives,
+defined labels and `.eq` constants and its code blocks (instructions between
+two labels with the symbols they reference). Parsed files are cached in
+<cache>/asm_index.json keyed by mtime and size, a file with changed mtime
+is re-parsed only if its content hash changed.
+
+On top of the index:
+    closure(top)        transitive `.include` closure of an image top source
+    images_of(file)     images (IMAGES) whose closure contains the file
+    ops_of(file)        ops of every image whose code reaches the file
+    definitions(name)   files and lines defining a label or constant
+
+Ops are found in the image top source as `CMPI rX, <op>_id` followed by a
+branch, code reachable from the branch target (calls, jumps, fall-through
+to the next label, used constants) belongs to the op. An id whose branch
+target dispatches ids that are not dispatched anywhere else (op type such
+as `ecc_key` or `ecdsa`) is a group of ops, not an op.
+"""
+import os
+import re
+import json
+import hashlib
+from argparse import ArgumentParser
+
+TS_REPO_ROOT = os.environ["TS_REPO_ROOT"]
+SRC_DIR = f"{TS_REPO_ROOT}/src"
+
+CACHE_VERSION = 2
+
+IMAGES = {
+    "app"   : "src/main.s",
+    "boot"  : "src/boot_main.s",
+    "mpw1"  : "src/mpw1/main_mpw1.s"
+}
+
+INCLUDE_RE = re.compile(r"^\s*\.include\s+(\S+)")
+LABEL_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*:(.*)$")
+EQ_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s+\.eq\s")
+SYMBOL_RE = re.compile(r"[A-Za-z_]\w*")
+REGISTER_RE = re.compile(r"^r\d+$", re.I)
+OP_ID_RE = re.compile(r"^(\w+?)_id(\w*)$")
+
+# Instructions after which execution does not continue to the next label
+BLOCK_END = {"RET", "JMP", "END"}
+BRANCHES = {"BRZ", "BRNZ", "BRC", "BRNC", "JMP"}
+
+def file_hash(file_name: str) -> str:
+    with open(file_name, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def parse_file(file_name: str) -> dict:
+    """
+    {"includes" : [path], "labels" : {name : line}, "eqs" : {name : line},
+     "blocks" : [[label, [symbol], falls_through]], "dispatch" : [[op_id, target, label]]}
+
+    `label` of a dispatch entry is the label of the block with the CMPI.
+    """
+    info = {"includes": [], "labels": {}, "eqs": {}, "blocks": [], "dispatch": []}
+    block = [None, [], True]
+    cmpi = None
+    with open(file_name, 'r', errors='replace') as f:
+        for n, line in enumerate(f, 1):
+            line = line.split(';')[0].strip()
+            if not line:
+                continue
+            m = INCLUDE_RE.match(line)
+            if m:
+                info["includes"].append(m.group(1))
+                continue
+            m = EQ_RE.match(line)
+            if m:
+                info["eqs"].setdefault(m.group(1), n)
+                continue
+            if line.startswith('.'):
+                continue
+            m = LABEL_RE.match(line)
+            if m:
+                if block[0] is not None or block[1]:
+                    info["blocks"].append(block)
+                block = [m.group(1), [], True]
+                info["labels"].setdefault(m.group(1), n)
+                line = m.group(2).strip()
+                if not line:
+                    continue
+            tokens = line.replace(',', ' ').split()
+            mnemonic = tokens[0].upper()
+            symbols = [t for t in tokens[1:] if SYMBOL_RE.fullmatch(t) and not REGISTER_RE.match(t)]
+            block[1] += [s for s in symbols if s not in block[1]]
+            block[2] = mnemonic not in BLOCK_END
+            if mnemonic == "CMPI" and symbols and OP_ID_RE.match(symbols[-1]):
+                cmpi = symbols[-1]
+                continue
+            if cmpi and mnemonic in BRANCHES and symbols:
+                info["dispatch"].append([cmpi, symbols[-1], block[0]])
+            cmpi = None
+    if block[0] is not None or block[1]:
+        info["blocks"].append(block)
+    return info
+
+class AsmIndex:
+    def __init__(self, src_dir=SRC_DIR, cache_file=None):
+        self.src_dir = os.path.abspath(src_dir)
+        if cache_file is None:
+            cache_dir = os.environ.get("TS_SPECT_FW_BUILD_CACHE", f"{TS_REPO_ROOT}/.build_cache")
+            cache_file = f"{cache_dir}/asm_index.json"
+        self.cache_file = cache_file
+        self.files = {}
+        self.labels = {}
+        self.eqs = {}
+        self.update()
+
+    def load_cache(self) -> dict:
+        try:
+            with open(self.cache_file, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CACHE_VERSION or cache.get("src_dir") != self.src_dir:
+            return {}
+        return cache["files"]
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        with open(f"{self.cache_file}.tmp", 'w') as f:
+            json.dump({"version": CACHE_VERSION, "src_dir": self.src_dir, "files": self.files}, f)
+        os.replace(f"{self.cache_file}.tmp", self.cache_file)
+
+    def update(self) -> int:
+        """Re-parses changed files under src_dir, returns number of parsed files."""
+        cached = self.files or self.load_cache()
+        files = {}
+        parsed = 0
+        changed = False
+        for root, _, names in os.walk(self.src_dir):
+            for name in sorted(names):
+                if not name.endswith(".s"):
+                    continue
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                old = cached.get(path)
+                if old and old["mtime"] == st.st_mtime_ns and old["size"] == st.st_size:
+                    files[path] = old
+                    continue
+                digest = file_hash(path)
+                if old and old["hash"] == digest:
+                    files[path] = dict(old, mtime=st.st_mtime_ns, size=st.st_size)
+                else:
+                    files[path] = dict(parse_file(path), mtime=st.st_mtime_ns, size=st.st_size, hash=digest)
+                    parsed += 1
+                changed = True
+        changed |= set(files) != set(cached)
+        self.files = files
+
+        self.labels = {}
+        self.eqs = {}
+        for path, info in files.items():
+            for name in info["labels"]:
+                self.labels.setdefault(name, []).append(path)
+            for name in info["eqs"]:
+                self.eqs.setdefault(name, []).append(path)
+        if changed:
+            self.save_cache()
+        return parsed
+
+    def resolve(self, inc: str, including: str, top: str):
+        for base in [os.path.dirname(including), os.path.dirname(top)]:
+            path = os.path.normpath(os.path.join(base, inc))
+            if path in self.files:
+                return path
+        return None
+
+    def closure(self, top: str) -> list:
+        """`top` and all files it includes, `.include` paths are relative to the including file or to `top`."""
+        top = os.path.abspath(top)
+        seen = []
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            if path in seen or path not in self.files:
+                continue
+            seen.append(path)
+            for inc in self.files[path]["includes"]:
+                dep = self.resolve(inc, path, top)
+                if dep:
+                    stack.append(dep)
+        return sorted(seen)
+
+    def images_of(self, file_name: str) -> list:
+        path = os.path.abspath(file_name)
+        return [image for image, top in IMAGES.items() if path in self.closure(f"{TS_REPO_ROOT}/{top}")]
+
+    def op_entries(self, top: str) -> dict:
+        """op : [entry label] of image `top`, op groups are left out"""
+        ops = {}
+        dispatch = self.files.get(os.path.abspath(top), {"dispatch": []})["dispatch"]
+        inner = {}
+        for op_id, _, label in dispatch:
+            inner.setdefault(label, set()).add(op_id)
+        for op_id, target, _ in dispatch:
+            others = {i for label, ids in inner.items() if label != target for i in ids}
+            if inner.get(target, set()) - others:
+                continue
+            m = OP_ID_RE.match(op_id)
+            ops.setdefault(m.group(1) + m.group(2), []).append(target)
+        return ops
+
+    def reachable_files(self, entries: list, scope: list) -> set:
+        """Files with code or constants reachable from `entries` labels, within `scope` files."""
+        scope = set(scope)
+        blocks = {}
+        for path in scope:
+            for i, block in enumerate(self.files[path]["blocks"]):
+                if block[0] is not None:
+                    blocks.setdefault(block[0], (path, i))
+        eqs = {name: path for path in scope for name in self.files[path]["eqs"]}
+
+        files = set()
+        seen = set()
+        stack = [blocks[label] for label in entries if label in blocks]
+        while stack:
+            path, i = stack.pop()
+            if (path, i) in seen:
+                continue
+            seen.add((path, i))
+            files.add(path)
+            _, symbols, falls_through = self.files[path]["blocks"][i]
+            for s in symbols:
+                if s in blocks:
+                    stack.append(blocks[s])
+                elif s in eqs:
+                    files.add(eqs[s])
+            if falls_through and i + 1 < len(self.files[path]["blocks"]):
+                stack.append((path, i + 1))
+        return files
+
+    def op_files(self, image: str) -> dict:
+        """op : set of files the op of `image` depends on"""
+        top = f"{TS_REPO_ROOT}/{IMAGES[image]}"
+        scope = self.closure(top)
+        return {op: self.reachable_files(entries, scope) for op, entries in self.op_entries(top).items()}
+
+    def ops_of(self, file_name: str) -> dict:
+        """image : [op] depending on `file_name`"""
+        path = os.path.abspath(file_name)
+        return {
+            image: sorted(op for op, files in self.op_files(image).items() if path in files)
+            for image in self.images_of(path)
+        }
+
+    def definitions(self, name: str) -> list:
+        """(file, line) of every definition of label or constant `name`"""
+        out = [(path, self.files[path]["labels"][name]) for path in self.labels.get(name, [])]
+        out += [(path, self.files[path]["eqs"][name]) for path in self.eqs.get(name, [])]
+        return out
+
+parser = ArgumentParser(description='TS SPECT firmware include graph and symbol index')
+parser.add_argument("files", nargs="*", help="Source files to print dependent images and ops for")
+parser.add_argument("--symbol", action="append", default=[], help="Print definitions of symbol, can be repeated")
+parser.add_argument("--closure", default=None, choices=list(IMAGES.keys()), help="Print include closure of image")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    index = AsmIndex()
+
+    for name in args.symbol:
+        for path, line in index.definitions(name):
+            print(f"{name}: {os.path.relpath(path, TS_REPO_ROOT)}:{line}")
+
+    if args.closure:
+        for path in index.closure(f"{TS_REPO_ROOT}/{IMAGES[args.closure]}"):
+            print(os.path.relpath(path, TS_REPO_ROOT))
+
+    for file_name in args.files:
+        print(f"{file_name}:")
+        for image, ops in index.ops_of(file_name).items():
+            print(f"    {image:<6} {' '.join(ops)}")
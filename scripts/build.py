@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Incremental build of SPECT firmware.
+
+Runs the same stages as the Makefile targets (const ROM generation, ops
+constants generation, compilation), but every stage is keyed by the hash of
+its command and of the content of its inputs. Inputs of a compilation are
+the top source and its transitive `.include` closure (asm_index.py). A stage
+whose key did not change since the last build is skipped, a stage built
+before with the same key is restored from the local content-addressed cache:
+
+    <cache>/objects/<sha256>        content of every output file
+    <cache>/stages/<key>.json       output file -> object of a stage build
+
+Cache directory is TS_SPECT_FW_BUILD_CACHE or .build_cache in TS_REPO_ROOT.
+"""
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+from argparse import ArgumentParser
+
+from asm_index import AsmIndex
+
+TS_REPO_ROOT = os.environ["TS_REPO_ROOT"]
+
+COMPILER = "spect_compiler"
+
+FW_PARITY = 2
+FW_BASE_ADDR = 0x8000
+
+def file_hash(file_name: str) -> str:
+    h = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def fw_version() -> str:
+    return subprocess.run(
+        ["git", "describe", "--dirty"], cwd=TS_REPO_ROOT,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    ).stdout.strip()
+
+class Stage:
+    """
+    Build step, `cmds` are run in TS_REPO_ROOT, `moves` are (src, dst) renames
+    done after the commands, `stdout` optionally captures output of the last
+    command. Paths are relative to TS_REPO_ROOT.
+    """
+    def __init__(self, name, inputs, outputs, cmds, moves=(), stdout=None, clean=None):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.cmds = cmds
+        self.moves = list(moves)
+        self.stdout = stdout
+        self.clean = clean
+
+    def key(self) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps([self.name, self.cmds, self.moves, self.stdout]).encode())
+        for inp in self.inputs:
+            h.update(os.path.relpath(inp, TS_REPO_ROOT).encode())
+            h.update(file_hash(inp).encode())
+        return h.hexdigest()
+
+    def run(self):
+        if self.clean:
+            shutil.rmtree(f"{TS_REPO_ROOT}/{self.clean}", ignore_errors=True)
+        for out in self.outputs:
+            os.makedirs(os.path.dirname(f"{TS_REPO_ROOT}/{out}"), exist_ok=True)
+        for i, cmd in enumerate(self.cmds):
+            stdout = None
+            if self.stdout and i == len(self.cmds) - 1:
+                stdout = open(f"{TS_REPO_ROOT}/{self.stdout}", 'w')
+            ret = subprocess.run(cmd, cwd=TS_REPO_ROOT, stdout=stdout).returncode
+            if stdout:
+                stdout.close()
+            if ret:
+                raise Exception(f"Stage {self.name} failed: {' '.join(cmd)}")
+        for src, dst in self.moves:
+            shutil.move(f"{TS_REPO_ROOT}/{src}", f"{TS_REPO_ROOT}/{dst}")
+
+class Cache:
+    def __init__(self, cache_dir: str):
+        self.objects = f"{cache_dir}/objects"
+        self.stages = f"{cache_dir}/stages"
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.stages, exist_ok=True)
+
+    def manifest(self, key: str):
+        try:
+            with open(f"{self.stages}/{key}.json", 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def up_to_date(self, manifest: dict) -> bool:
+        for out, obj in manifest.items():
+            path = f"{TS_REPO_ROOT}/{out}"
+            if not os.path.isfile(path) or file_hash(path) != obj:
+                return False
+        return True
+
+    def restore(self, manifest: dict, clean=None) -> bool:
+        if any(not os.path.isfile(f"{self.objects}/{obj}") for obj in manifest.values()):
+            return False
+        if clean:
+            shutil.rmtree(f"{TS_REPO_ROOT}/{clean}", ignore_errors=True)
+        for out, obj in manifest.items():
+            path = f"{TS_REPO_ROOT}/{out}"
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copyfile(f"{self.objects}/{obj}", path)
+        return True
+
+    def store(self, key: str, outputs: list) -> dict:
+        manifest = {}
+        for out in outputs:
+            path = f"{TS_REPO_ROOT}/{out}"
+            obj = file_hash(path)
+            if not os.path.isfile(f"{self.objects}/{obj}"):
+                shutil.copyfile(path, f"{self.objects}/{obj}.tmp")
+                os.replace(f"{self.objects}/{obj}.tmp", f"{self.objects}/{obj}")
+            manifest[out] = obj
+        with open(f"{self.stages}/{key}.json.tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{self.stages}/{key}.json.tmp", f"{self.stages}/{key}.json")
+        return manifest
+
+def build_stage(stage: Stage, cache: Cache, force=False) -> str:
+    """Brings outputs of `stage` up to date. Returns 'skipped', 'restored' or 'built'."""
+    key = stage.key()
+    manifest = None if force else cache.manifest(key)
+    if manifest is not None:
+        if cache.up_to_date(manifest):
+            return "skipped"
+        if cache.restore(manifest, stage.clean):
+            return "restored"
+    stage.run()
+    cache.store(key, stage.outputs)
+    return "built"
+
+def gen_stage(name: str, config: str, generated: str, outputs: list, moves=()) -> Stage:
+    return Stage(
+        name, [f"{TS_REPO_ROOT}/{config}", f"{TS_REPO_ROOT}/scripts/{generated}"],
+        outputs, [[f"scripts/{generated}", config]],
+        moves
+    )
+
+def const_rom_stage() -> Stage:
+    return gen_stage(
+        "const_rom", "data/const_rom_config.yml", "gen_mem_files.py",
+        ["data/constants.hex", "src/mem_layouts/constants_layout.s"],
+        [("data/constants_layout.s", "src/mem_layouts/constants_layout.s")]
+    )
+
+def data_ram_in_const_stage() -> Stage:
+    return gen_stage(
+        "data_ram_in_const", "data/data_ram_in_const_config.yml", "gen_mem_files.py",
+        ["data/constants_data_in.hex", "src/mem_layouts/constants_data_in_layout.s"],
+        [("data/constants_data_in_layout.s", "src/mem_layouts/constants_data_in_layout.s")]
+    )
+
+def ops_constants_stage() -> Stage:
+    return gen_stage(
+        "ops_constants", "spect_ops_config.yml", "gen_spect_ops_constants.py",
+        ["src/constants/spect_ops_constants.s"]
+    )
+
+def compile_stage(index: AsmIndex, name: str, top: str, build_dir: str, hex_name: str, const_hex: str,
+                  isa_version=2, parity=True, dump_suffix="") -> Stage:
+    """Compilation of `top` to `build_dir`, stage inputs are resolved after the generation stages ran."""
+    cmd = [
+        COMPILER, f"--isa-version={isa_version}", "--hex-format=1",
+        f"--hex-file={build_dir}/{hex_name}", f"--first-address={FW_BASE_ADDR:#x}"
+    ]
+    if parity:
+        cmd.append(f"--parity={FW_PARITY}")
+    cmd += [
+        f"--dump-program={build_dir}/program_dump{dump_suffix}.s",
+        f"--dump-symbols={build_dir}/symbols_dump{dump_suffix}.s",
+        top
+    ]
+    return Stage(
+        name,
+        index.closure(f"{TS_REPO_ROOT}/{top}") + [f"{TS_REPO_ROOT}/{const_hex}"],
+        [f"{build_dir}/{hex_name}", f"{build_dir}/program_dump{dump_suffix}.s", f"{build_dir}/symbols_dump{dump_suffix}.s",
+         f"{build_dir}/compile.log", f"{build_dir}/constants.hex"],
+        [["cp", const_hex, f"{build_dir}/constants.hex"], cmd],
+        stdout=f"{build_dir}/compile.log", clean=build_dir
+    )
+
+# target : (generation stages, compile stage factory)
+TARGETS = {
+    "compile"       : (
+        [const_rom_stage, ops_constants_stage],
+        lambda index: compile_stage(index, "compile", "src/main.s", "build", "main.hex", "data/constants.hex")
+    ),
+    "compile_boot"  : (
+        [const_rom_stage, ops_constants_stage],
+        lambda index: compile_stage(
+            index, "compile_boot", "src/boot_main.s", "build_boot", f"spect_boot-{fw_version()}.hex", "data/constants.hex",
+            dump_suffix="_boot"
+        )
+    ),
+    "compile_mpw1"  : (
+        [data_ram_in_const_stage],
+        lambda index: compile_stage(
+            index, "compile_mpw1", "src/mpw1/main_mpw1.s", "build_mpw1", "main_mpw1.hex",
+            "data/constants_data_in.hex", isa_version=1, parity=False
+        )
+    )
+}
+
+parser = ArgumentParser(description='TS SPECT incremental firmware build')
+parser.add_argument("targets", nargs="*", default=["compile"], help=f"Targets to build {list(TARGETS.keys())}, default compile")
+parser.add_argument("--force", action="store_true", help="Rebuild all stages")
+parser.add_argument("--cache-dir", default=None, help="Cache directory")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    cache_dir = args.cache_dir or os.environ.get("TS_SPECT_FW_BUILD_CACHE", f"{TS_REPO_ROOT}/.build_cache")
+    cache = Cache(cache_dir)
+
+    for target in args.targets:
+        if target not in TARGETS:
+            parser.error(f"unknown target {target}")
+
+    index = AsmIndex(cache_file=f"{cache_dir}/asm_index.json")
+
+    done = set()
+    for target in args.targets:
+        gen_stages, compile_factory = TARGETS[target]
+        for factory in gen_stages:
+            if factory in done:
+                continue
+            stage = factory()
+            print(f"{stage.name:<20} {build_stage(stage, cache, args.force)}")
+            done.add(factory)
+        # Generated sources are re-indexed before their closure is hashed
+        index.update()
+        stage = compile_factory(index)
+        print(f"{stage.name:<20} {build_stage(stage, cache, args.force)}")
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Cycle-count benchmark of SPECT ops.
+
+Every scenario (a chain of ops, e.g. the whole EdDSA sequence) is run
+`--iterations` times with random inputs in one OpSequence. Cycle and
+instruction counts of each op are taken from the per-op ISS logs (spect_iss
+counters are cumulative, consecutive ops are differenced) and reported as
+min/median/max. Results are stored in `--results-dir` as
+<git describe>.json and can be compared against another version, the
+script then fails if the median cycle count of any op regressed.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import statistics
+import random as rn
+from argparse import ArgumentParser
+
+import test_common as tc
+from iss_sequence import OpSequence
+from iss_dumps import parse_iss_log, iss_step_stats
+from iss_profile import ProgramMap, Profile, get_dumps
+
+import models.ed25519 as ed25519
+import models.p256 as p256
+import models.x25519 as x25519
+
+insrc = 0x4
+outsrc = 0x5
+
+RESULTS_DIR = f"{tc.TS_REPO_ROOT}/tests/bench_results"
+# Committed results CI compares with, regenerated by --write-baseline
+BASELINE = f"{tc.TS_REPO_ROOT}/tests/bench_baseline.json"
+
+# Maximal message length of L3 EdDSA sign command
+EDDSA_MAX_MSG_LEN = 4096
+
+parser = ArgumentParser(description='TS SPECT ops cycle-count benchmark')
+parser.add_argument("scenarios", nargs="*", help="Scenarios to run. Default all.")
+parser.add_argument("-n", "--iterations", type=int, default=10, help="Runs of each scenario")
+parser.add_argument("--seed", type=int, default=None, help="Seed for randomization")
+parser.add_argument("--results-dir", default=RESULTS_DIR, help="Directory with stored results")
+parser.add_argument("--compare", default=None, help="Version, results file or 'latest' to compare with")
+parser.add_argument("--write-baseline", default=None, help=f"Also write the results to this file (e.g. {os.path.basename(BASELINE)})")
+parser.add_argument("--threshold", type=float, default=1.0, help="Allowed median regression in percent")
+parser.add_argument("--profile", action="store_true", help="Per-routine profile of every scenario")
+parser.add_argument("--profile-top", type=int, default=30, help="Routines printed in profile tables")
+parser.add_argument("--eddsa-sweep", action="store_true", help="Sweep EdDSA message length instead of scenarios")
+parser.add_argument("--sweep-step", type=int, default=144, help="Message length step of the EdDSA sweep")
+parser.add_argument("--sweep-max", type=int, default=EDDSA_MAX_MSG_LEN, help="Maximal message length of the EdDSA sweep")
+
+def add(seq, op, label, run_id, data_in_size, src=(insrc, outsrc), status=0):
+    """
+    Adds `op` to `seq`, statistics of the run are collected under `label`.
+    The scenario fails if the op does not return `status` (None for no check).
+    """
+    seq.add_op(op, src[0], src[1], data_in_size, run_name=f"{label}@{run_id}", status=status)
+
+def rng(seq, n=10):
+    seq.set_rng([rn.randint(1, 2**256-1) for _ in range(n)])
+
+def input_word(op, slot, key_type=0):
+    return (key_type << 24) + (slot << 8) + tc.find_in_list(op, ops_cfg)["id"]
+
+########################################################################################################
+#   Scenarios
+########################################################################################################
+
+def bench_clear(seq, i):
+    tc.start(seq.cmd_file)
+    add(seq, "clear", "clear", i, 0, src=(0x0, 0x1))
+
+def bench_sha512(seq, i):
+    cmd_file = seq.cmd_file
+    tc.start(cmd_file)
+    add(seq, "sha512_init", "sha512_init", i, 0, src=(0x0, 0x1))
+    for j in range(2):
+        tc.start(cmd_file)
+        tc.write_bytes(cmd_file, tc.random_bytes(128), 0x0010)
+        add(seq, "sha512_update", "sha512_update", f"{i}.{j}", 128, src=(0x0, 0x1))
+    tc.start(cmd_file)
+    tc.write_bytes(cmd_file, tc.random_bytes(128), 0x0010)
+    add(seq, "sha512_final", "sha512_final", i, 128, src=(0x0, 0x1))
+
+def bench_x25519(seq, i):
+    cmd_file = seq.cmd_file
+    pub = x25519.x25519(x25519.int2scalar(rn.randint(0, 2**256-1)), 9)
+
+    rng(seq, 8)
+    tc.start(cmd_file)
+    add(seq, "x25519_kpair_gen", "x25519_kpair_gen", i, 0, src=(0x0, 0x1))
+
+    rng(seq, 8)
+    tc.start(cmd_file)
+    tc.write_int256(cmd_file, pub, 0x0020)
+    add(seq, "x25519_sc_et_eh", "x25519_sc_et_eh", i, 32, src=(0x0, 0x1))
+
+    rng(seq, 8)
+    tc.start(cmd_file)
+    slot = rn.randint(0, 3)
+    tc.set_key(cmd_file, key=pub, ktype=0x02, slot=slot, offset=0)
+    tc.write_int32(cmd_file, slot, 0x0020)
+    add(seq, "x25519_sc_et_sh", "x25519_sc_et_sh", i, 1, src=(0x0, 0x1))
+
+    rng(seq, 8)
+    tc.start(cmd_file)
+    tc.set_key(cmd_file, key=rn.randint(0, 2**256-1), ktype=0x00, slot=0, offset=0)
+    add(seq, "x25519_sc_st_eh", "x25519_sc_st_eh", i, 1, src=(0x0, 0x1))
+
+def bench_ecc_key(seq, i):
+    cmd_file = seq.cmd_file
+    for key_type, curve in [(tc.Ed25519_ID, "ed25519"), (tc.P256_ID, "p256")]:
+        slot = rn.randint(0, 31)
+
+        rng(seq)
+        tc.start(cmd_file)
+        tc.write_int32(cmd_file, input_word("ecc_key_gen", slot, key_type), (insrc<<12))
+        add(seq, "ecc_key_gen", f"ecc_key_gen_{curve}", i, 3)
+
+        tc.start(cmd_file)
+        tc.write_int32(cmd_file, input_word("ecc_key_read", slot), (insrc<<12))
+        add(seq, "ecc_key_read", f"ecc_key_read_{curve}", i, 2)
+
+        tc.start(cmd_file)
+        tc.write_int32(cmd_file, input_word("ecc_key_erase", slot), (insrc<<12))
+        add(seq, "ecc_key_erase", f"ecc_key_erase_{curve}", i, 2)
+
+        if key_type == tc.Ed25519_ID:
+            k = tc.random_bytes(32)
+        else:
+            k = rn.randint(1, p256.q - 1).to_bytes(32, 'big')
+
+        rng(seq)
+        tc.start(cmd_file)
+        tc.write_int32(cmd_file, input_word("ecc_key_store", slot, key_type), (insrc<<12))
+        tc.write_bytes(cmd_file, k, (insrc<<12) + 0x10)
+        add(seq, "ecc_key_store", f"ecc_key_store_{curve}", i, 3)
+
+        tc.start(cmd_file)
+        tc.write_int32(cmd_file, input_word("ecc_key_erase", slot), (insrc<<12))
+        add(seq, "ecc_key_erase", f"ecc_key_erase_{curve}", f"{i}.store", 2)
+
+def bench_ecdsa_sign(seq, i):
+    cmd_file = seq.cmd_file
+    slot = rn.randint(0, 7)
+
+    d, w, Ax, Ay = p256.key_gen(tc.random_bytes(32))
+    wmask = rn.randint(0, 2**256 - 1)
+    d2 = rn.randint(0, p256.q)
+    d1 = (d - d2) % p256.q
+
+    rng(seq, 16)
+    tc.start(cmd_file)
+    tc.write_int32(cmd_file, input_word("ecdsa_sign", slot), (insrc<<12))
+
+    tc.set_key(cmd_file, key=d1,        ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k1"])
+    tc.set_key(cmd_file, key=w ^ wmask, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k2"])
+    tc.set_key(cmd_file, key=d2,        ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k3"])
+    tc.set_key(cmd_file, key=wmask,     ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k4"])
+    tc.gen_and_set_metadata(curve=tc.P256_ID, slot=slot, origin=0x01, cmd_file=cmd_file)
+    tc.set_key(cmd_file, key=Ax, ktype=0x04, slot=(slot<<1)+1, offset=tc.PUB_SLOT_LAYOUT["x"])
+    tc.set_key(cmd_file, key=Ay, ktype=0x04, slot=(slot<<1)+1, offset=tc.PUB_SLOT_LAYOUT["y"])
+
+    tc.write_bytes(cmd_file, tc.random_bytes(32), (insrc<<12) + 0x10)
+    tc.write_bytes(cmd_file, tc.random_bytes(32), 0x00A0)
+    tc.write_bytes(cmd_file, tc.random_bytes(4), 0x00C0)
+
+    add(seq, "ecdsa_sign", "ecdsa_sign", i, 0)
+
+def set_eddsa_key(cmd_file, slot):
+    s, prefix, A = ed25519.key_gen(tc.random_bytes(32))
+    smask = rn.randint(0, ed25519.q-1)
+    prefix_mask = rn.randint(0, 2**256-1)
+
+    tc.set_key(cmd_file, key=smask,                  ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k1"])
+    tc.set_key(cmd_file, key=prefix ^ prefix_mask,   ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k2"])
+    tc.set_key(cmd_file, key=(s - smask) % ed25519.q, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k3"])
+    tc.set_key(cmd_file, key=prefix_mask,            ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k4"])
+    tc.gen_and_set_metadata(curve=tc.Ed25519_ID, slot=slot, origin=0x01, cmd_file=cmd_file)
+    tc.set_key(cmd_file, key=int.from_bytes(A, 'big'), ktype=0x04, slot=(slot<<1)+1, offset=tc.PUB_SLOT_LAYOUT["x"])
+
+def add_eddsa_sequence(seq, i, message, label_suffix=""):
+    """Adds the whole EdDSA signing sequence of `message` with a random key."""
+    cmd_file = seq.cmd_file
+    slot = rn.randint(0, 7)
+
+    rng(seq)
+    tc.start(cmd_file)
+    set_eddsa_key(cmd_file, slot)
+    tc.write_int32(cmd_file, input_word("eddsa_set_context", slot), (insrc<<12))
+    tc.write_bytes(cmd_file, tc.random_bytes(32), 0x00A0)
+    tc.write_bytes(cmd_file, tc.random_bytes(4), 0x00C0)
+    add(seq, "eddsa_set_context", "eddsa_set_context" + label_suffix, i, 36)
+
+    rng(seq)
+    tc.start(cmd_file)
+    add(seq, "eddsa_nonce_init", "eddsa_nonce_init" + label_suffix, i, 36)
+
+    updates_cnt = len(message) // 144
+    for j in range(updates_cnt):
+        tc.start(cmd_file)
+        tc.write_bytes(cmd_file, message[j*144:j*144+144], (insrc<<12))
+        add(seq, "eddsa_nonce_update", "eddsa_nonce_update" + label_suffix, f"{i}.{j}", 144)
+
+    last_block = message[updates_cnt*144:]
+    tc.start(cmd_file)
+    tc.write_bytes(cmd_file, last_block, (insrc<<12))
+    add(seq, "eddsa_nonce_finish", "eddsa_nonce_finish" + label_suffix, i, len(last_block))
+
+    rng(seq)
+    tc.start(cmd_file)
+    add(seq, "eddsa_R_part", "eddsa_R_part" + label_suffix, i, 0)
+
+    if len(message) < 64:
+        tc.start(cmd_file)
+        tc.write_bytes(cmd_file, message, (insrc<<12))
+        add(seq, "eddsa_e_at_once", "eddsa_e_at_once" + label_suffix, i, len(message))
+    else:
+        tc.start(cmd_file)
+        tc.write_bytes(cmd_file, message[:64], (insrc<<12))
+        add(seq, "eddsa_e_prep", "eddsa_e_prep" + label_suffix, i, 64)
+
+        message_tmp = message[64:]
+        updates_cnt = len(message_tmp) // 128
+        for j in range(updates_cnt):
+            tc.start(cmd_file)
+            tc.write_bytes(cmd_file, message_tmp[j*128:j*128+128], (insrc<<12))
+            add(seq, "eddsa_e_update", "eddsa_e_update" + label_suffix, f"{i}.{j}", 128)
+
+        last_block = message_tmp[updates_cnt*128:]
+        tc.start(cmd_file)
+        tc.write_bytes(cmd_file, last_block, (insrc<<12))
+        add(seq, "eddsa_e_finish", "eddsa_e_finish" + label_suffix, i, len(last_block))
+
+    tc.start(cmd_file)
+    add(seq, "eddsa_finish", "eddsa_finish" + label_suffix, i, 0)
+
+def bench_eddsa_sequence(seq, i):
+    add_eddsa_sequence(seq, i, tc.random_bytes(300))
+    add_eddsa_sequence(seq, i, tc.random_bytes(32), "_short")
+
+def bench_eddsa_verify(seq, i):
+    cmd_file = seq.cmd_file
+    msg = tc.random_bytes(32)
+    signature, pub_key = ed25519.sign_standard(tc.random_bytes(32), msg)
+    tc.start(cmd_file)
+    tc.write_bytes(cmd_file, signature, 0x0020)
+    tc.write_bytes(cmd_file, pub_key, 0x0060)
+    tc.write_bytes(cmd_file, msg, 0x0080)
+    # Boot firmware returns the verification result at 0x1000, not in the result word
+    add(seq, "eddsa_verify", "eddsa_verify", i, 128, src=(0x0, 0x1), status=None)
+
+# name : (scenario, OpSequence image arguments)
+SCENARIOS = {
+    "clear"         : (bench_clear, {}),
+    "sha512"        : (bench_sha512, {}),
+    "x25519"        : (bench_x25519, {}),
+    "ecc_key"       : (bench_ecc_key, {}),
+    "ecdsa_sign"    : (bench_ecdsa_sign, {}),
+    "eddsa_sequence": (bench_eddsa_sequence, {}),
+    "eddsa_verify"  : (bench_eddsa_verify, {"main" : "src/boot_main.s", "tag" : "Boot2"})
+}
+
+########################################################################################################
+#   Statistics
+########################################################################################################
+
+def run_scenario(test_dir, name, iterations, profile=None) -> dict:
+    """
+    Runs the scenario and returns {label : [{"cycles", "instructions"}, ...]}.
+    With `profile`, ISS logs of all ops are added to it.
+    """
+    scenario, image = SCENARIOS[name]
+    seq = OpSequence(test_dir, ops_cfg, f"bench_{name}", **image)
+    for i in range(iterations):
+        scenario(seq, i)
+
+    tc.print_run_name(f"{name} ({len(seq.steps)} ops)")
+    if not seq.run():
+        return None
+
+    logs = [step_log(test_dir, seq, run_name) for run_name, _ in seq.steps]
+    samples = {}
+    for (run_name, _), log, stats in zip(seq.steps, logs, iss_step_stats([parse_iss_log(l) for l in logs])):
+        label = run_name.split('@')[0]
+        samples.setdefault(label, []).append(stats)
+        if profile:
+            profile.add_run(label, log)
+    return samples
+
+def step_log(test_dir, seq, run_name) -> str:
+    log = f"{test_dir}/{run_name}_iss.log"
+    if not os.path.exists(log):
+        log = f"{test_dir}/{seq.name}_iss.log"
+    return log
+
+########################################################################################################
+#   EdDSA message length sweep
+########################################################################################################
+
+EDDSA_PHASES = ["nonce", "e", "other"]
+
+def eddsa_phase(label: str) -> str:
+    if label.startswith("eddsa_nonce_"):
+        return "nonce"
+    if label.startswith("eddsa_e_"):
+        return "e"
+    return "other"
+
+def sweep_sizes(step: int, max_len: int) -> list:
+    # Boundaries of e_at_once (< 64 B) and of the first TMAC/SHA-512 blocks
+    sizes = set(range(0, max_len + 1, step)) | {63, 64, 143, 144, 191, 192, max_len}
+    return sorted(s for s in sizes if s <= max_len)
+
+def run_eddsa_sweep(test_dir, sizes: list, iterations: int) -> dict:
+    """
+    Runs the EdDSA sequence for every message length in `sizes`.
+    Returns {size : {phase : [cycles of one sequence, ...]}} and list of
+    (size, iteration) skipped because the cycle counter of an op is missing.
+    """
+    seq = OpSequence(test_dir, ops_cfg, "bench_eddsa_sweep")
+    for size in sizes:
+        for i in range(iterations):
+            add_eddsa_sequence(seq, f"{size}.{i}", tc.random_bytes(size))
+
+    tc.print_run_name(f"eddsa_sweep ({len(seq.steps)} ops)")
+    if not seq.run():
+        return None, None
+
+    runs = {}
+    skipped = set()
+    logs = [step_log(test_dir, seq, run_name) for run_name, _ in seq.steps]
+    for (run_name, _), stats in zip(seq.steps, iss_step_stats([parse_iss_log(l) for l in logs])):
+        label, run_id = run_name.split('@')
+        size, i = [int(x) for x in run_id.split('.')[:2]]
+        if stats["cycles"] is None:
+            if (size, i) not in skipped:
+                print("\033[91mlength {} run {}: cycle count of {} missing, point skipped\033[00m".format(size, i, run_name))
+            skipped.add((size, i))
+            continue
+        phases = runs.setdefault((size, i), dict.fromkeys(EDDSA_PHASES, 0))
+        phases[eddsa_phase(label)] += stats["cycles"]
+
+    results = {}
+    for (size, i), phases in sorted(runs.items()):
+        if (size, i) in skipped:
+            continue
+        for phase, cycles in phases.items():
+            results.setdefault(size, {}).setdefault(phase, []).append(cycles)
+        results[size].setdefault("total", []).append(sum(phases.values()))
+    return results, sorted(skipped)
+
+def fit_linear(points: list) -> dict:
+    """Least-squares fit of cycles = overhead + per_byte * length."""
+    if len(set(x for x, _ in points)) < 2:
+        return None
+    per_byte, overhead = statistics.linear_regression(
+        [x for x, _ in points], [y for _, y in points]
+    )
+    return {"overhead": overhead, "per_byte": per_byte}
+
+def print_eddsa_sweep(results: dict) -> dict:
+    print("{:>8} {:>12} {:>12} {:>12} {:>12}".format("length", "nonce", "e", "other", "total"))
+    medians = {}
+    for size, phases in results.items():
+        medians[size] = {p: statistics.median(c) for p, c in phases.items()}
+        print("{:>8} {:>12} {:>12} {:>12} {:>12}".format(
+            size, *[medians[size][p] for p in EDDSA_PHASES + ["total"]]
+        ))
+
+    fits = {}
+    for phase in EDDSA_PHASES + ["total"]:
+        fits[phase] = fit_linear([(size, m[phase]) for size, m in medians.items()])
+        if fits[phase]:
+            print("{:<6} fixed overhead {:>12.0f} cycles, {:>8.2f} cycles/byte".format(
+                phase, fits[phase]["overhead"], fits[phase]["per_byte"]
+            ))
+    return {"medians": medians, "fits": fits}
+
+def summarize(values: list) -> dict:
+    """None if a counter is missing in any of the runs."""
+    if not values or None in values:
+        return None
+    return {
+        "min"       : min(values),
+        "median"    : statistics.median(values),
+        "max"       : max(values)
+    }
+
+def print_results(ops: dict):
+    print("{:<28} {:>5} {:>10} {:>10} {:>10} {:>12}".format(
+        "op", "n", "min", "median", "max", "instr median"
+    ))
+    for label, r in ops.items():
+        c = r["cycles"] or {"min": "-", "median": "-", "max": "-"}
+        instr = r["instructions"]["median"] if r["instructions"] else "-"
+        print("{:<28} {:>5} {:>10} {:>10} {:>10} {:>12}".format(
+            label, r["n"], c["min"], c["median"], c["max"], instr
+        ))
+
+def load_baseline(results_dir: str, compare: str, version: str):
+    if os.path.isfile(compare):
+        file_name = compare
+    elif compare == "latest":
+        files = [
+            f for f in glob.glob(f"{results_dir}/*.json")
+            if os.path.basename(f) != f"{version}.json"
+        ]
+        if not files:
+            return None
+        file_name = max(files, key=os.path.getmtime)
+    else:
+        file_name = f"{results_dir}/{compare}.json"
+    with open(file_name, 'r') as f:
+        return json.load(f)
+
+def compare_results(ops: dict, baseline: dict, threshold: float) -> int:
+    """Number of ops that regressed or miss the cycle counter in either result."""
+    regressions = 0
+    print(f"Comparing with {baseline['version']}")
+    if not baseline["ops"]:
+        tc.print_warning("Baseline has no results, regenerate it with --write-baseline.")
+    for label, r in ops.items():
+        if label not in baseline["ops"]:
+            print("{:<28} not in baseline".format(label))
+            continue
+        if not r["cycles"] or not baseline["ops"][label]["cycles"]:
+            print("\033[91m{:<28} cycle count missing\033[00m".format(label))
+            regressions += 1
+            continue
+        old = baseline["ops"][label]["cycles"]["median"]
+        new = r["cycles"]["median"]
+        change = 100.0 * (new - old) / old
+        if change > threshold:
+            print("\033[91m{:<28} {:>10} -> {:>10} ({:+.2f} %)\033[00m".format(label, old, new, change))
+            regressions += 1
+        elif change != 0:
+            print("{:<28} {:>10} -> {:>10} ({:+.2f} %)".format(label, old, new, change))
+    return regressions
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    seed = args.seed if args.seed is not None else rn.randint(0, 2**32-1)
+    rn.seed(seed)
+    print("seed:", seed)
+
+    ops_cfg = tc.get_ops_config()
+    test_dir = tc.make_test_dir("bench_ops")
+
+    scenarios = args.scenarios or list(SCENARIOS.keys())
+
+    ops = {}
+    version = tc.get_release_version() or "unknown"
+    os.makedirs(args.results_dir, exist_ok=True)
+
+    if args.eddsa_sweep:
+        results, skipped = run_eddsa_sweep(test_dir, sweep_sizes(args.sweep_step, args.sweep_max), args.iterations)
+        if results is None:
+            tc.print_failed()
+            sys.exit(2)
+        with open(f"{args.results_dir}/{version}_eddsa_sweep.json", 'w') as f:
+            json.dump({
+                "version"       : version,
+                "seed"          : seed,
+                "iterations"    : args.iterations,
+                "skipped"       : skipped,
+                **print_eddsa_sweep(results)
+            }, f, indent=2)
+        if skipped:
+            tc.print_failed()
+            sys.exit(1)
+        sys.exit(0)
+
+    for name in scenarios:
+        profile = None
+        if args.profile:
+            tag = SCENARIOS[name][1].get("tag", "Application")
+            profile = Profile(ProgramMap(*get_dumps(tag)))
+        samples = run_scenario(test_dir, name, args.iterations, profile)
+        if samples is None:
+            tc.print_failed()
+            sys.exit(2)
+        for label, s in samples.items():
+            ops[label] = {
+                "n"             : len(s),
+                "cycles"        : summarize([x["cycles"] for x in s]),
+                "instructions"  : summarize([x["instructions"] for x in s])
+            }
+        if profile:
+            tc.print_run_name(f"{name} profile ({profile.unit})")
+            profile.print_table(args.profile_top)
+            suffix = "_instructions" if profile.unit == "instructions" else ""
+            profile.write_folded(f"{args.results_dir}/{version}_{name}{suffix}.folded")
+
+    print_results(ops)
+
+    result = {
+        "version"       : version,
+        "date"          : time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seed"          : seed,
+        "iterations"    : args.iterations,
+        "ops"           : ops
+    }
+    for file_name in [f"{args.results_dir}/{version}.json", args.write_baseline]:
+        if file_name:
+            with open(file_name, 'w') as f:
+                json.dump(result, f, indent=2)
+
+    ret = 0
+    if args.compare:
+        baseline = load_baseline(args.results_dir, args.compare, version)
+        if baseline is None:
+            tc.print_warning("No results to compare with.")
+        else:
+            if (baseline["seed"], baseline["iterations"]) != (seed, args.iterations):
+                tc.print_warning("Baseline was run with another --seed or -n, inputs of the ops differ.")
+            if compare_results(ops, baseline, args.threshold):
+                tc.print_failed()
+                ret = 1
+
+    if "TS_SPECT_FW_TEST_DONT_DUMP" in os.environ.keys():
+        os.system(f"rm -r {test_dir}")
+
+    sys.exit(ret)
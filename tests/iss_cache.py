@@ -0,0 +1,149 @@
+"""
+Content-addressed cache of spect_iss results.
+
+A run is keyed by the simulator binary, firmware image, const ROM, iss_cmd,
+rng.hex and the loaded context/key memory. On a hit, the stored output memories,
+context, key memory dump and log are copied into the test directory instead of
+running the simulator. Entries are evicted in LRU order once the cache exceeds
+its size limit.
+
+The cache may be shared by concurrently running tests. Entries are created by
+renaming a complete temporary directory. Restoring an entry holds a shared lock
+of the cache, storing and eviction hold it exclusively, so an entry is not
+removed while it is being copied out.
+"""
+import os
+import re
+import glob
+import fcntl
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+import test_common as tc
+
+# Files produced by one run_op, <run_name> is prepended on restore
+RESULT_FILES = ["_out.hex", "_emem_out.hex", ".ctx", "_keymem.hex", "_iss.log"]
+
+DEFAULT_SIZE_MB = 1024
+
+def hash_file(h, path: str):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+class IssCache:
+    """
+    On-disk cache in `cache_dir`, limited to `size_mb` MiB.
+    With `bypass`, lookups always miss but results are still stored.
+    """
+    def __init__(self, cache_dir: str, size_mb=DEFAULT_SIZE_MB, bypass=False):
+        self.cache_dir = cache_dir
+        self.size_limit = size_mb << 20
+        self.bypass = bypass
+        self.digests = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def file_digest(self, path: str) -> str:
+        """Digest of a file that does not change during the test (ISS, firmware)."""
+        if path not in self.digests:
+            h = hashlib.sha256()
+            hash_file(h, path)
+            self.digests[path] = h.hexdigest()
+        return self.digests[path]
+
+    def image_digest(self, image: str) -> str:
+        h = hashlib.sha256()
+        iss = shutil.which("spect_iss")
+        if iss:
+            h.update(self.file_digest(iss).encode())
+        h.update(image.encode())
+        for opt, path in re.findall(r"--(program|instruction-mem|const-rom)=(\S+)", image):
+            if opt == "program":
+                # Assembled from source, any file under src/ may be included
+                srcs = glob.glob(f"{tc.TS_REPO_ROOT}/src/**/*.s", recursive=True)
+                for src in sorted(srcs + [path]):
+                    h.update(src.encode())
+                    hash_file(h, src)
+            else:
+                h.update(self.file_digest(path).encode())
+        return h.hexdigest()
+
+    def key(self, image: str, test_dir: str, old_context=None, keymem=None) -> str:
+        h = hashlib.sha256()
+        h.update(self.image_digest(image).encode())
+        inputs = [f"{test_dir}/iss_cmd", f"{test_dir}/rng.hex"]
+        if old_context:
+            inputs.append(f"{test_dir}/{old_context}")
+        if keymem:
+            inputs.append(keymem)
+        for path in inputs:
+            h.update(os.path.basename(path).encode())
+            if os.path.exists(path):
+                hash_file(h, path)
+        return h.hexdigest()
+
+    @contextmanager
+    def locked(self, exclusive=False):
+        """Holds the lock file of the cache, shared by all processes using it."""
+        with open(f"{self.cache_dir}/.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def load(self, key: str, test_dir: str, run_name: str) -> bool:
+        entry = f"{self.cache_dir}/{key}"
+        if self.bypass:
+            return False
+        with self.locked():
+            if not os.path.isdir(entry):
+                return False
+            for suffix in RESULT_FILES:
+                if os.path.exists(f"{entry}/{suffix}"):
+                    shutil.copy(f"{entry}/{suffix}", f"{test_dir}/{run_name}{suffix}")
+            # LRU order is kept by entry mtime
+            os.utime(entry)
+        return True
+
+    def store(self, key: str, test_dir: str, run_name: str):
+        entry = f"{self.cache_dir}/{key}"
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp_")
+        for suffix in RESULT_FILES:
+            if os.path.exists(f"{test_dir}/{run_name}{suffix}"):
+                shutil.copy(f"{test_dir}/{run_name}{suffix}", f"{tmp}/{suffix}")
+        with self.locked(exclusive=True):
+            try:
+                if os.path.isdir(entry):
+                    shutil.rmtree(entry)
+                os.rename(tmp, entry)
+            except OSError:
+                # Stored concurrently by another test
+                shutil.rmtree(tmp, ignore_errors=True)
+            self.evict()
+
+    def evict(self):
+        """Removes least recently used entries over the size limit, exclusive lock must be held."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry = f"{self.cache_dir}/{name}"
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            size = sum(os.path.getsize(f"{entry}/{f}") for f in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), size, entry))
+            total += size
+
+        for _, size, entry in sorted(entries):
+            if total <= self.size_limit:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        with self.locked(exclusive=True):
+            for name in os.listdir(self.cache_dir):
+                if name != ".lock":
+                    shutil.rmtree(f"{self.cache_dir}/{name}", ignore_errors=True)
@@ -0,0 +1,328 @@
+"""
+Readers of spect_iss dump files.
+
+Dumps are decoded once into NumPy arrays and kept in a cache keyed by file
+name, so repeated reads of the same run do not re-parse the text dump.
+A cached dump stays valid until `invalidate` is called for its file. Every
+writer of dumps does so: run_iss (also on ISS cache restore), the ISS
+session and OpSequence, and IssContext.write. Anything else writing dump
+files has to invalidate them as well, file metadata is not checked.
+
+Cached objects are shared: arrays of OutputMemory and KeyMemory are
+read-only, IssContext.load returns a private copy that can be modified.
+"""
+import os
+import re
+import copy
+
+import numpy as np
+
+# {file name : {(class, args) : decoded dump}}
+dump_cache = {}
+
+def cached(cls, file_name: str, *args):
+    entries = dump_cache.setdefault(os.path.abspath(file_name), {})
+    key = (cls,) + args
+    if key not in entries:
+        entries[key] = cls(file_name, *args)
+    return entries[key]
+
+def invalidate(file_name: str):
+    """Drops decoded dumps of `file_name`, next load reads the file again."""
+    dump_cache.pop(os.path.abspath(file_name), None)
+
+class OutputMemory:
+    """
+    Data RAM Out or EMEM Out dump (<run_name>_out.hex, <run_name>_emem_out.hex)
+    with 32-bit words starting at address `base`.
+    """
+    def __init__(self, file_name: str, base: int):
+        self.file_name = file_name
+        self.base = base
+
+        with open(file_name, 'r') as out:
+            words = [line.split(' ')[1] for line in out.read().split('\n') if line]
+        self.data = np.frombuffer(bytes.fromhex("".join(words)), dtype='>u4').astype(np.uint32)
+        self.data.flags.writeable = False
+
+    @classmethod
+    def load(cls, file_name: str, base: int):
+        return cached(cls, file_name, base)
+
+    def words(self, addr: int, count: int) -> np.ndarray:
+        idx = (addr - self.base) // 4
+        if idx < 0 or idx + count > len(self.data):
+            raise Exception(f"Address range {hex(addr)} + {count} words is out of {self.file_name}!")
+        return self.data[idx:idx+count]
+
+    def read_bytes(self, addr: int, count: int, endian='little') -> bytes:
+        """`count` words starting at `addr`, each word serialized in `endian` byte order."""
+        dt = '<u4' if endian == 'little' else '>u4'
+        return self.words(addr, count).astype(dt).tobytes()
+
+    def read_int(self, addr: int, count: int, endian='little') -> int:
+        """
+        `count` words starting at `addr` as integer. With 'little', word at `addr`
+        is the least significant one, with 'big' the most significant one.
+        """
+        return int.from_bytes(self.read_bytes(addr, count, endian), endian)
+
+KEYMEM_SLOT_WORDS = 256
+KEYMEM_HEADER_LINES = 3
+
+KEYMEM_SLOT_RE = re.compile(r"^T\S*\s+(\d+)\s+\S+\s+(\d+)[^\n]*$", re.M)
+KEYMEM_STATE_RE = re.compile(r"^S\S*\s+(\S+)", re.M)
+
+class IndexView:
+    """Makes two-argument `f(i, j)` accessible as `view[i][j]`."""
+    def __init__(self, f, *idx):
+        self.f = f
+        self.idx = idx
+
+    def __getitem__(self, i):
+        if len(self.idx) == 1:
+            return self.f(*self.idx, i)
+        return IndexView(self.f, i)
+
+class KeyMemory:
+    """
+    Sparse model of key memory dump (<run_name>_keymem.hex).
+
+    One pass over the dump indexes slot headers, words of a (type, slot) are
+    decoded on first access. For compatibility with the dense array returned
+    by parse_key_mem before, `kmem[ktype][slot][offset]` and
+    `kmem.full[ktype][slot]` index the same way.
+    """
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        with open(file_name, 'r') as km_file:
+            self.text = km_file.read()
+
+        start = 0
+        for _ in range(KEYMEM_HEADER_LINES):
+            start = self.text.find('\n', start) + 1
+
+        headers = list(KEYMEM_SLOT_RE.finditer(self.text, start))
+        self.index = {}
+        for i, m in enumerate(headers):
+            end = headers[i+1].start() if i + 1 < len(headers) else len(self.text)
+            self.index[(int(m.group(1)), int(m.group(2)))] = (m.end(), end)
+
+        self.decoded = {}
+        self.full = IndexView(self.is_full)
+
+    @classmethod
+    def load(cls, file_name: str):
+        return cached(cls, file_name)
+
+    def __getitem__(self, ktype):
+        if isinstance(ktype, tuple):
+            return self.slot(*ktype)
+        return IndexView(self.slot, ktype)
+
+    def body(self, ktype: int, slot: int) -> str:
+        if (ktype, slot) not in self.index:
+            return ""
+        start, end = self.index[(ktype, slot)]
+        return self.text[start:end]
+
+    def slots(self) -> list:
+        return list(self.index.keys())
+
+    def full_slots(self) -> list:
+        return [s for s in self.index.keys() if self.is_full(*s)]
+
+    def is_full(self, ktype: int, slot: int) -> bool:
+        m = KEYMEM_STATE_RE.search(self.body(ktype, slot))
+        return bool(m) and m.group(1) == "FULL"
+
+    def slot(self, ktype: int, slot: int) -> np.ndarray:
+        """Words of the slot, slots missing in the dump read as zeros."""
+        if (ktype, slot) not in self.decoded:
+            words = [
+                line for line in self.body(ktype, slot).split('\n')
+                if line and line[0] not in "*S"
+            ]
+            data = np.zeros(KEYMEM_SLOT_WORDS, dtype=np.uint32)
+            raw = np.frombuffer(bytes.fromhex("".join(words)), dtype='>u4')
+            data[:len(raw)] = raw
+            data.flags.writeable = False
+            self.decoded[(ktype, slot)] = data
+        return self.decoded[(ktype, slot)]
+
+    def get_key(self, ktype: int, slot: int, offset: int) -> int:
+        """256-bit value of 8 words from `offset`, first word least significant."""
+        words = self.slot(ktype, slot)[offset:offset+8]
+        return int.from_bytes(words.astype('<u4').tobytes(), 'little')
+
+    def diff(self, other: "KeyMemory") -> list:
+        """(type, slot) pairs whose state or content differ between the dumps."""
+        changed = []
+        for s in sorted(set(self.index.keys()) | set(other.index.keys())):
+            if self.body(*s) == other.body(*s):
+                continue
+            if self.is_full(*s) != other.is_full(*s) or \
+               not np.array_equal(self.slot(*s), other.slot(*s)):
+                changed.append(s)
+        return changed
+
+# name : (header, number of lines, kind), data follows one "**..**" line after header
+CONTEXT_SECTIONS = {
+    "GPR"           : ("GPR registers:", 32, "int"),
+    "SHA"           : ("SHA 512 context:", 8, "bytes"),
+    "TMAC"          : ("TMAC", 5, "bytes"),
+    "RAR STACK"     : ("RAR stack:", 5, "int"),
+    "RAR POINTER"   : ("RAR stack pointer:", 1, "int"),
+    "FLAGS"         : ("FLAGS (Z, C, E):", 3, "dec"),
+    "DATA RAM IN"   : ("Data RAM In:", 512, "u32"),
+    "DATA RAM OUT"  : ("Data RAM Out:", 128, "u32")
+}
+
+FLAGS = ["Z", "C", "E"]
+
+class IssContext:
+    """
+    ISS context dump (<run_name>.ctx).
+
+    One pass indexes section offsets, sections are decoded on first access:
+    "GPR", "RAR STACK" as lists of ints, "SHA", "TMAC" as bytes, "RAR POINTER"
+    as int, "FLAGS" as {"Z", "C", "E"} dict and "DATA RAM IN/OUT" as uint32
+    arrays. Sections can be modified (assign or modify in place) and the
+    context written back with `write` to be loaded by --load-context.
+    """
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        with open(file_name, 'r') as ctx:
+            self.lines = ctx.read().split('\n')
+
+        self.index = {}
+        headers = {h: name for name, (h, _, _) in CONTEXT_SECTIONS.items()}
+        for i, line in enumerate(self.lines):
+            if line in headers:
+                self.index[headers[line]] = i + 2
+            elif line[:4] == "TMAC":
+                self.index["TMAC"] = i + 2
+
+        self.decoded = {}
+
+    @classmethod
+    def load(cls, file_name: str):
+        return cached(cls, file_name).copy()
+
+    def copy(self) -> "IssContext":
+        """Context sharing the dump lines, with its own decoded sections."""
+        ctx = copy.copy(self)
+        ctx.decoded = copy.deepcopy(self.decoded)
+        return ctx
+
+    def keys(self):
+        return self.index.keys()
+
+    def raw(self, name: str) -> list:
+        _, count, _ = CONTEXT_SECTIONS[name]
+        start = self.index[name]
+        return self.lines[start:start+count]
+
+    def decode(self, name: str):
+        _, _, kind = CONTEXT_SECTIONS[name]
+        raw = self.raw(name)
+        if kind == "int":
+            val = [int(line, 16) for line in raw]
+            return val[0] if name == "RAR POINTER" else val
+        if kind == "bytes":
+            return bytes.fromhex("".join(raw))
+        if kind == "dec":
+            return {f: int(line) for f, line in zip(FLAGS, raw)}
+        return np.frombuffer(bytes.fromhex("".join(raw)), dtype='>u4').astype(np.uint32)
+
+    def __getitem__(self, name: str):
+        if name not in self.decoded:
+            self.decoded[name] = self.decode(name)
+        return self.decoded[name]
+
+    def __setitem__(self, name: str, val):
+        if name not in self.index:
+            raise KeyError(name)
+        self.decoded[name] = val
+
+    def encode(self, name: str) -> list:
+        _, count, kind = CONTEXT_SECTIONS[name]
+        raw = self.raw(name)
+        val = self.decoded[name]
+        width = len(raw[0])
+        fmt = 'x' if any(c in "abcdef" for c in "".join(raw)) else 'X'
+        if kind == "int":
+            if name == "RAR POINTER":
+                val = [val]
+            return [format(v, f'0{width}{fmt}') for v in val]
+        if kind == "bytes":
+            h = format(int.from_bytes(val, 'big'), f'0{width*count}{fmt}')
+            return [h[i*width:(i+1)*width] for i in range(count)]
+        if kind == "dec":
+            return [str(val[f]) for f in FLAGS]
+        return [format(int(v), f'08{fmt}') for v in val]
+
+    def write(self, file_name: str):
+        """Writes context with decoded (possibly modified) sections re-encoded."""
+        lines = list(self.lines)
+        for name in self.decoded:
+            start = self.index[name]
+            enc = self.encode(name)
+            lines[start:start+len(enc)] = enc
+        with open(file_name, 'w') as ctx:
+            ctx.write('\n'.join(lines))
+        invalidate(file_name)
+
+# Counter lines of the spect_iss run summary, e.g. "Cycles: 123456" or
+# "Instructions = 4567". The whole line is the counter, so trace lines which
+# mention cycles or instructions next to other values do not match.
+#
+# The summary format is assumed, not taken from a captured spect_iss log. The
+# parser expects each counter on a line of its own after every `run`, with
+# values cumulative over the invocation:
+#
+#   0x8004: END                    ; cycle 7
+#   Instructions: 4
+#   Cycles: 8
+#
+# tests/unit/fixtures/iss_run_summary.log is written in this format. If the
+# simulator reports counters differently, adjust these regexes and the fixture.
+ISS_CYCLES_RE = re.compile(r"^\s*(?:total\s+)?cycles?(?:\s+count)?\s*[:=]\s*(\d+)\s*$", re.I | re.M)
+ISS_INSTR_RE = re.compile(r"^\s*(?:total\s+)?instructions?(?:\s+count)?\s*[:=]\s*(\d+)\s*$", re.I | re.M)
+
+ISS_COUNTERS = ["cycles", "instructions"]
+
+def parse_iss_log(file_name: str) -> dict:
+    """
+    Cycle and instruction counts reported by spect_iss in a run log
+    (last reported value of each, None if not present).
+    """
+    with open(file_name, 'r') as log:
+        text = log.read()
+    stats = {}
+    for name, regex in zip(ISS_COUNTERS, [ISS_CYCLES_RE, ISS_INSTR_RE]):
+        m = regex.findall(text)
+        stats[name] = int(m[-1]) if m else None
+    return stats
+
+def iss_step_stats(stats: list) -> list:
+    """
+    Per-op counts of consecutive ops of one spect_iss invocation.
+    Counters of spect_iss are cumulative over the invocation, count of an op
+    is the difference to the previous op. A counter lower than the previous
+    one was restarted and is taken as is.
+    """
+    out = []
+    prev = dict.fromkeys(ISS_COUNTERS)
+    for s in stats:
+        step = {}
+        for name in ISS_COUNTERS:
+            val = s[name]
+            if val is not None and prev[name] is not None and val >= prev[name]:
+                step[name] = val - prev[name]
+            else:
+                step[name] = val
+            if val is not None:
+                prev[name] = val
+        out.append(step)
+    return out
@@ -0,0 +1,210 @@
+"""
+Per-routine cycle profile of SPECT firmware.
+
+The ISS log of an op is used as PC trace: every executed instruction is matched
+against the program dump (build/program_dump.s) of the image, CALL and RET
+instructions drive a shadow call stack and routines are named from the symbol
+dump (build/symbols_dump.s). Cost of an instruction is the difference of cycle
+counters of consecutive trace lines (the last instruction of a run costs 1).
+If any trace line of the log has no cycle counter, the profile counts
+instructions instead (every instruction costs 1) and is labeled so. Runs
+profiled in different units are not mixed.
+
+The profile gives inclusive/exclusive cost and call count per routine and
+folded stacks ("op;routine;subroutine cost" lines) for flamegraph.pl.
+"""
+import os
+import re
+
+import test_common as tc
+
+# name : (program dump, symbols dump)
+DUMPS = {
+    "Application"   : ("build/program_dump.s", "build/symbols_dump.s"),
+    "Boot2"         : ("build_boot/program_dump_boot.s", "build_boot/symbols_dump_boot.s")
+}
+
+RELEASE_DUMPS = {
+    "Application"   : ("release/dump/program_dump_app.s", "release/dump/symbols_dump_app.s"),
+    "Boot2"         : ("release/dump/program_dump_boot.s", "release/dump/symbols_dump_boot.s")
+}
+
+PROGRAM_LINE_RE = re.compile(r"^\s*(?:0x)?([0-9a-fA-F]{4,8})\s*:?\s+(.*)$")
+LABEL_LINE_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*:\s*(?:;.*)?$")
+SYMBOL_NAME_RE = re.compile(r"\b([A-Za-z_]\w*)\b")
+SYMBOL_ADDR_RE = re.compile(r"\b0x([0-9a-fA-F]+)\b")
+MNEMONIC_RE = re.compile(r"^[A-Za-z][A-Za-z0-9]*$")
+
+# Trace lines are assumed to start with the PC of the executed instruction and
+# to carry an optional cycle counter, e.g. "0x8010: ADDI r1, r1, 0x1 ; cycle 3".
+# The format is not taken from a captured spect_iss trace, lines without a PC of
+# the program dump are ignored and without counters the profile counts instructions.
+TRACE_PC_RE = re.compile(r"\b(?:0x)?([0-9a-fA-F]{4,8})\b")
+TRACE_CYCLE_RE = re.compile(r"cycle\D*(\d+)", re.I)
+
+def get_dumps(tag="Application") -> tuple:
+    if "TS_SPECT_FW_TEST_RELEASE" in os.environ.keys():
+        program, symbols = RELEASE_DUMPS[tag]
+    else:
+        program, symbols = DUMPS[tag]
+    return f"{tc.TS_REPO_ROOT}/{program}", f"{tc.TS_REPO_ROOT}/{symbols}"
+
+class ProgramMap:
+    """
+    Instructions and routine names of a compiled image.
+    `instr` maps address to (mnemonic, operands), `routines` maps entry
+    address of every CALL target to its name.
+    """
+    def __init__(self, program_dump: str, symbols_dump: str):
+        self.instr = {}
+        self.labels = {}
+        with open(program_dump, 'r') as f:
+            pending = []
+            for line in f:
+                line = line.split(';')[0].rstrip()
+                m = LABEL_LINE_RE.match(line)
+                if m:
+                    pending.append(m.group(1))
+                    continue
+                m = PROGRAM_LINE_RE.match(line)
+                if not m:
+                    continue
+                tokens = [t.rstrip(',') for t in m.group(2).replace(',', ' ').split()]
+                mnemonics = [i for i, t in enumerate(tokens) if MNEMONIC_RE.match(t)]
+                if not mnemonics:
+                    continue
+                addr = int(m.group(1), 16)
+                i = mnemonics[0]
+                self.instr[addr] = (tokens[i].upper(), tokens[i+1:])
+                for label in pending:
+                    self.labels.setdefault(label, addr)
+                pending = []
+
+        with open(symbols_dump, 'r') as f:
+            for line in f:
+                addr = SYMBOL_ADDR_RE.search(line)
+                names = [n for n in SYMBOL_NAME_RE.findall(line) if not n.startswith("0x")]
+                if addr and names:
+                    self.labels.setdefault(names[0], int(addr.group(1), 16))
+
+        self.routines = {}
+        for mnemonic, operands in self.instr.values():
+            if mnemonic != "CALL" or not operands:
+                continue
+            target = self.resolve(operands[-1])
+            if target is None:
+                continue
+            name = operands[-1] if operands[-1] in self.labels else hex(target)
+            self.routines.setdefault(target, name)
+
+    def resolve(self, operand: str):
+        if operand in self.labels:
+            return self.labels[operand]
+        try:
+            return int(operand, 0)
+        except ValueError:
+            return None
+
+    def match(self, line: str):
+        """Address of the instruction traced by ISS log `line`, None for other lines."""
+        upper = line.upper()
+        for m in TRACE_PC_RE.finditer(line):
+            addr = int(m.group(1), 16)
+            if addr in self.instr and self.instr[addr][0] in upper:
+                return addr
+        return None
+
+class Profile:
+    """Accumulates routine costs over any number of traced runs."""
+    def __init__(self, program: ProgramMap):
+        self.program = program
+        self.inclusive = {}
+        self.exclusive = {}
+        self.calls = {}
+        self.folded = {}
+        # "cycles" or "instructions", set by the first traced run
+        self.unit = None
+
+    def trace(self, log_file: str) -> tuple:
+        """(address, cost) of every instruction in the ISS log and unit of the costs."""
+        events = []
+        with open(log_file, 'r') as log:
+            for line in log:
+                addr = self.program.match(line)
+                if addr is None:
+                    continue
+                cycle = TRACE_CYCLE_RE.search(line)
+                events.append((addr, int(cycle.group(1)) if cycle else None))
+
+        if any(cycle is None for _, cycle in events):
+            return [(addr, 1) for addr, _ in events], "instructions"
+
+        steps = []
+        for i, (addr, cycle) in enumerate(events):
+            nxt = events[i+1][1] if i + 1 < len(events) else cycle + 1
+            steps.append((addr, nxt - cycle))
+        return steps, "cycles"
+
+    def add_run(self, root: str, log_file: str) -> int:
+        """Profiles ISS log of one op, `root` names the bottom stack frame. Returns total cost."""
+        total = 0
+        # [name, total at entry]
+        stack = [[root, 0]]
+        self.calls[root] = self.calls.get(root, 0) + 1
+
+        steps, unit = self.trace(log_file)
+        if self.unit is None:
+            self.unit = unit
+        elif unit != self.unit:
+            raise Exception(f"{log_file} has cost in {unit}, profile is in {self.unit}!")
+
+        for addr, cost in steps:
+            name = stack[-1][0]
+            total += cost
+            self.exclusive[name] = self.exclusive.get(name, 0) + cost
+            key = ";".join(f[0] for f in stack)
+            self.folded[key] = self.folded.get(key, 0) + cost
+
+            mnemonic, operands = self.program.instr[addr]
+            if mnemonic == "CALL" and operands:
+                target = self.program.resolve(operands[-1])
+                callee = self.program.routines.get(target, operands[-1])
+                stack.append([callee, total])
+                self.calls[callee] = self.calls.get(callee, 0) + 1
+            elif mnemonic == "RET" and len(stack) > 1:
+                self.leave(stack, total)
+
+        while stack:
+            self.leave(stack, total)
+        return total
+
+    def leave(self, stack: list, total: int):
+        name, start = stack.pop()
+        # Recursive frames are counted once, by the outermost one
+        if all(f[0] != name for f in stack):
+            self.inclusive[name] = self.inclusive.get(name, 0) + total - start
+
+    def table(self) -> list:
+        """(name, calls, inclusive, exclusive) sorted by exclusive cost."""
+        rows = [
+            (name, self.calls.get(name, 0), self.inclusive.get(name, 0), self.exclusive.get(name, 0))
+            for name in set(self.inclusive) | set(self.exclusive)
+        ]
+        return sorted(rows, key=lambda r: (-r[3], -r[2], r[0]))
+
+    def print_table(self, limit=None):
+        rows = self.table()
+        total = sum(r[3] for r in rows) or 1
+        unit = "instr" if self.unit == "instructions" else "cycles"
+        print("{:<40} {:>8} {:>12} {:>12} {:>7}".format(
+            "routine", "calls", f"incl {unit}", f"excl {unit}", "excl %"
+        ))
+        for name, calls, inclusive, exclusive in rows[:limit]:
+            print("{:<40} {:>8} {:>12} {:>12} {:>7.2f}".format(
+                name, calls, inclusive, exclusive, 100.0 * exclusive / total
+            ))
+
+    def write_folded(self, file_name: str):
+        with open(file_name, 'w') as f:
+            for key, cost in sorted(self.folded.items()):
+                f.write(f"{key} {cost}\n")
@@ -0,0 +1,156 @@
+"""
+Multi-op ISS scripts.
+
+OpSequence puts several SPECT ops into one iss_cmd and runs them in a single
+spect_iss invocation. After every op, the Data RAM Out (with result word at
+0x1100) and EMEM Out are printed to the ISS log, and `run` demultiplexes them
+into per-op <run_name>_out.hex, <run_name>_emem_out.hex and <run_name>_iss.log,
+so get_res_word and read_output work as if every op was run separately.
+
+Random numbers of all ops are queued to one rng.hex and consumed in op order,
+an op may get words queued for a previous op that did not use all of them.
+If no op sets any, existing rng.hex of the test directory is used.
+Context and key memory are dumped only at the end of the sequence and after
+ops added with `dump`, intermediate contexts of other ops do not exist.
+With an ISS session (test_common.get_session), the segments run in the live
+simulator of the session instead, see iss_session.py.
+"""
+import test_common as tc
+from iss_session import (
+    OUT_MEMS, MARKER_ADDR, GET_MEM_RE,
+    capture_commands, get_mem_word, capture_addrs, parse_capture, write_capture
+)
+
+# Capture marker of the first op, incremented by every op. Constant, so iss_cmd
+# depends only on the ops and the ISS result cache hits on reruns.
+SEQUENCE_MARKER = 0x5EC70000
+
+
+class OpSequence:
+    """
+    Usage mirrors run_op: write op inputs to `cmd_file`, then call `add_op`.
+    `run` executes the whole sequence and returns name of the final context.
+
+    With `status` (and `out_size`) of `add_op`, `run` checks the result word of
+    ops in op order and fails on the first op that does not match.
+    With `dump` of `add_op`, the sequence is split after the op: spect_iss exits
+    there and dumps <run_name>.ctx and <run_name>_keymem.hex, the rest of the
+    sequence continues from them in the next invocation. Other ops have no
+    context and key memory dumps of their own.
+    """
+    def __init__(
+            self,               test_dir,       ops_cfg,
+            name,               main=None,      isa=2,
+            tag="Application",  old_context=None, keymem=None
+        ):
+        self.test_dir = test_dir
+        self.ops_cfg = ops_cfg
+        self.name = name
+        self.main = main
+        self.isa = isa
+        self.tag = tag
+        self.old_context = old_context
+        self.keymem = keymem
+
+        self.rng = []
+        self.steps = []
+        self.expect = {}
+        # (steps, iss_cmd offset, rng words) at the end of every split segment
+        self.splits = []
+        self.cmd_file = tc.get_cmd_file(test_dir)
+
+    def set_rng(self, rng: list):
+        """Appends random numbers for the next op to the GRV queue."""
+        self.rng += rng
+
+    def add_op(self, op_name, insrc, outsrc, data_in_size, run_name=None, status=None, out_size=None, dump=False):
+        op = tc.find_in_list(op_name, self.ops_cfg)
+        cfg_word = op["id"] + (outsrc << 8) + (insrc << 12) + (data_in_size << 16)
+        tc.set_cfg_word(self.cmd_file, cfg_word)
+        tc.run(self.cmd_file)
+
+        if not run_name:
+            run_name = op_name
+        marker = (SEQUENCE_MARKER + len(self.steps)) & 0xFFFFFFFF
+        self.cmd_file.write(capture_commands(marker))
+        self.steps.append((run_name, marker))
+        if status is not None:
+            self.expect[run_name] = (status, out_size)
+        if dump:
+            self.cmd_file.flush()
+            self.splits.append((len(self.steps), self.cmd_file.tell(), len(self.rng)))
+
+    def check(self, run_name) -> bool:
+        if run_name not in self.expect:
+            return True
+        status, out_size = self.expect[run_name]
+        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(self.test_dir, run_name)
+        if SPECT_OP_STATUS != status:
+            print(f"{run_name} SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
+            return False
+        if out_size is not None and SPECT_OP_DATA_OUT_SIZE != out_size:
+            print(f"{run_name} SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
+            return False
+        return True
+
+    def run(self) -> str:
+        """
+        Returns name of the final context, None if output of an op is missing
+        or an op does not match its expected result.
+        """
+        self.cmd_file.close()
+        with open(f"{self.test_dir}/iss_cmd", 'r') as f:
+            cmds = f.read()
+
+        splits = list(self.splits)
+        if not splits or splits[-1][0] != len(self.steps):
+            splits.append((len(self.steps), len(cmds), len(self.rng)))
+
+        image = tc.get_iss_image(self.isa, self.tag, self.main)
+        session = tc.get_session()
+        old_context = self.old_context
+        keymem = self.keymem
+        step = cmd_pos = rng_pos = 0
+        for end, cmd_end, rng_end in splits:
+            if end == len(self.steps) and (end, cmd_end, rng_end) not in self.splits:
+                name = self.name
+            else:
+                name = self.steps[end-1][0]
+
+            if rng_end > rng_pos:
+                tc.set_rng(self.test_dir, self.rng[rng_pos:rng_end])
+            if session:
+                lines = session.run_cmds(
+                    image, self.test_dir, name, cmds[cmd_pos:cmd_end], self.steps[end-1][1],
+                    old_context=old_context, keymem=keymem
+                )
+                with open(f"{self.test_dir}/{name}_iss.log", 'w') as log:
+                    log.writelines(lines)
+            else:
+                with open(f"{self.test_dir}/iss_cmd", 'w') as f:
+                    f.write(cmds[cmd_pos:cmd_end])
+                    tc.exit(f)
+                tc.run_iss(image, self.test_dir, name, old_context, keymem)
+
+                with open(f"{self.test_dir}/{name}_iss.log", 'r') as log:
+                    lines = log.readlines()
+
+            start = 0
+            for run_name, marker in self.steps[step:end]:
+                idx, mems = parse_capture(lines, marker, start)
+                if mems is None:
+                    print(f"ISS FAILED: no output of {run_name}")
+                    return None
+                write_capture(self.test_dir, run_name, mems)
+                if run_name != name:
+                    with open(f"{self.test_dir}/{run_name}_iss.log", 'w') as log:
+                        log.writelines(lines[start:idx])
+                start = idx + 1
+                if not self.check(run_name):
+                    return None
+
+            old_context = name + ".ctx"
+            keymem = f"{self.test_dir}/{name}_keymem.hex"
+            step, cmd_pos, rng_pos = end, cmd_end, rng_end
+
+        return old_context
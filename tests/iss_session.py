@@ -0,0 +1,348 @@
+"""
+Persistent spect_iss sessions.
+
+IssSession keeps a single `spect_iss --shell` process alive over a pipe and feeds
+it the iss_cmd script of every op. An op that continues from the context and key
+memory of the previous op of the session runs in the same simulator, so there is
+no --dump-context/--load-context round trip and no process spawn or image load.
+IssSessionPool bounds the number of live simulators when several tests run
+concurrently, also across processes when given a lock directory.
+
+Output memories are read back with `get mem` after every op and mirrored to the
+usual <run_name>_out.hex and <run_name>_emem_out.hex files. Context and key
+memory of the last op are dumped to <run_name>.ctx and <run_name>_keymem.hex
+when the simulator exits (`stop`), that is before an op that does not continue
+from them, before parse_context/parse_key_mem and at the end of the test.
+Ops continued by a later op of the session have no dumps of their own.
+"""
+import os
+import re
+import sys
+import time
+import queue
+import shutil
+import threading
+import subprocess
+from contextlib import contextmanager
+
+import test_common as tc
+
+SESSION_CTX = "session.ctx"
+SESSION_KEYMEM = "session_keymem.hex"
+
+# Output memories mirrored to <run_name>_out.hex and <run_name>_emem_out.hex
+OUT_MEMS = [
+    ("_out.hex", 0x1000, tc.DATA_RAM_OUT_DEPTH),
+    ("_emem_out.hex", 0x5000, tc.EMEM_OUT_DEPTH)
+]
+
+MARKER_ADDR = 0x0100
+
+# First capture marker of a session, incremented by every op
+SESSION_MARKER = 0x5E550000
+
+def capture_commands(marker: int) -> str:
+    """
+    Commands that print a marker followed by the whole Data RAM Out and EMEM Out.
+    The marker is written to the config word, which is rewritten by every op.
+    """
+    s = "set mem[0x{}] 0x{}\n".format(format(MARKER_ADDR, '04X'), format(marker, '08X'))
+    s += "get mem[0x{}]\n".format(format(MARKER_ADDR, '04X'))
+    for _, base, depth in OUT_MEMS:
+        for i in range(depth):
+            s += "get mem[0x{}]\n".format(format(base + 4*i, '04X'))
+    return s
+
+# Response of spect_iss to `get mem[<addr>]`, e.g. "mem[0x1000]: 0x0000ABCD" or
+# "0x1000 0000ABCD". Prompt echoes, warnings and trace lines do not match.
+GET_MEM_RE = re.compile(
+    r"^\s*(?:[>$#]\s*)?(?:mem\s*\[\s*)?0x(?P<addr>[0-9A-Fa-f]+)"
+    r"(?:\s*\]\s*[:=]?|\s*[:=]|\s)\s*(?:0x)?(?P<value>[0-9A-Fa-f]{1,8})\s*$"
+)
+
+def get_mem_word(line: str):
+    """(address, value) of a `get mem` response line, None for other lines."""
+    m = GET_MEM_RE.match(line)
+    if not m:
+        return None
+    return int(m.group("addr"), 16), int(m.group("value"), 16)
+
+def capture_addrs() -> list:
+    return [base + 4*w for _, base, depth in OUT_MEMS for w in range(depth)]
+
+def parse_capture(lines: list, marker: int, start=0):
+    """
+    Finds the capture block started by `marker` in ISS output `lines`.
+    Returns index of the marker line and list of (suffix, [(addr, value)]),
+    (None, None) if the block is missing, incomplete or out of order.
+    """
+    idx = start
+    while idx < len(lines) and get_mem_word(lines[idx]) != (MARKER_ADDR, marker):
+        idx += 1
+    if idx == len(lines):
+        return None, None
+
+    addrs = capture_addrs()
+    values = []
+    for line in lines[idx+1:]:
+        if len(values) == len(addrs):
+            break
+        word = get_mem_word(line)
+        if word is None:
+            continue
+        if word[0] != addrs[len(values)]:
+            return None, None
+        values.append(word[1])
+    if len(values) != len(addrs):
+        return None, None
+
+    mems = []
+    for suffix, base, depth in OUT_MEMS:
+        mems.append((suffix, [(base + 4*w, values[w]) for w in range(depth)]))
+        values = values[depth:]
+    return idx, mems
+
+def write_capture(test_dir: str, run_name: str, mems: list):
+    for suffix, words in mems:
+        with open(f"{test_dir}/{run_name}{suffix}", 'w') as out:
+            for addr, val in words:
+                out.write("{} {}\n".format(format(addr, '04X'), format(val, '08X')))
+    tc.invalidate_dumps(test_dir, run_name)
+
+def file_stamp(path: str):
+    """Changes whenever `path` is rewritten, None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+class IssSession:
+    """
+    One live spect_iss process. Ops are executed through `run_op` (or
+    `run_cmds` for scripts with their own capture blocks), output memories are
+    dumped after every op the same way as in one-shot runs.
+
+    The GRV queue is loaded only on process start, so the session restarts
+    (carrying context and key memory over) whenever rng.hex is rewritten.
+    An op that does not rewrite it continues the queue of the previous op.
+    """
+    def __init__(self):
+        self.proc = None
+        self.lines = None
+        self.image = None
+        self.test_dir = None
+        self.rng_stamp = None
+        # Run name of the last op, its context and key memory are not dumped yet
+        self.pending = None
+        self.marker = SESSION_MARKER
+        # Slot lock file of IssSessionPool
+        self.slot = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _reader(self, proc, lines):
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def start(self, image: str, test_dir: str, old_context=None, keymem=None):
+        cmd = ["spect_iss"] + image.split()
+        cmd.append(f"--grv-hex={test_dir}/rng.hex")
+        cmd.append(f"--dump-context={test_dir}/{SESSION_CTX}")
+        cmd.append(f"--dump-keymem={test_dir}/{SESSION_KEYMEM}")
+        if keymem:
+            cmd.append(f"--load-keymem={keymem}")
+        if old_context:
+            cmd.append(f"--load-context={test_dir}/{old_context}")
+        cmd.append("--shell")
+
+        self.proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+        # Drain stdout in background, ISS logs every instruction and would
+        # block on a full pipe while we are still writing commands.
+        self.lines = queue.Queue()
+        threading.Thread(target=self._reader, args=(self.proc, self.lines), daemon=True).start()
+
+        self.image = image
+        self.test_dir = test_dir
+        self.rng_stamp = file_stamp(f"{test_dir}/rng.hex")
+
+    def stop(self):
+        """
+        Exits the simulator. Context and key memory are dumped on exit and
+        copied to <run_name>.ctx and <run_name>_keymem.hex of the last op.
+        """
+        if not self.proc:
+            return 0
+        try:
+            self.proc.stdin.write("exit\n")
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        ret = self.proc.wait()
+        self.proc = None
+
+        pending, self.pending = self.pending, None
+        if pending and not ret:
+            test_dir = self.test_dir
+            shutil.copy(f"{test_dir}/{SESSION_CTX}", f"{test_dir}/{pending}.ctx")
+            shutil.copy(f"{test_dir}/{SESSION_KEYMEM}", f"{test_dir}/{pending}_keymem.hex")
+            tc.invalidate_dumps(test_dir, pending)
+        return ret
+
+    def continues(self, image: str, test_dir: str, old_context=None, keymem=None) -> bool:
+        """True if an op loading `old_context` and `keymem` can run in the live simulator."""
+        return (
+            self.proc is not None and self.pending is not None
+            and image == self.image and test_dir == self.test_dir
+            and old_context == f"{self.pending}.ctx"
+            and keymem == f"{test_dir}/{self.pending}_keymem.hex"
+            and file_stamp(f"{test_dir}/rng.hex") == self.rng_stamp
+        )
+
+    def execute(self, cmds: str, marker: int) -> list:
+        """
+        Sends `cmds` and collects ISS output up to the end of the capture block
+        of `marker`, which must be the last one in `cmds`.
+        """
+        try:
+            self.proc.stdin.write(cmds)
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            pass
+
+        count = len(capture_addrs())
+        lines = []
+        remaining = None
+        while remaining != 0:
+            line = self.lines.get()
+            if line is None:
+                # Simulator exited, state of the last op is lost
+                self.pending = None
+                self.stop()
+                return lines
+            lines.append(line)
+            word = get_mem_word(line)
+            if remaining is None:
+                if word == (MARKER_ADDR, marker):
+                    remaining = count
+            elif word is not None:
+                remaining -= 1
+        return lines
+
+    def run_cmds(self, image: str, test_dir: str, run_name: str, cmds: str, marker: int,
+                 old_context=None, keymem=None) -> list:
+        """
+        Runs `cmds` ending with capture_commands(marker) as op `run_name`,
+        returns the ISS output. `old_context` and `keymem` are loaded unless
+        the op continues the previous op of the session.
+        """
+        if self.proc and not self.continues(image, test_dir, old_context, keymem):
+            if self.stop():
+                print("ISS FAILED")
+                sys.exit(2)
+        if not self.proc:
+            self.start(image, test_dir, old_context=old_context, keymem=keymem)
+
+        lines = self.execute(cmds, marker)
+        if self.proc:
+            self.pending = run_name
+        return lines
+
+    def run_op(self, image: str, test_dir: str, run_name: str, old_context=None, keymem=None):
+        """Runs iss_cmd from `test_dir` in the session, iss_cmd must not exit."""
+        with open(f"{test_dir}/iss_cmd", 'r') as cmd_file:
+            cmds = cmd_file.read()
+
+        marker = self.marker
+        self.marker = (self.marker + 1) & 0xFFFFFFFF
+        lines = self.run_cmds(
+            image, test_dir, run_name, cmds + capture_commands(marker), marker,
+            old_context=old_context, keymem=keymem
+        )
+
+        idx, mems = parse_capture(lines, marker)
+        with open(f"{test_dir}/{run_name}_iss.log", 'w') as log:
+            log.writelines(lines if idx is None else lines[:idx])
+
+        if mems is None:
+            print("ISS FAILED")
+            sys.exit(2)
+
+        write_capture(test_dir, run_name, mems)
+
+class IssSessionPool:
+    """
+    Pool of IssSession objects shared by concurrently running tests.
+    At most `size` simulators are alive at once, a session is stopped when
+    it is returned to the pool so the next test starts from a clean state.
+
+    With `lock_dir`, the `size` slots are lock files in that directory and are
+    shared by every process using the same directory (run_tests.py jobs).
+    """
+    def __init__(self, size=None, lock_dir=None):
+        if not size:
+            size = os.cpu_count()
+        self.size = size
+        self.lock_dir = lock_dir
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue()
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def _lock_slot(self, block: bool):
+        import fcntl
+        while True:
+            for i in range(self.size):
+                f = open(f"{self.lock_dir}/slot_{i}.lock", 'w')
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return f
+                except BlockingIOError:
+                    f.close()
+            if not block:
+                return None
+            time.sleep(0.1)
+
+    def borrow(self, block=True):
+        """Session from the pool, None if `block` is False and all slots are taken."""
+        if not self.slots.acquire(blocking=block):
+            return None
+        slot = None
+        if self.lock_dir:
+            slot = self._lock_slot(block)
+            if not slot:
+                self.slots.release()
+                return None
+        try:
+            s = self.idle.get_nowait()
+        except queue.Empty:
+            s = IssSession()
+        s.slot = slot
+        return s
+
+    def give_back(self, s: IssSession):
+        try:
+            s.stop()
+        finally:
+            if s.slot:
+                s.slot.close()
+                s.slot = None
+            self.idle.put(s)
+            self.slots.release()
+
+    @contextmanager
+    def session(self, block=True):
+        s = self.borrow(block)
+        try:
+            yield s
+        finally:
+            if s:
+                self.give_back(s)
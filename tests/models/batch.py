@@ -0,0 +1,36 @@
+#################################################################################
+#   Batch helpers shared by the curve models
+#################################################################################
+
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+def map_chunks(chunk_fn, columns: list, shared=(), workers=1, chunk=256) -> list:
+    """
+    Concatenated results of chunk_fn(*shared, *column_chunks) over chunks of
+    `chunk` elements of the equally long lists in `columns`. With `workers` > 1
+    the chunks run in a process pool (None for os.cpu_count()), `chunk_fn`
+    must then be a module level function.
+    """
+    n = len(columns[0]) if columns else 0
+    calls = [list(shared) + [c[i:i+chunk] for c in columns] for i in range(0, n, chunk)]
+    if workers == 1 or len(calls) < 2:
+        return [x for args in calls for x in chunk_fn(*args)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return [x for res in pool.map(chunk_fn, *zip(*calls)) for x in res]
+
+def hash_to_field_batch(MSGS: list, DST: bytes, p: int, EXP_TAG: bytes) -> list:
+    """
+    SHA512(EXP_TAG || MSG || 0x20 || DST || 0x1E) mod p of all MSGS,
+    the EXP_TAG block state and DST suffix are shared.
+    """
+    prefix = hashlib.sha512(EXP_TAG)
+    suffix = bytes([0x20]) + DST + bytes([0x1E])
+    out = []
+    for MSG in MSGS:
+        h = prefix.copy()
+        h.update(MSG)
+        h.update(suffix)
+        out.append(int.from_bytes(h.digest(), 'big') % p)
+    return out
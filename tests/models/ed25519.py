@@ -5,6 +5,8 @@
 ## First, some preliminaries that will be needed.
 
 import hashlib
+import secrets
+from .field import inv, batch_affine
 from .tmac import tmac_int
 
 def sha512(s):
@@ -14,7 +16,7 @@ def sha512(s):
 p = 2**255 - 19
 
 def modp_inv(x):
-    return pow(x, p-2, p)
+    return inv(x, p)
 
 # Curve constant
 d = -121665 * modp_inv(121666) % p
@@ -37,16 +39,129 @@ def point_add(P, Q):
     E, F, G, H = B-A, D-C, D+C, B+A;
     return (E*F, G*H, F*G, E*H);
 
+def point_double(P):
+    A, B = P[0] * P[0] % p, P[1] * P[1] % p;
+    C = 2 * P[2] * P[2] % p;
+    H = A + B;
+    E, G = H - (P[0] + P[1]) ** 2, A - B;
+    F = C + G;
+    return (E*F % p, G*H % p, F*G % p, E*H % p);
+
+def point_neg(P):
+    return (-P[0] % p, P[1], P[2], -P[3] % p)
+
+# Neutral element
+O = (0, 1, 1, 0)
+
+# Sliding window width of variable base multiplication
+WINDOW = 5
+
+# Computes Q = s * P, sliding window over odd multiples of P
+def point_mul_var(s, P):
+    P2 = point_double(P)
+    odd = [P]
+    for _ in range(2**(WINDOW - 1) - 1):
+        odd.append(point_add(odd[-1], P2))
+
+    Q = O
+    i = s.bit_length() - 1
+    while i >= 0:
+        if not (s >> i) & 1:
+            Q = point_double(Q)
+            i -= 1
+            continue
+        j = max(i - WINDOW + 1, 0)
+        while not (s >> j) & 1:
+            j += 1
+        for _ in range(i - j + 1):
+            Q = point_double(Q)
+        Q = point_add(Q, odd[((s >> j) & (2**(i - j + 1) - 1)) >> 1])
+        i = j - 1
+    return Q
+
 # Computes Q = s * Q
 def point_mul(s, P):
-    Q = (0, 1, 1, 0)  # Neutral element
-    while s > 0:
+    if P is G or P == G:
+        return point_mul_base(s)
+    return point_mul_var(s, P)
+
+## Multi-scalar multiplication sum(s_i * P_i).
+
+# Width of NAF digits in Straus' method
+NAF_WIDTH = 5
+
+# From this number of points, Pippenger's bucket method is used
+PIPPENGER_MIN = 32
+
+def wnaf(s, w=NAF_WIDTH):
+    """Digits of s in width-w NAF, least significant first"""
+    digits = []
+    while s:
         if s & 1:
-            Q = point_add(Q, P)
-        P = point_add(P, P)
+            e = s & (2**w - 1)
+            if e >= 2**(w - 1):
+                e -= 2**w
+            s -= e
+        else:
+            e = 0
+        digits.append(e)
         s >>= 1
+    return digits
+
+# Interleaved wNAF, doublings are shared by all points
+def straus(scalars, points):
+    odd = []
+    for P in points:
+        P2 = point_double(P)
+        row = [P]
+        for _ in range(2**(NAF_WIDTH - 2) - 1):
+            row.append(point_add(row[-1], P2))
+        odd.append(row)
+
+    nafs = [wnaf(s) for s in scalars]
+    Q = O
+    for i in range(max((len(n) for n in nafs), default=0) - 1, -1, -1):
+        Q = point_double(Q)
+        for naf, row in zip(nafs, odd):
+            if i >= len(naf) or not naf[i]:
+                continue
+            if naf[i] > 0:
+                Q = point_add(Q, row[naf[i] >> 1])
+            else:
+                Q = point_add(Q, point_neg(row[(-naf[i]) >> 1]))
+    return Q
+
+def pippenger(scalars, points):
+    c = max(2, len(points).bit_length() - 2)
+    bits = max((s.bit_length() for s in scalars), default=0)
+    Q = O
+    for w in range((bits + c - 1) // c - 1, -1, -1):
+        for _ in range(c):
+            Q = point_double(Q)
+        buckets = [None] * (2**c)
+        for s, P in zip(scalars, points):
+            b = (s >> (w * c)) & (2**c - 1)
+            if b:
+                buckets[b] = P if buckets[b] is None else point_add(buckets[b], P)
+        # sum(b * bucket[b]) by running sums
+        run, acc = O, O
+        for b in range(2**c - 1, 0, -1):
+            if buckets[b] is not None:
+                run = point_add(run, buckets[b])
+            acc = point_add(acc, run)
+        Q = point_add(Q, acc)
     return Q
 
+def multi_scalar_mul(scalars, points):
+    """sum(s_i * P_i) of non-negative scalars"""
+    if len(points) >= PIPPENGER_MIN:
+        return pippenger(scalars, points)
+    return straus(scalars, points)
+
+# Computes a * P + b * Q
+def point_mul_double(a, P, b, Q):
+    return straus([a, b], [P, Q])
+
 def point_equal(P, Q):
     # x1 / z1 == x2 / z2  <==>  x1 * z2 == x2 * z1
     if (P[0] * Q[2] - Q[0] * P[2]) % p != 0:
@@ -95,10 +210,76 @@ def to_affine(P):
 
     return x, y
 
+## Fixed-base multiplication by G.
+# B_TABLE[i][j] = j * 16^i * G for j in 1..8, stored as (y+x, y-x, 2*d*x*y)
+# of the affine point. Scalars are recoded to 64 signed radix-16 digits
+# in [-8, 8), so s * G is 64 additions and no doubling.
+
+B_TABLE = None
+
+def base_table():
+    global B_TABLE
+    if B_TABLE is None:
+        points = []
+        B = G
+        for _ in range(64):
+            row = [B]
+            for _ in range(7):
+                row.append(point_add(row[-1], B))
+            points += row
+            for _ in range(4):
+                B = point_double(B)
+
+        niels = [
+            ((y + x) % p, (y - x) % p, 2 * d * x * y % p)
+            for x, y in batch_to_affine(points)
+        ]
+        B_TABLE = [[None] + niels[8*i:8*i+8] for i in range(64)]
+    return B_TABLE
+
+def radix16(s):
+    """Signed radix-16 digits of s < 2^255 in [-8, 8), least significant first"""
+    e = [(s >> (4*i)) & 15 for i in range(64)]
+    carry = 0
+    for i in range(63):
+        e[i] += carry
+        carry = (e[i] + 8) >> 4
+        e[i] -= carry << 4
+    e[63] += carry
+    return e
+
+def point_madd(P, N):
+    # P + affine point in (y+x, y-x, 2*d*x*y) form
+    A, B = (P[1]-P[0]) * N[1] % p, (P[1]+P[0]) * N[0] % p;
+    C, D = P[3] * N[2] % p, 2 * P[2] % p;
+    E, F, G, H = B-A, D-C, D+C, B+A;
+    return (E*F % p, G*H % p, F*G % p, E*H % p);
+
+def point_mul_base(s):
+    table = base_table()
+    Q = O
+    for i, e in enumerate(radix16(s % q)):
+        if e > 0:
+            Q = point_madd(Q, table[i][e])
+        elif e < 0:
+            ypx, ymx, xy2d = table[i][-e]
+            Q = point_madd(Q, (ymx, ypx, -xy2d % p))
+    return Q
+
+def batch_to_affine(points):
+    """to_affine of many points with one inversion"""
+    return batch_affine(points, p)
+
 def point_compress(P):
     x, y = to_affine(P)
     return int.to_bytes(y | ((x & 1) << 255), 32, "little")
 
+def batch_point_compress(points):
+    return [
+        int.to_bytes(y | ((x & 1) << 255), 32, "little")
+        for x, y in batch_to_affine(points)
+    ]
+
 def point_decompress(s):
     if len(s) != 32:
         raise Exception("Invalid input length for decompression")
@@ -168,8 +349,8 @@ def verify(A, m, signature):
         raise Exception("Bad public key length")
     if len(signature) != 64:
         Exception("Bad signature length")
-    A = point_decompress(A)
-    if not A:
+    A_point = point_decompress(A)
+    if not A_point:
         return False
     Rs = signature[:32]
     R = point_decompress(Rs)
@@ -178,6 +359,39 @@ def verify(A, m, signature):
     S = int.from_bytes(signature[32:], "little")
     if S >= q: return False
     h = sha512_modq(Rs + A + m)
-    sB = point_mul(S, G)
-    hA = point_mul(h, A)
-    return point_equal(sB, point_add(R, hA))
\ No newline at end of file
+    # S * G - h * A == R
+    return point_equal(point_mul_double(S, G, h, point_neg(A_point)), R)
+
+# Security parameter of random batch coefficients
+BATCH_Z_BITS = 128
+
+def verify_batch(items) -> bool:
+    """
+    Randomized batch verification of (A, m, signature) triples, checks
+    8 * (sum(z_i * S_i) * G - sum(z_i * R_i) - sum(z_i * h_i * A_i)) == 0
+    with random 128-bit z_i by one multi-scalar multiplication.
+    False means at least one signature is invalid, use verify to find it.
+    Signatures with small-order components may pass here but not in verify.
+    """
+    scalars, points = [0], [G]
+    for A, m, signature in items:
+        if len(A) != 32 or len(signature) != 64:
+            return False
+        A_point = point_decompress(A)
+        Rs = signature[:32]
+        R = point_decompress(Rs)
+        if not A_point or not R:
+            return False
+        S = int.from_bytes(signature[32:], "little")
+        if S >= q:
+            return False
+        h = sha512_modq(Rs + A + m)
+        z = secrets.randbits(BATCH_Z_BITS) | 1
+        scalars[0] = (scalars[0] + z * S) % q
+        scalars += [q - z, (q - z * h % q) % q]
+        points += [R, A_point]
+
+    Q = multi_scalar_mul(scalars, points)
+    for _ in range(3):
+        Q = point_double(Q)
+    return point_equal(Q, O)
\ No newline at end of file
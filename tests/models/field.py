@@ -0,0 +1,43 @@
+#################################################################################
+#   Prime field helpers shared by the curve models
+#################################################################################
+
+def inv(x, p):
+    """Inverse of x modulo prime p, 0 for x = 0"""
+    return pow(x, p-2, p)
+
+def batch_inv(xs, p) -> list:
+    """
+    Inverses of all xs with one field inversion (Montgomery's trick),
+    zeros are mapped to 0 as by inv.
+    """
+    acc = [1]
+    for x in xs:
+        acc.append(acc[-1] * (x % p or 1) % p)
+    t = inv(acc[-1], p)
+    out = [0] * len(xs)
+    for i in range(len(xs) - 1, -1, -1):
+        x = xs[i] % p
+        if x == 0:
+            continue
+        out[i] = t * acc[i] % p
+        t = t * x % p
+    return out
+
+def batch_affine(points, p, jacobian=False, inf=None) -> list:
+    """
+    Affine (x, y) of points given as (X, Y, Z, ...) tuples, projective
+    x = X/Z, y = Y/Z or with `jacobian` x = X/Z^2, y = Y/Z^3.
+    Points with Z = 0 are returned as `inf`.
+    """
+    zinv = batch_inv([P[2] for P in points], p)
+    out = []
+    for P, zi in zip(points, zinv):
+        if zi == 0:
+            out.append(inf)
+        elif jacobian:
+            zi2 = zi * zi % p
+            out.append((P[0] * zi2 % p, P[1] * zi2 * zi % p))
+        else:
+            out.append((P[0] * zi % p, P[1] * zi % p))
+    return out
@@ -1,6 +1,7 @@
 import hashlib
 import random as rn
 
+from .field import batch_affine
 from .tmac import tmac_int
 
 p = 2**256 - 2**224 + 2**192 + 2**96 - 1
@@ -8,6 +9,7 @@ q = 0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551
 xG = 0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296
 yG = 0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5
 a = p - 3
+b = 0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b
 
 def sha256(m):
     return int(hashlib.sha256(m).hexdigest(),16)
@@ -41,7 +43,7 @@ def ec_dub(x1, y1):
     y3 = (lmbd * (x1 - x3) - y1) % p
     return x3, y3
 
-def spm(k, x, y):
+def spm_affine(k, x, y):
     xQ = 0
     yQ = 0
 
@@ -52,6 +54,218 @@ def spm(k, x, y):
 
     return xQ, yQ
 
+##################################################################
+#   Jacobian coordinates (X, Y, Z) ~ (X/Z^2, Y/Z^3), Z = 0 is the
+#   point at infinity. Affine infinity is (0, 0) as above.
+##################################################################
+
+INF = (1, 1, 0)
+
+def to_jacobian(x, y):
+    if x == 0 and y == 0:
+        return INF
+    return (x, y, 1)
+
+def to_affine(P):
+    X, Y, Z = P
+    if Z == 0:
+        return 0, 0
+    zi = inv0(Z)
+    zi2 = zi * zi % p
+    return X * zi2 % p, Y * zi2 * zi % p
+
+def batch_to_affine(points: list) -> list:
+    """to_affine of many points with one inversion"""
+    return batch_affine(points, p, jacobian=True, inf=(0, 0))
+
+def jac_neg(P):
+    X, Y, Z = P
+    return (X, (-Y) % p, Z)
+
+def jac_dbl(P):
+    # dbl-2001-b, a = -3
+    X1, Y1, Z1 = P
+    if Z1 == 0 or Y1 == 0:
+        return INF
+    delta = Z1 * Z1 % p
+    gamma = Y1 * Y1 % p
+    beta = X1 * gamma % p
+    alpha = 3 * (X1 - delta) * (X1 + delta) % p
+    X3 = (alpha * alpha - 8 * beta) % p
+    Z3 = ((Y1 + Z1) ** 2 - gamma - delta) % p
+    Y3 = (alpha * (4 * beta - X3) - 8 * gamma * gamma) % p
+    return (X3, Y3, Z3)
+
+def jac_add(P, Q):
+    # add-2007-bl
+    X1, Y1, Z1 = P
+    X2, Y2, Z2 = Q
+    if Z1 == 0:
+        return Q
+    if Z2 == 0:
+        return P
+    Z1Z1 = Z1 * Z1 % p
+    Z2Z2 = Z2 * Z2 % p
+    U1 = X1 * Z2Z2 % p
+    U2 = X2 * Z1Z1 % p
+    S1 = Y1 * Z2 * Z2Z2 % p
+    S2 = Y2 * Z1 * Z1Z1 % p
+    H = (U2 - U1) % p
+    r = 2 * (S2 - S1) % p
+    if H == 0:
+        return jac_dbl(P) if r == 0 else INF
+    I = 4 * H * H % p
+    J = H * I % p
+    V = U1 * I % p
+    X3 = (r * r - J - 2 * V) % p
+    Y3 = (r * (V - X3) - 2 * S1 * J) % p
+    Z3 = ((Z1 + Z2) ** 2 - Z1Z1 - Z2Z2) * H % p
+    return (X3, Y3, Z3)
+
+def jac_madd(P, x2, y2):
+    """P + (x2, y2), (x2, y2) affine and not infinity (madd-2007-bl)"""
+    X1, Y1, Z1 = P
+    if Z1 == 0:
+        return (x2, y2, 1)
+    Z1Z1 = Z1 * Z1 % p
+    U2 = x2 * Z1Z1 % p
+    S2 = y2 * Z1 * Z1Z1 % p
+    H = (U2 - X1) % p
+    r = 2 * (S2 - Y1) % p
+    if H == 0:
+        return jac_dbl(P) if r == 0 else INF
+    HH = H * H % p
+    I = 4 * HH % p
+    J = H * I % p
+    V = X1 * I % p
+    X3 = (r * r - J - 2 * V) % p
+    Y3 = (r * (V - X3) - 2 * Y1 * J) % p
+    Z3 = ((Z1 + H) ** 2 - Z1Z1 - HH) % p
+    return (X3, Y3, Z3)
+
+##################################################################
+#   Fixed-base table of G: G_TABLE[i][j] = (j * 16^i) * G affine
+##################################################################
+
+G_WINDOW = 4
+G_WINDOWS = 64
+
+G_TABLE = None
+
+def g_table() -> list:
+    global G_TABLE
+    if G_TABLE is None:
+        points = []
+        B = (xG, yG, 1)
+        for _ in range(G_WINDOWS):
+            row = [B]
+            for _ in range(2**G_WINDOW - 2):
+                row.append(jac_add(row[-1], B))
+            points += row
+            for _ in range(G_WINDOW):
+                B = jac_dbl(B)
+        affine = batch_to_affine(points)
+        n = 2**G_WINDOW - 1
+        G_TABLE = [[None] + affine[i*n:(i+1)*n] for i in range(G_WINDOWS)]
+    return G_TABLE
+
+def spm_base_jac(k):
+    """k * G, Jacobian"""
+    table = g_table()
+    k %= q
+    Q = INF
+    for i in range(G_WINDOWS):
+        j = (k >> (G_WINDOW * i)) & (2**G_WINDOW - 1)
+        if j:
+            Q = jac_madd(Q, *table[i][j])
+    return Q
+
+##################################################################
+#   Variable base, width-w NAF
+##################################################################
+
+WNAF_WIDTH = 5
+
+def wnaf(k, w=WNAF_WIDTH) -> list:
+    """Digits of k in width-w NAF, least significant first"""
+    digits = []
+    while k:
+        if k & 1:
+            d = k & (2**w - 1)
+            if d >= 2**(w - 1):
+                d -= 2**w
+            k -= d
+        else:
+            d = 0
+        digits.append(d)
+        k >>= 1
+    return digits
+
+def spm_jac(k, P, w=WNAF_WIDTH):
+    """k * P, P Jacobian"""
+    P2 = jac_dbl(P)
+    odd = [P]
+    for _ in range(2**(w - 2) - 1):
+        odd.append(jac_add(odd[-1], P2))
+
+    Q = INF
+    for d in reversed(wnaf(k, w)):
+        Q = jac_dbl(Q)
+        if d > 0:
+            Q = jac_add(Q, odd[d >> 1])
+        elif d < 0:
+            Q = jac_add(Q, jac_neg(odd[(-d) >> 1]))
+    return Q
+
+##################################################################
+#   Joint u1 * G + u2 * P (Straus), odd multiples of G are cached
+##################################################################
+
+G_WNAF_WIDTH = 7
+
+G_ODD = None
+
+def g_odd() -> list:
+    global G_ODD
+    if G_ODD is None:
+        G2 = jac_dbl((xG, yG, 1))
+        odd = [(xG, yG, 1)]
+        for _ in range(2**(G_WNAF_WIDTH - 2) - 1):
+            odd.append(jac_add(odd[-1], G2))
+        G_ODD = batch_to_affine(odd)
+    return G_ODD
+
+def spm_double_jac(u1, u2, P):
+    """u1 * G + u2 * P, P Jacobian"""
+    P2 = jac_dbl(P)
+    odd = [P]
+    for _ in range(2**(WNAF_WIDTH - 2) - 1):
+        odd.append(jac_add(odd[-1], P2))
+    godd = g_odd()
+
+    n1 = wnaf(u1, G_WNAF_WIDTH)
+    n2 = wnaf(u2, WNAF_WIDTH)
+    Q = INF
+    for i in range(max(len(n1), len(n2)) - 1, -1, -1):
+        Q = jac_dbl(Q)
+        d = n1[i] if i < len(n1) else 0
+        if d > 0:
+            Q = jac_madd(Q, *godd[d >> 1])
+        elif d < 0:
+            x, y = godd[(-d) >> 1]
+            Q = jac_madd(Q, x, (-y) % p)
+        d = n2[i] if i < len(n2) else 0
+        if d > 0:
+            Q = jac_add(Q, odd[d >> 1])
+        elif d < 0:
+            Q = jac_add(Q, jac_neg(odd[(-d) >> 1]))
+    return Q
+
+def spm(k, x, y):
+    if x == xG and y == yG:
+        return to_affine(spm_base_jac(k))
+    return to_affine(spm_jac(k, to_jacobian(x, y)))
+
 def key_gen(k: bytes):
     d = int.from_bytes(k, 'big') % q
     w = tmac_int(d, b"", b"\x0A")
@@ -98,4 +312,43 @@ def sign_mpw1(d, z, k):
 
     return r, s
 
+def is_on_curve(x, y):
+    return (y * y - x * x * x - a * x - b) % p == 0
+
+def verify_prepare(Ax, Ay, z: bytes, r: int, s: int):
+    """(u1, u2) of the verification, None if inputs are invalid"""
+    if not (0 < r < q and 0 < s < q):
+        return None
+    if not (0 <= Ax < p and 0 <= Ay < p) or not is_on_curve(Ax, Ay):
+        return None
+    w = inv0(s, q)
+    z_int = int.from_bytes(z, 'big')
+    return z_int * w % q, r * w % q
+
+def verify(Ax, Ay, z: bytes, r: int, s: int) -> bool:
+    """ECDSA verification of signature (r, s) of hash z by public key (Ax, Ay)"""
+    u = verify_prepare(Ax, Ay, z, r, s)
+    if u is None:
+        return False
+    x, y = to_affine(spm_double_jac(u[0], u[1], (Ax, Ay, 1)))
+    if x == 0 and y == 0:
+        return False
+    return x % q == r
+
+def verify_batch(items) -> list:
+    """
+    verify of many (Ax, Ay, z, r, s) tuples, returns list of results.
+    Points are normalized together with one inversion.
+    """
+    results = [False] * len(items)
+    idx, points = [], []
+    for i, (Ax, Ay, z, r, s) in enumerate(items):
+        u = verify_prepare(Ax, Ay, z, r, s)
+        if u is None:
+            continue
+        idx.append(i)
+        points.append(spm_double_jac(u[0], u[1], (Ax, Ay, 1)))
 
+    for i, P, (x, y) in zip(idx, points, batch_to_affine(points)):
+        results[i] = P[2] != 0 and x % q == items[i][3]
+    return results
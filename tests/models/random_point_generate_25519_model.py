@@ -1,6 +1,9 @@
 import binascii
 import hashlib
 
+from .field import inv, batch_affine
+from .batch import map_chunks, hash_to_field_batch
+
 p = 2**255 - 19
 A = 486662
 
@@ -39,13 +42,14 @@ def sgn0(x):
     return x % 2
 
 def inv0(x):
-    return pow(x, p-2, p)
+    return inv(x, p)
 
 def sha512(s):
     return hashlib.sha512(s).digest()
 
+EXP_TAG = int2bytes(0x8000000000000000000000000000000000000000000000000000000000545301)
+
 def expand_message(MSG: bytes, DST: bytes) -> bytes:
-    EXP_TAG = int2bytes(0x8000000000000000000000000000000000000000000000000000000000545301)
     MSG = EXP_TAG + MSG + int2bytes(0x20) + DST + int2bytes(0x1E)
     return sha512(MSG)
 
@@ -98,8 +102,6 @@ def point_generate_curve25519(DST: str, rng: int):
     m = int2bytes(rng)
     u = hash_to_field(m, DST)
     xn, xd, yn, yd = map_to_curve_elligator2_curve25519(u)
-    x = xn * inv0(xd) % p
-    y = yn * inv0(yd) % p
     x = xn
     z = xd
     y = yn * z % p
@@ -122,9 +124,43 @@ def point_generate_ed25519(DST: str, rng: int):
     u = hash_to_field(m, DST)
     xMn, xMd, yMn, yMd = map_to_curve_elligator2_curve25519(u)
     xn, xd, yn, yd = map_to_edwards(xMn, xMd, yMn, yMd)
-    xq = xn * pow(xd, p-2, p)
-    yq = yn * pow(yd, p-2, p)
     x = xn * yd % p
     y = yn * xd % p
     z = xd * yd % p
     return (x, y, z)
+
+
+#################################################################################
+#   Batch point generation
+#################################################################################
+
+def point_generate_curve25519_chunk(DST: bytes, rngs: list) -> list:
+    out = []
+    for u in hash_to_field_batch([int2bytes(rng) for rng in rngs], DST, p, EXP_TAG):
+        xn, xd, yn, yd = map_to_curve_elligator2_curve25519(u)
+        out.append((xn, yn * xd % p, xd))
+    return out
+
+def point_generate_ed25519_chunk(DST: bytes, rngs: list) -> list:
+    out = []
+    for u in hash_to_field_batch([int2bytes(rng) for rng in rngs], DST, p, EXP_TAG):
+        xn, xd, yn, yd = map_to_edwards(*map_to_curve_elligator2_curve25519(u))
+        out.append((xn * yd % p, yn * xd % p, xd * yd % p))
+    return out
+
+def point_generate_batch(chunk_fn, DST: bytes, rngs: list, workers=1, chunk=256, affine=False) -> list:
+    """
+    Maps `rngs` by `chunk_fn` (see batch.map_chunks for `workers` and `chunk`).
+    Points are projective (x, y, z) as returned by point_generate_*, with
+    `affine` they are (x, y) normalized by one shared inversion.
+    """
+    points = map_chunks(chunk_fn, [rngs], (DST,), workers, chunk)
+    if affine:
+        return batch_affine(points, p)
+    return points
+
+def point_generate_curve25519_batch(DST: bytes, rngs: list, workers=1, chunk=256, affine=False) -> list:
+    return point_generate_batch(point_generate_curve25519_chunk, DST, rngs, workers, chunk, affine)
+
+def point_generate_ed25519_batch(DST: bytes, rngs: list, workers=1, chunk=256, affine=False) -> list:
+    return point_generate_batch(point_generate_ed25519_chunk, DST, rngs, workers, chunk, affine)
@@ -0,0 +1,86 @@
+from .field import batch_affine
+from .batch import map_chunks, hash_to_field_batch
+from .random_point_generate_25519_model import int2bytes, EXP_TAG, cmov, sgn0
+
+p = 0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff
+a = p - 3
+b = 0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b
+Z = -10 % p
+
+c1 = (p - 3) // 4       # Integer arithmetic
+c2 = pow(-Z % p, (p + 1) // 4, p)   # sqrt(-Z)
+
+def is_on_p256(x, y, z = 1):
+    if z > 1:
+        zinv = pow(z, p-2, p)
+        x = x * zinv % p
+        y = y * zinv % p
+    return pow(y, 2, p) == (pow(x, 3, p) + a * x + b) % p
+
+def hash_to_field(MSG: bytes, DST: bytes) -> int:
+    return hash_to_field_batch([MSG], DST, p, EXP_TAG)[0]
+
+def sqrt_ratio_3mod4(u, v):
+    tv1 = pow(v, 2, p)
+    tv2 = u * v % p
+    tv1 = tv1 * tv2 % p
+    y1 = pow(tv1, c1, p)
+    y1 = y1 * tv2 % p
+    y2 = y1 * c2 % p
+    tv3 = pow(y1, 2, p)
+    tv3 = tv3 * v % p
+    isQR = tv3 == u % p
+    y = cmov(y2, y1, isQR)
+    return (isQR, y)
+
+def map_to_curve_simple_swu(u):
+    """Point (x, y, z) in projective coordinates as computed by map_to_curve_simple_swu.s"""
+    tv1 = pow(u, 2, p)
+    tv1 = Z * tv1 % p
+    tv2 = pow(tv1, 2, p)
+    tv2 = (tv2 + tv1) % p
+    tv3 = (tv2 + 1) % p
+    tv3 = b * tv3 % p
+    tv4 = cmov(Z, -tv2 % p, tv2 != 0)
+    tv4 = a * tv4 % p
+    tv2 = pow(tv3, 2, p)
+    tv6 = pow(tv4, 2, p)
+    tv5 = a * tv6 % p
+    tv2 = (tv2 + tv5) % p
+    tv2 = tv2 * tv3 % p
+    tv6 = tv6 * tv4 % p
+    tv5 = b * tv6 % p
+    tv2 = (tv2 + tv5) % p
+    x = tv1 * tv3 % p
+    (is_gx1_square, y1) = sqrt_ratio_3mod4(tv2, tv6)
+    y = tv1 * u % p
+    y = y * y1 % p
+    x = cmov(x, tv3, is_gx1_square)
+    y = cmov(y, y1, is_gx1_square)
+    e1 = sgn0(u) == sgn0(y)
+    y = cmov(-y % p, y, e1)
+    y = y * tv4 % p
+    return (x, y, tv4)
+
+def point_generate_p256(DST: bytes, rng: int):
+    m = int2bytes(rng)
+    u = hash_to_field(m, DST)
+    return map_to_curve_simple_swu(u)
+
+#################################################################################
+#   Batch point generation
+#################################################################################
+
+def point_generate_p256_chunk(DST: bytes, rngs: list) -> list:
+    return [map_to_curve_simple_swu(u) for u in hash_to_field_batch([int2bytes(rng) for rng in rngs], DST, p, EXP_TAG)]
+
+def point_generate_p256_batch(DST: bytes, rngs: list, workers=1, chunk=256, affine=False) -> list:
+    """
+    point_generate_p256 of all `rngs` (see batch.map_chunks for `workers` and
+    `chunk`). With `affine` the points are (x, y) normalized by one shared
+    inversion.
+    """
+    points = map_chunks(point_generate_p256_chunk, [rngs], (DST,), workers, chunk)
+    if affine:
+        return batch_affine(points, p)
+    return points
@@ -1,12 +1,13 @@
 
 from binascii import hexlify
-from copy import deepcopy
-from functools import reduce
+import struct
+from copy import copy
+from functools import lru_cache
 from math import log
-from operator import xor
-from typing import Callable, List, Optional, Protocol
+from typing import Callable, List, Optional, Protocol, Tuple
 from functools import partial
 
+import numpy as np
 from typing_extensions import Self
 
 # The Keccak-f round constants.
@@ -122,53 +123,106 @@ def multirate_padding(
         return [suffix] + ([0x00] * (padlen - 2)) + [0x80]
 
 
-def keccak_f(state: "KeccakState") -> None:
+@lru_cache(maxsize=None)
+def keccak_params(lanew: int) -> Tuple[tuple, tuple, int]:
     """
-    This is Keccak-f permutation.  It operates on and
-    mutates the passed-in KeccakState.  It returns nothing.
+    Constants of Keccak-f[25 * lanew], computed once per lane width:
+    round constants, rho and pi as (source, destination, rotation) of
+    flat lane indexes (x + 5 * y) and the lane mask.
+    """
+    nr = 12 + 2 * int(log(lanew, 2))
+    rcs = tuple(x % 2**lanew for x in ROUND_CONSTANTS[:nr])
+    rho_pi = tuple(
+        (x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), ROTATION_CONSTANTS[y][x] % lanew)
+        for y in range(5)
+        for x in range(5)
+    )
+    return rcs, rho_pi, MASKS[lanew]
+
+
+def keccak_f_lanes(a: List[int], lanew: int) -> None:
     """
-    __ROUND_CONSTANTS = [x % 2**state.lanew for x in ROUND_CONSTANTS]
-    __ROTATION_CONSTANTS = [
-        [x % state.lanew for x in row] for row in ROTATION_CONSTANTS
-    ]
-    __W, __H = state.W, state.H
-    __RANGE_W, __RANGE_H = state.RANGE_W, state.RANGE_H
-    __LANEW = state.lanew
-    zero = state.zero
+    Keccak-f permutation of flat lane list `a` (lane x, y at index x + 5 * y),
+    `a` is mutated in place.
+    """
+    rcs, rho_pi, mask = keccak_params(lanew)
+    b = [0] * 25
+
+    for rc in rcs:
+        # theta
+        c0 = a[0] ^ a[5] ^ a[10] ^ a[15] ^ a[20]
+        c1 = a[1] ^ a[6] ^ a[11] ^ a[16] ^ a[21]
+        c2 = a[2] ^ a[7] ^ a[12] ^ a[17] ^ a[22]
+        c3 = a[3] ^ a[8] ^ a[13] ^ a[18] ^ a[23]
+        c4 = a[4] ^ a[9] ^ a[14] ^ a[19] ^ a[24]
+        d = (
+            c4 ^ (((c1 << 1) | (c1 >> (lanew - 1))) & mask),
+            c0 ^ (((c2 << 1) | (c2 >> (lanew - 1))) & mask),
+            c1 ^ (((c3 << 1) | (c3 >> (lanew - 1))) & mask),
+            c2 ^ (((c4 << 1) | (c4 >> (lanew - 1))) & mask),
+            c3 ^ (((c0 << 1) | (c0 >> (lanew - 1))) & mask),
+        )
+
+        # theta, rho and pi
+        for src, dst, r in rho_pi:
+            v = a[src] ^ d[src % 5]
+            b[dst] = ((v << r) | (v >> (lanew - r))) & mask
 
-    def round(a: List[List[int]], rc: int) -> None:
+        # chi
+        for y in (0, 5, 10, 15, 20):
+            b0, b1, b2, b3, b4 = b[y : y + 5]
+            a[y] = b0 ^ (~b1 & b2)
+            a[y + 1] = b1 ^ (~b2 & b3)
+            a[y + 2] = b2 ^ (~b3 & b4)
+            a[y + 3] = b3 ^ (~b4 & b0)
+            a[y + 4] = b4 ^ (~b0 & b1)
+
+        # iota
+        a[0] ^= rc
 
+
+def keccak_f_np(a: np.ndarray) -> None:
+    """
+    Keccak-f[400] permutation of many independent states in lockstep.
+    `a` is (25, N) uint16 array, column n holds flat lanes of state n.
+    It is mutated in place.
+    """
+    rcs, rho_pi, _ = keccak_params(16)
+    b = np.empty_like(a)
+    a5 = a.reshape(5, 5, -1)
+    b5 = b.reshape(5, 5, -1)
+
+    for rc in rcs:
         # theta
-        c = [reduce(xor, a[x]) for x in __RANGE_W]
-        d = [0] * __W
-        for x in __RANGE_W:
-            d[x] = c[(x - 1) % __W] ^ rol(c[(x + 1) % __W], 1, __LANEW)
-            for y in __RANGE_H:
-                a[x][y] ^= d[x]
+        c = a5[0] ^ a5[1] ^ a5[2] ^ a5[3] ^ a5[4]
+        c1 = np.roll(c, -1, axis=0)
+        a5 ^= np.roll(c, 1, axis=0) ^ ((c1 << np.uint16(1)) | (c1 >> np.uint16(15)))
 
         # rho and pi
-        b = zero()
-        for x in __RANGE_W:
-            for y in __RANGE_H:
-                b[y % __W][(2 * x + 3 * y) % __H] = rol(
-                    a[x][y], __ROTATION_CONSTANTS[y][x], __LANEW
-                )
+        for src, dst, r in rho_pi:
+            if r:
+                b[dst] = (a[src] << np.uint16(r)) | (a[src] >> np.uint16(16 - r))
+            else:
+                b[dst] = a[src]
 
         # chi
-        for x in __RANGE_W:
-            for y in __RANGE_H:
-                a[x][y] = b[x][y] ^ (
-                    (~b[(x + 1) % __W][y]) & b[(x + 2) % __W][y]
-                )
+        a5[...] = b5 ^ (~np.roll(b5, -1, axis=1) & np.roll(b5, -2, axis=1))
 
         # iota
-        a[0][0] ^= rc
+        a[0] ^= np.uint16(rc)
 
-    l_ = int(log(__LANEW, 2))
-    nr = 12 + 2 * l_
 
-    for ir in range(nr):
-        round(state.s, __ROUND_CONSTANTS[ir])
+def keccak_f(state: "KeccakState") -> None:
+    """
+    This is Keccak-f permutation.  It operates on and
+    mutates the passed-in KeccakState.  It returns nothing.
+    """
+    s = state.s
+    a = [s[x][y] for y in state.RANGE_H for x in state.RANGE_W]
+    keccak_f_lanes(a, state.lanew)
+    for y in state.RANGE_H:
+        for x in state.RANGE_W:
+            s[x][y] = a[x + 5 * y]
 
 
 class KeccakState:
@@ -302,10 +356,14 @@ class KeccakSponge:
         self.state = KeccakState(bitrate, width)
         self.padfn = padfn
         self.permfn = permfn
-        self.buffer: List[int] = []
+        self.buffer = bytearray()
 
     def copy(self) -> Self:
-        return deepcopy(self)
+        c = copy(self)
+        c.state = copy(self.state)
+        c.state.s = [row[:] for row in self.state.s]
+        c.buffer = bytearray(self.buffer)
+        return c
 
     def absorb_block(self, bb: List[int]) -> None:
         assert len(bb) == self.state.bitrate_bytes
@@ -313,18 +371,21 @@ class KeccakSponge:
         self.permfn(self.state)
 
     def absorb(self, s: bytes) -> None:
-        self.buffer += KeccakState.bytes2ilist(s)
+        rate = self.state.bitrate_bytes
+        self.buffer += s
+        end = len(self.buffer) - len(self.buffer) % rate
 
-        while len(self.buffer) >= self.state.bitrate_bytes:
-            self.absorb_block(self.buffer[: self.state.bitrate_bytes])
-            self.buffer = self.buffer[self.state.bitrate_bytes :]
+        with memoryview(self.buffer) as view:
+            for i in range(0, end, rate):
+                self.absorb_block(KeccakState.bytes2ilist(view[i : i + rate]))
+        del self.buffer[:end]
 
     def absorb_final(self) -> None:
-        padded = self.buffer + self.padfn(
+        padded = KeccakState.bytes2ilist(self.buffer) + self.padfn(
             len(self.buffer), self.state.bitrate_bytes
         )
         self.absorb_block(padded)
-        self.buffer = []
+        self.buffer = bytearray()
 
     def squeeze_once(self) -> List[int]:
         rc = self.state.squeeze()
@@ -423,13 +484,153 @@ tmac_padding = partial(multirate_padding, suffix=0x04)
 
 ts_keccak = KeccakHash.preset(144, 256, 256, padfn=tmac_padding)
 
+# TMAC sponge parameters, Keccak-f[400] with 16-bit lanes
+TMAC_RATE = 18
+TMAC_RATE_LANES = TMAC_RATE // 2
+TMAC_DIGEST_SIZE = 32
+
+def tmac_pad(X: bytes) -> bytes:
+    """Padded TMAC input, multiple of TMAC_RATE bytes"""
+    return X + bytes(tmac_padding(len(X) % TMAC_RATE, TMAC_RATE))
+
+TMAC_RATE_FMT = struct.Struct(f"<{TMAC_RATE_LANES}H")
+TMAC_STATE_FMT = struct.Struct("<25H")
+
+# Data block of eddsa_nonce_update
+TMAC_FW_BLOCK = 144
+
+class TmacSponge:
+    """
+    Streaming ts_keccak sponge on flat lanes.
+
+    Input is buffered in a bytearray and absorbed through a memoryview, so
+    streaming long messages is linear. `copy` snapshots 25 lanes and the
+    partial block, `digest` does not modify the sponge.
+    """
+    def __init__(self, initial_input: Optional[bytes] = None) -> None:
+        self.lanes = [0] * 25
+        self.buffer = bytearray()
+        if initial_input is not None:
+            self.update(initial_input)
+
+    def copy(self) -> "TmacSponge":
+        c = TmacSponge()
+        c.lanes = self.lanes[:]
+        c.buffer = bytearray(self.buffer)
+        return c
+
+    def absorb(self, view: memoryview) -> None:
+        """Absorbs whole blocks of `view`, length must be multiple of TMAC_RATE."""
+        a = self.lanes
+        for i in range(0, len(view), TMAC_RATE):
+            for j, lane in enumerate(TMAC_RATE_FMT.unpack_from(view, i)):
+                a[j] ^= lane
+            keccak_f_lanes(a, 16)
+
+    def update(self, data: bytes) -> None:
+        self.buffer += data
+        end = len(self.buffer) - len(self.buffer) % TMAC_RATE
+        with memoryview(self.buffer) as view:
+            self.absorb(view[:end])
+        del self.buffer[:end]
+
+    def state(self) -> bytes:
+        """
+        50-byte Keccak-f[400] state (lanes in x + 5 * y order, little-endian),
+        the layout of "TMAC" in parse_context. spect_iss dumps the `state` byte
+        array of its KeccakWidth400_SpongeInstance (followed by rate,
+        byteIOIndex and squeezing), which XKCP stores in this order.
+        Buffered partial block is not included.
+        """
+        return TMAC_STATE_FMT.pack(*self.lanes)
+
+    def digest(self) -> bytes:
+        c = self.copy()
+        c.buffer += bytes(tmac_padding(len(c.buffer), TMAC_RATE))
+        with memoryview(c.buffer) as view:
+            c.absorb(view)
+
+        a = c.lanes
+        out = b""
+        while True:
+            out += TMAC_RATE_FMT.pack(*a[:TMAC_RATE_LANES])
+            if len(out) >= TMAC_DIGEST_SIZE:
+                return out[:TMAC_DIGEST_SIZE]
+            keccak_f_lanes(a, 16)
+
+    def block_states(self, data: bytes, block_size: int = TMAC_FW_BLOCK):
+        """
+        Absorbs `data` and yields state() after every whole `block_size`
+        bytes, the way eddsa_nonce_update processes the message.
+        """
+        with memoryview(data) as view:
+            for i in range(0, len(data) - len(data) % block_size, block_size):
+                self.update(view[i : i + block_size])
+                yield self.state()
+            self.update(view[len(data) - len(data) % block_size :])
+
+def ts_keccak_digest(X: bytes) -> bytes:
+    """ts_keccak(X).digest() on flat lanes"""
+    return TmacSponge(X).digest()
+
+def tmac_stream(key: bytes, nonce: bytes) -> TmacSponge:
+    """TMAC sponge with key and nonce absorbed, data is added by `update`"""
+    return TmacSponge(nonce + bytes([len(key)]) + key + b"\x00\x00")
+
 def tmac(key: bytes, data: bytes, nonce: bytes) -> bytes:
     """TMAC computation function"""
-    X = nonce + bytes([len(key)]) + key + b"\x00\x00" + data
-    return ts_keccak(X).digest()
+    h = tmac_stream(key, nonce)
+    h.update(data)
+    return h.digest()
 
 def tmac_int(key: int, data: bytes, nonce: bytes) -> int:
     """TMAC computation function using integers"""
     key_bytes = key.to_bytes(32, 'big')
     tmac_bytes = tmac(key_bytes, data, nonce)
     return int.from_bytes(tmac_bytes, 'big')
+
+# Smaller groups are computed one by one, NumPy setup would dominate
+TMAC_BATCH_MIN = 8
+
+def tmac_batch(keys: List[bytes], datas: List[bytes], nonce: bytes) -> List[bytes]:
+    """
+    TMAC of many (key, data) pairs with a common nonce. Padded inputs are
+    grouped by number of blocks, each group is absorbed in lockstep by
+    keccak_f_np. Returns digests in order of inputs.
+    """
+    assert len(keys) == len(datas)
+    groups = {}
+    for i, (key, data) in enumerate(zip(keys, datas)):
+        padded = tmac_pad(nonce + bytes([len(key)]) + key + b"\x00\x00" + data)
+        groups.setdefault(len(padded) // TMAC_RATE, []).append((i, padded))
+
+    out = [None] * len(keys)
+    for blocks, group in groups.items():
+        if len(group) < TMAC_BATCH_MIN:
+            for i, _ in group:
+                out[i] = tmac(keys[i], datas[i], nonce)
+            continue
+
+        # (blocks, rate lanes, N) little-endian 16-bit lanes of all inputs
+        m = np.frombuffer(b"".join(p for _, p in group), dtype='<u2').astype(np.uint16)
+        m = m.reshape(len(group), blocks, TMAC_RATE_LANES).transpose(1, 2, 0)
+
+        a = np.zeros((25, len(group)), dtype=np.uint16)
+        for blk in range(blocks):
+            a[:TMAC_RATE_LANES] ^= m[blk]
+            keccak_f_np(a)
+
+        digest = [a[:TMAC_RATE_LANES].copy()]
+        while len(digest) * TMAC_RATE < TMAC_DIGEST_SIZE:
+            keccak_f_np(a)
+            digest.append(a[:TMAC_RATE_LANES].copy())
+        d = np.concatenate(digest).T.astype('<u2').tobytes()
+        size = len(digest) * TMAC_RATE
+        for n, (i, _) in enumerate(group):
+            out[i] = d[n * size : n * size + TMAC_DIGEST_SIZE]
+    return out
+
+def tmac_int_batch(keys: List[int], datas: List[bytes], nonce: bytes) -> List[int]:
+    """tmac_int of many (key, data) pairs with a common nonce"""
+    digests = tmac_batch([k.to_bytes(32, 'big') for k in keys], datas, nonce)
+    return [int.from_bytes(d, 'big') for d in digests]
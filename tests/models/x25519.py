@@ -1,17 +1,12 @@
+from .field import inv, batch_inv
+from .batch import map_chunks
+
 p = 2**255 - 19
 
 a24M = 121665
 
 def inv0(z):
-    return pow(z, p-2, p)
-
-def cswap(swap, x_2, x_3):
-    dummy = swap * ((x_2 - x_3) %p)
-    x_2 = x_2 - dummy
-    x_2 %=p
-    x_3 = x_3 + dummy
-    x_3 %=p
-    return (x_2, x_3)
+    return inv(z, p)
 
 def int2scalar(x: int) -> int:
     tmp = x
@@ -25,61 +20,50 @@ def bytes2scalar(b: bytes) -> int:
     tmp |= 2**254
     return tmp
 
-def x25519(k, u):
-    x_1 = u
-    x_2 = 1
-    z_2 = 0
-    x_3 = u
-    z_3 = 1
+def x25519_ladder(k, u) -> tuple:
+    """
+    Montgomery ladder of RFC 7748, returns projective (x_2, z_2) of k * u.
+    Same steps as x25519, the swaps exchange the tuples instead of masking.
+    """
+    x_1 = u % p
+    x_2, z_2 = 1, 0
+    x_3, z_3 = x_1, 1
     swap = 0
 
     for t in reversed(range(255)):
         k_t = (k >> t) & 1
-        swap ^= k_t
-        x_2, x_3 = cswap(swap, x_2, x_3)
-        z_2, z_3 = cswap(swap, z_2, z_3)
+        if swap ^ k_t:
+            x_2, x_3, z_2, z_3 = x_3, x_2, z_3, z_2
         swap = k_t
 
-        A = x_2 + z_2
-        A %=p
-
-        AA = A * A
-        AA %=p
-
-        B = x_2 - z_2
-        B %=p
-
-        BB = B * B
-        BB %=p
-
-        E = AA - BB
-        E %=p
-
-        C = x_3 + z_3
-        C %=p
-
-        D = x_3 - z_3
-        D %=p
+        A = (x_2 + z_2) % p
+        AA = A * A % p
+        B = (x_2 - z_2) % p
+        BB = B * B % p
+        E = (AA - BB) % p
+        DA = (x_3 - z_3) * A % p
+        CB = (x_3 + z_3) * B % p
+        x_3 = (DA + CB) ** 2 % p
+        z_3 = x_1 * (DA - CB) ** 2 % p
+        x_2 = AA * BB % p
+        z_2 = E * (AA + a24M * E) % p
+
+    if swap:
+        x_2, z_2 = x_3, z_3
+    return (x_2, z_2)
+
+def x25519_chunk(ks: list, us: list) -> list:
+    ladders = [x25519_ladder(k, u) for k, u in zip(ks, us)]
+    zinv = batch_inv([z for _, z in ladders], p)
+    return [x * zi % p for (x, _), zi in zip(ladders, zinv)]
+
+def x25519_batch(ks: list, us: list, workers=1, chunk=256) -> list:
+    """
+    x25519(k, u) of all pairs of `ks` and `us`. Every chunk of `chunk` pairs
+    shares one inversion (see batch.map_chunks for `workers`).
+    """
+    return map_chunks(x25519_chunk, [ks, us], (), workers, chunk)
 
-        DA = D * A
-        DA %=p
-
-        CB = C * B
-        CB %=p
-
-        x_3 = ((DA + CB) %p)**2
-        x_3 %=p
-
-        z_3 = x_1 * (((DA - CB) %p)**2) %p
-        z_3 %=p
-
-        x_2 = AA * BB
-        x_2 %=p
-
-        z_2 = E * ((AA + (a24M * E) %p) %p)
-        z_2 %=p
-
-    x_2, x_3 = cswap(swap, x_2, x_3)
-    z_2, z_3 = cswap(swap, z_2, z_3)
-
-    return (x_2 * inv0(z_2)) % p
\ No newline at end of file
+def x25519(k, u):
+    x_2, z_2 = x25519_ladder(k, u)
+    return (x_2 * inv0(z_2)) % p
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Parallel runner of SPECT firmware tests.
+
+Every (test, seed) job runs `test_<name>.py` in its own temporary workspace
+(TS_SPECT_FW_TEST_DIR), so any number of tests and seeds can run at once.
+Results are aggregated and optionally written as JUnit XML and JSON.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import random as rn
+import xml.etree.ElementTree as ET
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+TS_REPO_ROOT = os.environ["TS_REPO_ROOT"]
+TESTS_DIR = f"{TS_REPO_ROOT}/tests"
+
+APP_TESTS = [
+    "clear",
+    "x25519_full_sc",
+    "ecc_key_gen_store",
+    "ecc_key_read",
+    "ecc_key_erase",
+    "ecdsa_sign",
+    "eddsa_sequence",
+    "eddsa_full_setup",
+    "ecdsa_full_setup",
+    "x25519_dbg",
+    "eddsa_dbg",
+    "ecdsa_dbg",
+    "eddsa_verify"
+]
+
+RELEASE_TESTS = [
+    "eddsa_verify",
+    "x25519_full_sc",
+    "ecc_key_gen_store",
+    "ecc_key_read",
+    "ecc_key_erase",
+    "ecdsa_sign",
+    "eddsa_sequence",
+    "eddsa_full_setup",
+    "ecdsa_full_setup",
+    "x25519_dbg",
+    "eddsa_dbg",
+    "ecdsa_dbg"
+]
+
+parser = ArgumentParser(description='TS SPECT parallel test runner')
+parser.add_argument("tests", nargs="*", help="Tests to run (without 'test_' prefix). Default all.")
+parser.add_argument("--release", action="store_true", help="Test released firmware")
+parser.add_argument("--no-compile", action="store_true", help="Do not compile firmware before testing")
+parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of parallel jobs")
+parser.add_argument("--seeds", type=int, default=1, help="Number of random seeds per test")
+parser.add_argument("--seed", type=int, action="append", help="Explicit seed, can be repeated")
+parser.add_argument("--workdir", default=None, help="Directory for job workspaces")
+parser.add_argument("--keep", action="store_true", help="Keep workspaces of passed jobs")
+parser.add_argument("--junit", default=None, help="JUnit XML report file")
+parser.add_argument("--json", default=None, help="JSON report file")
+parser.add_argument("--iss-session", action="store_true", help="Run ops in persistent ISS sessions (iss_session.py)")
+parser.add_argument("--iss-sessions", type=int, default=None, help="Maximum number of live ISS sessions, default --jobs")
+
+def run_job(test: str, seed: int, workdir: str, env: dict, keep: bool) -> dict:
+    workspace = tempfile.mkdtemp(prefix=f"{test}_{seed}_", dir=workdir)
+
+    job_env = dict(env)
+    job_env["TS_SPECT_FW_TEST_DIR"] = workspace
+    job_env["TS_SPECT_FW_TEST_SEED"] = str(seed)
+
+    start = time.time()
+    proc = subprocess.run(
+        [sys.executable, f"{TESTS_DIR}/test_{test}.py"],
+        cwd=TESTS_DIR, env=job_env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    duration = time.time() - start
+
+    passed = proc.returncode == 0
+    if passed and not keep:
+        shutil.rmtree(workspace, ignore_errors=True)
+        workspace = None
+
+    return {
+        "test"      : test,
+        "seed"      : seed,
+        "passed"    : passed,
+        "returncode": proc.returncode,
+        "duration"  : duration,
+        "workspace" : workspace,
+        "output"    : proc.stdout
+    }
+
+def write_junit(results: list, file_name: str):
+    suite = ET.Element(
+        "testsuite", name="ts-spect-fw",
+        tests=str(len(results)),
+        failures=str(sum(not r["passed"] for r in results)),
+        time="{:.3f}".format(sum(r["duration"] for r in results))
+    )
+    for r in results:
+        case = ET.SubElement(
+            suite, "testcase", classname=f"test_{r['test']}",
+            name=f"seed_{r['seed']}", time="{:.3f}".format(r["duration"])
+        )
+        if not r["passed"]:
+            failure = ET.SubElement(case, "failure", message=f"exit code {r['returncode']}")
+            failure.text = r["output"]
+        ET.SubElement(case, "system-out").text = r["output"]
+    ET.ElementTree(suite).write(file_name, encoding="utf-8", xml_declaration=True)
+
+def write_json(results: list, file_name: str):
+    with open(file_name, 'w') as f:
+        json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    tests = args.tests
+    if not tests:
+        tests = RELEASE_TESTS if args.release else APP_TESTS
+
+    env = dict(os.environ)
+    env["TS_SPECT_FW_TEST_DONT_DUMP"] = ""
+    if args.release:
+        env["TS_SPECT_FW_TEST_RELEASE"] = ""
+    elif not args.no_compile:
+        print("*************************************************")
+        print("*  Compile Firmware")
+        print("*************************************************")
+        if subprocess.run([sys.executable, f"{TS_REPO_ROOT}/scripts/build.py", "compile"]).returncode:
+            sys.exit(1)
+
+    seeds = args.seed
+    if not seeds:
+        seeds = [rn.randint(0, 2**32-1) for _ in range(args.seeds)]
+
+    workdir = args.workdir
+    if workdir:
+        os.makedirs(workdir, exist_ok=True)
+
+    pool_dir = None
+    if args.iss_session:
+        # Jobs borrow sessions from slots locked in pool_dir, the rest run one-shot
+        pool_dir = tempfile.mkdtemp(prefix="iss_pool_", dir=workdir)
+        env["TS_SPECT_FW_ISS_SESSION"] = ""
+        env["TS_SPECT_FW_ISS_POOL"] = pool_dir
+        env["TS_SPECT_FW_ISS_POOL_SIZE"] = str(args.iss_sessions or args.jobs)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        jobs = [pool.submit(run_job, t, s, workdir, env, args.keep) for t in tests for s in seeds]
+        for job in as_completed(jobs):
+            r = job.result()
+            results.append(r)
+            status = "\033[92mPASSED\033[00m" if r["passed"] else "\033[91mFAILED\033[00m"
+            print("{:<24} seed {:<10} {:>8.1f} s  {}".format(r["test"], r["seed"], r["duration"], status))
+            if not r["passed"]:
+                print(r["output"])
+                print(f"Workspace: {r['workspace']}")
+
+    if pool_dir:
+        shutil.rmtree(pool_dir, ignore_errors=True)
+
+    results.sort(key=lambda r: (tests.index(r["test"]), seeds.index(r["seed"])))
+
+    if args.junit:
+        write_junit(results, args.junit)
+    if args.json:
+        write_json(results, args.json)
+
+    failed = sum(not r["passed"] for r in results)
+    print(f"Failed {failed}")
+
+    sys.exit(min(failed, 255))
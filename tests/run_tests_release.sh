@@ -1,40 +1,6 @@
 #! /bin/bash
 
-tests=(\
-    "eddsa_verify" \
-    "x25519_full_sc" \
-    "ecc_key_gen_store"  \
-    "ecc_key_read" \
-    "ecc_key_erase" \
-    "ecdsa_sign" \
-    "eddsa_sequence" \
-    "eddsa_full_setup" \
-    "ecdsa_full_setup" \
-    "x25519_dbg" \
-    "eddsa_dbg" \
-    "ecdsa_dbg" \
-)
+# Tests released firmware, see run_tests.py for options
+# (parallel jobs, seeds, JUnit/JSON reports).
 
-declare -i ret_val=0
-
-echo ${1}
-
-export TS_SPECT_FW_TEST_DONT_DUMP=""
-export TS_SPECT_FW_TEST_RELEASE=""
-
-for test in ${tests[@]}; do
-    echo "*************************************************" 
-    echo "*  Running test $test"
-    echo "*************************************************" 
-    ./test_$test.py
-    if [ $? -ne 0 ]; then
-        ret_val=$((ret_val + 1))
-    fi
-done
-
-echo "Failed $ret_val"
-
-unset -f TS_SPECT_FW_TEST_DONT_DUMP
-unset -f TS_SPECT_FW_TEST_RELEASE
-
-exit $ret_val
\ No newline at end of file
+exec ./run_tests.py --release "$@"
@@ -5,6 +5,7 @@ import random as rn
 import os
 
 import test_common as tc
+from iss_sequence import OpSequence
 import models.ed25519 as ed25519
 
 def sha512(s):
@@ -34,33 +35,27 @@ def boot_sequence(signature, A, message, name, isa):
     for i in range(0, len(message_padded), 128):
         m_blocks.append(message_padded[i:i+128])
 
-    cmd_file = tc.get_cmd_file(test_dir)
+    seq = OpSequence(test_dir, ops_cfg, f"sha512_{name}", main=main, isa=isa, tag=tag)
+    cmd_file = seq.cmd_file
+
     tc.print_run_name("sha512_init")
     tc.start(cmd_file)
-    ctx = tc.run_op(
-        cmd_file, "sha512_init", 0x0, 0x1, 0, ops_cfg, test_dir,
-        main=main, isa=isa, tag=tag
-    )
+    seq.add_op("sha512_init", 0x0, 0x1, 0)
 
     for i in range(len(m_blocks)-1):
         tc.print_run_name(f"sha512_update_{i}")
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
         tc.write_bytes(cmd_file, m_blocks[i], 0x0010)
         run_name = "sha512_update" + f"_{i}"
-        ctx = tc.run_op(
-            cmd_file, "sha512_update", 0x0, 0x1, 128, ops_cfg, test_dir,
-            run_name=run_name, old_context=ctx, main=main, isa=isa, tag=tag
-        )
+        seq.add_op("sha512_update", 0x0, 0x1, 128, run_name=run_name)
 
     tc.print_run_name("sha512_final")
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
     tc.write_bytes(cmd_file, m_blocks[-1], 0x0010)
-    ctx = tc.run_op(
-        cmd_file, "sha512_final", 0x0, 0x1, 128, ops_cfg, test_dir,
-        old_context=ctx, main=main, isa=isa, tag=tag
-    )
+    seq.add_op("sha512_final", 0x0, 0x1, 128)
+
+    if not seq.run():
+        return 0
 
     digest_int = tc.read_output(test_dir, "sha512_final", 0x1010, 16)
     digest = int.to_bytes(digest_int, 64, 'little')
@@ -2,7 +2,6 @@ import yaml
 import binascii
 import os
 import sys
-import numpy as np
 import random as rn
 import subprocess
 import re
@@ -42,6 +41,9 @@ PUB_SLOT_LAYOUT = {
 }
 METADATA_OFFSET = 4*8
 
+iss_cache = None
+iss_session = None
+
 #############################################################
 #   PARSER
 #############################################################
@@ -53,6 +55,13 @@ parser.add_argument(
     help='Test Vector input file name. Optional'
 )
 
+parser.add_argument(
+    "--testvec-index",
+    type=int,
+    default=0,
+    help="Index of the vector in binary Test Vector corpus (testvec_corpus.py). Optional"
+)
+
 parser.add_argument(
     "--seed",
     type=int,
@@ -175,10 +184,55 @@ def get_data_cfg(run_name):
 
 def make_test_dir(test_name, directory = "tests"):
     test_dir = f"{TS_REPO_ROOT}/{directory}/test_{test_name}"
+    if "TS_SPECT_FW_TEST_DIR" in os.environ.keys():
+        test_dir = f"{os.environ['TS_SPECT_FW_TEST_DIR']}/test_{test_name}"
     os.system(f"rm -rf {test_dir}")
     os.system(f"mkdir {test_dir}")
     return test_dir
 
+def get_iss_cache():
+    global iss_cache
+    if "TS_SPECT_FW_ISS_CACHE" not in os.environ.keys():
+        return None
+    if not iss_cache:
+        from iss_cache import IssCache, DEFAULT_SIZE_MB
+        iss_cache = IssCache(
+            os.environ["TS_SPECT_FW_ISS_CACHE"],
+            size_mb=int(os.environ.get("TS_SPECT_FW_ISS_CACHE_SIZE", DEFAULT_SIZE_MB)),
+            bypass="TS_SPECT_FW_ISS_CACHE_BYPASS" in os.environ.keys()
+        )
+    return iss_cache
+
+def get_session():
+    """
+    Live ISS session of the test, None unless TS_SPECT_FW_ISS_SESSION is set.
+    With TS_SPECT_FW_ISS_POOL, the session is borrowed from the pool of slots in that
+    directory (TS_SPECT_FW_ISS_POOL_SIZE), ops run one-shot when all slots are taken.
+    """
+    global iss_session
+    if "TS_SPECT_FW_ISS_SESSION" not in os.environ.keys():
+        return None
+    if iss_session is None:
+        import atexit
+        from iss_session import IssSession, IssSessionPool
+        if "TS_SPECT_FW_ISS_POOL" in os.environ.keys():
+            size = os.environ.get("TS_SPECT_FW_ISS_POOL_SIZE")
+            pool = IssSessionPool(int(size) if size else None, os.environ["TS_SPECT_FW_ISS_POOL"])
+            session = pool.borrow(block=False)
+            if session:
+                atexit.register(pool.give_back, session)
+        else:
+            session = IssSession()
+            atexit.register(session.stop)
+        iss_session = session or False
+    return iss_session or None
+
+def flush_session():
+    """Dumps context and key memory of the last op run in the ISS session."""
+    if iss_session and iss_session.stop():
+        print("ISS FAILED")
+        sys.exit(2)
+
 def get_cmd_file(test_dir):
     cmd_file = open(test_dir+"/iss_cmd", 'w')
     return cmd_file
@@ -206,129 +260,35 @@ def get_res_word(test_dir, run_name):
     return SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE
 
 def parse_context(test_dir, run_name):
-    ctx_file = f"{test_dir}/{run_name}.ctx"
-    ctx_dict = {
-        "GPR"           : [],
-        "SHA"           : b'',
-        "TMAC"          : b'',
-        "RAR STACK"     : [],
-        "RAR POINTER"   : 0,
-        "FLAGS"         : {"Z" : 0, "C" : 0, "E" : 0},
-        "DATA RAM IN"   : [],
-        "DATA RAM OUT"  : []
-    }
-
-    with open(ctx_file, 'r') as ctx:
-        data = ctx.read().split('\n')
-        for i in range(len(data)):
-            line = data[i]
-            if not line:
-                continue
-            if line[0] == "*":
-                continue
-            
-            if line == "GPR registers:":
-                i += 1  # skip next "**..**" line
-                for j in range(32):
-                    i += 1
-                    line = data[i]
-                    r = int.from_bytes(binascii.unhexlify(line), 'big')
-                    ctx_dict["GPR"].append(r)
-            
-            if line == "SHA 512 context:":
-                i += 1  # skip next "**..**" line
-                for j in range(8):
-                    i += 1
-                    line = data[i]
-                    ctx_dict["SHA"] += binascii.unhexlify(line)
-                continue
-                
-            if line[:4] == "TMAC":
-                i += 1
-                for j in range(5):
-                    i += 1
-                    line = data[i]
-                    ctx_dict["TMAC"] += binascii.unhexlify(line)
-                i += 3  # skip rate, byteIOIndex and squeezing
-                continue
-            
-            if line == "RAR stack:":
-                i += 1  # skip next "**..**" line
-                for j in range(RAR_STACK_DEPTH):
-                    i +=1
-                    line = data[i]
-                    val = int.from_bytes(binascii.unhexlify(line), 'big')
-                    ctx_dict["RAR STACK"].append(val)
-                continue
-            if line == "RAR stack pointer:":
-                i += 2
-                line = data[i]
-                ctx_dict["RAR POINTER"] = int.from_bytes(binascii.unhexlify(line), 'big')
-                continue
-
-            if line == "FLAGS (Z, C, E):":
-                i += 2
-                line = data[i]
-                ctx_dict["FLAGS"]["Z"] = int(line)
-                i += 1
-                line = data[i]
-                ctx_dict["FLAGS"]["C"] = int(line)
-                i += 1
-                line = data[i]
-                ctx_dict["FLAGS"]["E"] = int(line)
-                continue
-
-            if line == "Data RAM In:":
-                i += 1
-                for j in range(DATA_RAM_IN_DEPTH):
-                    i += 1
-                    line = data[i]
-                    val = int.from_bytes(binascii.unhexlify(line), 'big')
-                    ctx_dict["DATA RAM IN"].append(val)
-
-            if line == "Data RAM Out:":
-                i += 1
-                for j in range(DATA_RAM_OUT_DEPTH):
-                    i += 1
-                    line = data[i]
-                    val = int.from_bytes(binascii.unhexlify(line), 'big')
-                    ctx_dict["DATA RAM OUT"].append(val)
-
-    return ctx_dict
+    from iss_dumps import IssContext
+    flush_session()
+    return IssContext.load(f"{test_dir}/{run_name}.ctx")
 
 def parse_key_mem(test_dir, run_name):
-    kmem_file = f"{test_dir}/{run_name}_keymem.hex"
-    kmem_array = np.empty(shape=(16, 256, 256), dtype='uint32')
-    kmem_slots = np.empty(shape=(16, 256), dtype='bool')
-    with open(kmem_file, 'r') as km_file:
-        data = km_file.read().split('\n')
-        ktype = 0
-        slot = 0
-        offset = 0
-        for line in data[3:]:
-            if not line:
-                continue
-            if line[0] == '*':
-                continue
-            if line[0] == 'T':
-                ls = line.split(' ')
-                ktype = int(ls[1])
-                slot = int(ls[3])
-                offset = 0
-                continue
-            if line[0] == 'S':
-                ls = line.split(' ')
-                if ls[1] == "FULL":
-                    kmem_slots[ktype][slot] = True
-                else:
-                    kmem_slots[ktype][slot] = False
-                continue
-            d = int.from_bytes(binascii.unhexlify(line), 'big')
-            kmem_array[ktype][slot][offset] = d
-            offset += 1
-    return kmem_array, kmem_slots
+    from iss_dumps import KeyMemory
+    flush_session()
+    kmem = KeyMemory.load(f"{test_dir}/{run_name}_keymem.hex")
+    return kmem, kmem.full
+
+def invalidate_dumps(test_dir, run_name):
+    """Drops cached dumps of `run_name` after they were (re)written."""
+    from iss_dumps import invalidate
+    for suffix in ["_out.hex", "_emem_out.hex", ".ctx", "_keymem.hex"]:
+        invalidate(f"{test_dir}/{run_name}{suffix}")
+
+def diff_key_mem(test_dir, run_name_a, run_name_b) -> list:
+    kmem_a, _ = parse_key_mem(test_dir, run_name_a)
+    kmem_b, _ = parse_key_mem(test_dir, run_name_b)
+    return kmem_a.diff(kmem_b)
+
+def parse_testvec(testvec_file: str, rng_lut, index=0):
+    import testvec_corpus
+    if testvec_corpus.is_corpus(testvec_file):
+        data_dir, rng = testvec_corpus.Corpus(testvec_file).testvec(index)
+        rng_list = [rn.randint(0, 2**256 - 1) for i in range(4*len(rng_lut))]
+        rng_list[:len(rng)] = rng
+        return data_dir, rng_list
 
-def parse_testvec(testvec_file: str, rng_lut):
     with open(testvec_file, 'r') as f:
         testvec = yaml.safe_load(f)
 
@@ -347,6 +307,8 @@ def parse_testvec(testvec_file: str, rng_lut):
 def set_seed(args) -> int:
     if hasattr(args, "seed"):
         return args.seed
+    elif "TS_SPECT_FW_TEST_SEED" in os.environ.keys():
+        return int(os.environ["TS_SPECT_FW_TEST_SEED"])
     else:
         return rn.randint(0, 2**32-1)
 
@@ -356,6 +318,8 @@ def set_key(cmd_file, key, ktype, slot, offset):
         cmd_file.write("set keymem[{}][{}][{}] 0x{}\n".format(ktype, slot, offset+w, format(val[w], '08X')))
 
 def get_key(kmem_array, ktype, slot, offset) -> int:
+    if hasattr(kmem_array, "get_key"):
+        return kmem_array.get_key(ktype, slot, offset)
     val = 0
     for i in range(8):
         w = kmem_array[ktype][slot][offset+i]
@@ -431,7 +395,8 @@ def set_rng(test_dir: str, rng: list):
             for i in range(8):
                 rng_hex.write(format((r >> i*32) & 0xffffffff, '08X') + "\n")
 
-def read_output(test_dir: str, run_name: str, addr: int, count: int, string=False):
+def get_output_memory(test_dir: str, run_name: str, addr: int):
+    from iss_dumps import OutputMemory
     mem = addr & 0xF000
     if mem == 0x1000:
         output_file = f"{test_dir}/{run_name}_out.hex"
@@ -439,51 +404,19 @@ def read_output(test_dir: str, run_name: str, addr: int, count: int, string=Fals
         output_file = f"{test_dir}/{run_name}_emem_out.hex"
     else:
         raise Exception(f"Address {hex(addr)} is invalid output address!")
+    return OutputMemory.load(output_file, mem)
 
+def read_output(test_dir: str, run_name: str, addr: int, count: int, string=False):
+    mem = get_output_memory(test_dir, run_name, addr)
     if not string:
-        with open(output_file, mode='r') as out:
-            data = out.read().split('\n')
-            idx = (addr - mem) // 4
-            val = 0
-            for i in range(count):
-                val += int.from_bytes(binascii.unhexlify(data[idx+i].split(' ')[1]), 'big') << i*32
-            return val
+        return mem.read_int(addr, count)
     else:
-        with open(output_file, mode='r') as out:
-            data = out.read().split('\n')
-            idx = (addr - mem) // 4
-            val = b''
-            for i in range(count):
-                val += int.from_bytes(binascii.unhexlify(data[idx+i].split(' ')[1]), 'little').to_bytes(4, 'big')
-            return val
-    
-def run_op(
-            cmd_file,           op_name,
-            insrc,              outsrc,         data_in_size,
-            ops_cfg,            test_dir,       run_name=None,
-            main=None,          isa=2,          tag="Application",
-            old_context=None,   keymem=None,    break_s=None
-        ):
-
-    op = find_in_list(op_name, ops_cfg)
-    cfg_word = op["id"] + (outsrc << 8) + (insrc << 12) + (data_in_size << 16)
-    set_cfg_word(cmd_file, cfg_word)
-    run(cmd_file)
-    if break_s:
-        cmd_file.write(break_s)
-    exit(cmd_file)
-    cmd_file.close()
-
-    iss = "spect_iss"
-    if not run_name:
-        run_name = op_name
-    new_context = run_name+".ctx"
-    run_log = run_name+"_iss.log"
+        return mem.read_bytes(addr, count)
 
+def get_iss_image(isa=2, tag="Application", main=None, break_s=None) -> str:
     hexfile = "build/main.hex"
     constfile = "build/constants.hex"
 
-
     if "TS_SPECT_FW_TEST_RELEASE" in os.environ.keys():
         version = get_release_version()
 
@@ -508,7 +441,7 @@ def run_op(
             print("FW:     ", release_file[1])
             print("Const:  ", release_const[1])
 
-    cmd = iss
+    cmd = ""
 
     if ("TS_SPECT_FW_TEST_RELEASE" not in os.environ.keys()) and (break_s or main):
         if not main:
@@ -524,20 +457,73 @@ def run_op(
     if isa == 2:
         print(f"Const: {constfile}")
         cmd += f" --const-rom={TS_REPO_ROOT}/{constfile}"
+
+    return cmd
+
+def run_op(
+            cmd_file,           op_name,
+            insrc,              outsrc,         data_in_size,
+            ops_cfg,            test_dir,       run_name=None,
+            main=None,          isa=2,          tag="Application",
+            old_context=None,   keymem=None,    break_s=None
+        ):
+
+    op = find_in_list(op_name, ops_cfg)
+    cfg_word = op["id"] + (outsrc << 8) + (insrc << 12) + (data_in_size << 16)
+    set_cfg_word(cmd_file, cfg_word)
+    run(cmd_file)
+    if break_s:
+        cmd_file.write(break_s)
+
+    if not run_name:
+        run_name = op_name
+    new_context = run_name+".ctx"
+
+    image = get_iss_image(isa, tag, main, break_s)
+
+    # Breakpoints stop inside the op, such runs are always one-shot
+    session = None if break_s else get_session()
+    if session:
+        cmd_file.close()
+        session.run_op(image, test_dir, run_name, old_context, keymem)
+        return new_context
+
+    flush_session()
+    exit(cmd_file)
+    cmd_file.close()
+
+    run_iss(image, test_dir, run_name, old_context, keymem)
+
+    return new_context
+
+def run_iss(image, test_dir, run_name, old_context=None, keymem=None):
+    cache = get_iss_cache()
+    if cache:
+        cache_key = cache.key(image, test_dir, old_context, keymem)
+        if cache.load(cache_key, test_dir, run_name):
+            print("ISS result restored from cache")
+            invalidate_dumps(test_dir, run_name)
+            return
+
+    cmd = "spect_iss"
+    cmd += image
     cmd += f" --grv-hex={test_dir}/rng.hex"
     cmd += f" --data-ram-out={test_dir}/{run_name}_out.hex"
     cmd += f" --emem-out={test_dir}/{run_name}_emem_out.hex"
     cmd += f" --dump-keymem={test_dir}/{run_name}_keymem.hex"
-    cmd += f" --dump-context={test_dir}/{new_context}"
+    cmd += f" --dump-context={test_dir}/{run_name}.ctx"
     if keymem:
         cmd += f" --load-keymem={keymem}"
     if old_context:
         cmd += f" --load-context={test_dir}/{old_context}"
     cmd += f" --shell --cmd-file={test_dir}/iss_cmd"
-    cmd += f" > {test_dir}/{run_log}"
+    cmd += f" > {test_dir}/{run_name}_iss.log"
 
-    if os.system(cmd):
+    ret = os.system(cmd)
+    invalidate_dumps(test_dir, run_name)
+    if ret:
         print("ISS FAILED")
         sys.exit(2)
 
-    return new_context
+    if cache:
+        cache.store(cache_key, test_dir, run_name)
@@ -23,7 +23,7 @@ if __name__ == "__main__":
 
     if args.testvec != "":
         print(f"Reading test vector from {args.testvec}")
-        data_dir, rng_list = tc.parse_testvec(args.testvec, tc.rng_luts[test_name])
+        data_dir, rng_list = tc.parse_testvec(args.testvec, tc.rng_luts[test_name], args.testvec_index)
         z = bytes.fromhex(data_dir["z"])
         sch = bytes.fromhex(data_dir["sch"])
         scn = bytes.fromhex(data_dir["scn"])
@@ -3,6 +3,7 @@ import sys
 import random as rn
 
 import test_common as tc
+from iss_sequence import OpSequence
 
 import models.ed25519 as ed25519
 
@@ -11,13 +12,15 @@ outsrc = 0x5
 
 def eddsa_sequence(test_dir, run_name, keymem, slot, sch, scn, message):
 
+    seq = OpSequence(test_dir, ops_cfg, run_name, keymem=keymem)
+    cmd_file = seq.cmd_file
+    steps = []
+
     ########################################################################################################
     #   Set Context
     ########################################################################################################
-    rng = [rn.randint(0, 2**256-1) for i in range(20)]
-    tc.set_rng(test_dir, rng)
+    seq.set_rng([rn.randint(0, 2**256-1) for i in range(20)])
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
     input_word = (slot << 8) + tc.find_in_list("eddsa_set_context", ops_cfg)["id"]
@@ -27,30 +30,18 @@ def eddsa_sequence(test_dir, run_name, keymem, slot, sch, scn, message):
     tc.write_bytes(cmd_file, sch, 0x00A0)
     tc.write_bytes(cmd_file, scn, 0x00C0)
 
-    ctx = tc.run_op(cmd_file, "eddsa_set_context", insrc, outsrc, 36, ops_cfg, test_dir, run_name=run_name, keymem=keymem)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        tc.print_failed()
-        sys.exit(1)
+    steps.append(f"{run_name}_set_context")
+    seq.add_op("eddsa_set_context", insrc, outsrc, 36, run_name=steps[-1], status=0)
 
     ########################################################################################################
     #   Nonce Init
     ########################################################################################################
+    seq.set_rng([rn.randint(0, 2**256-1) for i in range(20)])
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
-    ctx = tc.run_op(cmd_file, "eddsa_nonce_init", insrc, outsrc, 36, ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        tc.print_failed()
-        sys.exit(1)
+    steps.append(f"{run_name}_nonce_init")
+    seq.add_op("eddsa_nonce_init", insrc, outsrc, 36, run_name=steps[-1], status=0)
 
     ########################################################################################################
     #   Nonce Update
@@ -59,94 +50,58 @@ def eddsa_sequence(test_dir, run_name, keymem, slot, sch, scn, message):
     for i in range(0, updates_cnt):
         block = message[i*144:i*144+144]
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, block, (insrc<<12))
-        ctx = tc.run_op(cmd_file, "eddsa_nonce_update", insrc, outsrc, 144, ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            tc.print_failed()
-            sys.exit(1)
+        steps.append(f"{run_name}_nonce_update_{i}")
+        seq.add_op("eddsa_nonce_update", insrc, outsrc, 144, run_name=steps[-1], status=0)
 
     ########################################################################################################
-    #   Nonce Update
+    #   Nonce Finish
     ########################################################################################################
     last_block_tmac = message[updates_cnt*144:]
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
     tc.write_bytes(cmd_file, last_block_tmac, (insrc<<12))
 
-    ctx = tc.run_op(cmd_file, "eddsa_nonce_finish", insrc, outsrc, len(last_block_tmac), ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        tc.print_failed()
-        sys.exit(1)
+    steps.append(f"{run_name}_nonce_finish")
+    seq.add_op("eddsa_nonce_finish", insrc, outsrc, len(last_block_tmac), run_name=steps[-1], status=0)
 
     ########################################################################################################
     #   R Part
     ########################################################################################################
 
-    rng = [rn.randint(0, 2**256-1) for i in range(10)]
-    tc.set_rng(test_dir, rng)
+    seq.set_rng([rn.randint(0, 2**256-1) for i in range(10)])
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
-    ctx = tc.run_op(cmd_file, "eddsa_R_part", insrc, outsrc, 0, ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        tc.print_failed()
-        sys.exit(1)
+    steps.append(f"{run_name}_R_part")
+    seq.add_op("eddsa_R_part", insrc, outsrc, 0, run_name=steps[-1], status=0)
 
     if len(message) < 64:
         ########################################################################################################
         #   E at once
         ########################################################################################################
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, message, (insrc<<12))
 
-        ctx = tc.run_op(cmd_file, "eddsa_e_at_once", insrc, outsrc, len(message), ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            tc.print_failed()
-            sys.exit(1)
+        steps.append(f"{run_name}_e_at_once")
+        seq.add_op("eddsa_e_at_once", insrc, outsrc, len(message), run_name=steps[-1], status=0)
     else:
         ########################################################################################################
         #   E Prep
         ########################################################################################################
         m_block_prep = message[:64]
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, m_block_prep, (insrc<<12))
 
-        ctx = tc.run_op(cmd_file, "eddsa_e_prep", insrc, outsrc, 64, ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            tc.print_failed()
-            sys.exit(1)
+        steps.append(f"{run_name}_e_prep")
+        seq.add_op("eddsa_e_prep", insrc, outsrc, 64, run_name=steps[-1], status=0)
 
         ########################################################################################################
         #   E Update
@@ -157,53 +112,33 @@ def eddsa_sequence(test_dir, run_name, keymem, slot, sch, scn, message):
         for i in range(0, updates_cnt):
             block = message_tmp[i*128:i*128+128]
 
-            cmd_file = tc.get_cmd_file(test_dir)
             tc.start(cmd_file)
 
             tc.write_bytes(cmd_file, block, (insrc<<12))
-            ctx = tc.run_op(cmd_file, "eddsa_e_update", insrc, outsrc, 128, ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-            SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-            if (SPECT_OP_STATUS):
-                print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-                tc.print_failed()
-                sys.exit(1)
+            steps.append(f"{run_name}_e_update_{i}")
+            seq.add_op("eddsa_e_update", insrc, outsrc, 128, run_name=steps[-1], status=0)
 
         ########################################################################################################
         #   E Finish
         ########################################################################################################
         last_block = message_tmp[updates_cnt*128:]
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, last_block, (insrc<<12))
 
-        ctx = tc.run_op(cmd_file, "eddsa_e_finish", insrc, outsrc, len(last_block), ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            tc.print_failed()
-            sys.exit(1)
+        steps.append(f"{run_name}_e_finish")
+        seq.add_op("eddsa_e_finish", insrc, outsrc, len(last_block), run_name=steps[-1], status=0)
 
     ########################################################################################################
     #   Finish
     ########################################################################################################
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
-    #break_s = tc.dump_gpr_on(cmd_file, "bp_dump_eA", [11, 12, 13, 14])
-    #break_s += tc.dump_gpr_on(cmd_file, "bp_dump_sG", [7, 8, 9, 10])
-
-    ctx = tc.run_op(cmd_file, "eddsa_finish", insrc, outsrc, 0, ops_cfg, test_dir, run_name=run_name, old_context=ctx, keymem=keymem)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
+    steps.append(f"{run_name}_finish")
+    seq.add_op("eddsa_finish", insrc, outsrc, 0, run_name=steps[-1], status=0)
 
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
+    if not seq.run():
         tc.print_failed()
         sys.exit(1)
 
@@ -211,9 +146,9 @@ def eddsa_sequence(test_dir, run_name, keymem, slot, sch, scn, message):
     #   Read and Check
     ########################################################################################################
 
-    result = tc.read_output(test_dir, run_name, (outsrc<<12), 1)
+    result = tc.read_output(test_dir, steps[-1], (outsrc<<12), 1)
 
-    signature = tc.read_output(test_dir, run_name, (outsrc<<12)+0x10, 16, string=True)
+    signature = tc.read_output(test_dir, steps[-1], (outsrc<<12)+0x10, 16, string=True)
 
     return signature
 
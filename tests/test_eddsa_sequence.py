@@ -4,6 +4,7 @@ import random as rn
 import os
 
 import test_common as tc
+from iss_sequence import OpSequence
 
 import models.ed25519 as ed25519
 
@@ -23,16 +24,17 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
 
     sign_ref = ed25519.sign(s, prefix, A, sch, scn, message)
 
+    seq = OpSequence(test_dir, ops_cfg, "eddsa_sequence" + run_name_suffix)
+    cmd_file = seq.cmd_file
+
     ########################################################################################################
     #   Set Context
     ########################################################################################################
     run_name = "eddsa_set_context" + run_name_suffix
     tc.print_run_name(run_name)
 
-    rng = [rn.randint(0, 2**256-1) for _ in range(10)]
-    tc.set_rng(test_dir, rng)
+    seq.set_rng([rn.randint(0, 2**256-1) for _ in range(10)])
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
     if run_name_suffix != "_empty_slot":
@@ -71,63 +73,26 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
     tc.write_bytes(cmd_file, sch, 0x00A0)
     tc.write_bytes(cmd_file, scn, 0x00C0)
 
-    ctx = tc.run_op(cmd_file, "eddsa_set_context", insrc, outsrc, 36, ops_cfg, test_dir, run_name=run_name)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
+    if run_name_suffix in ["_empty_slot", "_invalid_curve"]:
+        status = 0xF2 if run_name_suffix == "_empty_slot" else 0xF4
+        seq.add_op("eddsa_set_context", insrc, outsrc, 36, run_name=run_name, status=status, out_size=1)
 
-    if (run_name_suffix == "_empty_slot"):
-        if (SPECT_OP_STATUS != 0xF2):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-        if (SPECT_OP_DATA_OUT_SIZE != 1):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
-        l3_result = tc.read_output(test_dir, run_name, (outsrc<<12), 1)
-        if (l3_result != 0x12):
-            print("L3 RESULT:", hex(l3_result))
+        if not seq.run():
             return 0
 
-        return 1
-    elif (run_name_suffix == "_invalid_curve"):
-        if (SPECT_OP_STATUS != 0xF4):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-        if (SPECT_OP_DATA_OUT_SIZE != 1):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
         l3_result = tc.read_output(test_dir, run_name, (outsrc<<12), 1)
         if (l3_result != 0x12):
             print("L3 RESULT:", hex(l3_result))
             return 0
-        return 1
-    else:
-        if (SPECT_OP_STATUS != 0x00):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-        if (SPECT_OP_DATA_OUT_SIZE != 0):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
 
-        if "ECC_KEY_RERANDOMIZE" in defines_set:
-            kmem_data, _ = tc.parse_key_mem(test_dir, run_name)
-
-            remasked_s1         = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k1"])
-            remasked_prefix     = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k2"])
-            remasked_s2         = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k3"])
-            remasked_prefixmask = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k4"])
-
-            b1 = ((remasked_s1 + remasked_s2) % ed25519.q) == ((s1 + s2) % ed25519.q)
-            b2 = (remasked_s1 != s1) and (remasked_s2 != s2)
-            b3 = (remasked_prefix ^ remasked_prefixmask) == (prefix ^ prefix_mask)
-            b4 = (remasked_prefix != prefix) and (remasked_prefixmask != prefix_mask)
-
-            if not(b1 and b2):
-                print("Remasking of s failed.")
-                return 0
+        return 1
 
-            if not(b3 and b4):
-                print("Remasking of prefix failed.")
-                return 0
+    # Key memory is dumped after eddsa_set_context for the remasking check
+    seq.add_op(
+        "eddsa_set_context", insrc, outsrc, 36, run_name=run_name,
+        status=0, out_size=0, dump=("ECC_KEY_RERANDOMIZE" in defines_set)
+    )
+    set_context_run_name = run_name
 
     ########################################################################################################
     #   Nonce Init
@@ -135,23 +100,11 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
     run_name = "eddsa_nonce_init" + run_name_suffix
     tc.print_run_name(run_name)
 
-    rng = [rn.randint(0, 2**256-1) for i in range(10)]
-    tc.set_rng(test_dir, rng)
+    seq.set_rng([rn.randint(0, 2**256-1) for i in range(10)])
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
-    ctx = tc.run_op(cmd_file, "eddsa_nonce_init", insrc, outsrc, 36, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        return 0
-
-    if (SPECT_OP_DATA_OUT_SIZE != 0):
-        print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-        return 0
+    seq.add_op("eddsa_nonce_init", insrc, outsrc, 36, run_name=run_name, status=0, out_size=0)
 
     ########################################################################################################
     #   Nonce Update
@@ -162,21 +115,10 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
         run_name = f"eddsa_nonce_update_{i}" + run_name_suffix
         tc.print_run_name(run_name)
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, block, (insrc<<12))
-        ctx = tc.run_op(cmd_file, "eddsa_nonce_update", insrc, outsrc, 144, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-
-        if (SPECT_OP_DATA_OUT_SIZE != 0):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
+        seq.add_op("eddsa_nonce_update", insrc, outsrc, 144, run_name=run_name, status=0, out_size=0)
 
     ########################################################################################################
     #   Nonce Finish
@@ -186,22 +128,11 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
     run_name = "eddsa_nonce_finish" + run_name_suffix
     tc.print_run_name(run_name)
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
     tc.write_bytes(cmd_file, last_block_tmac, (insrc<<12))
 
-    ctx = tc.run_op(cmd_file, "eddsa_nonce_finish", insrc, outsrc, len(last_block_tmac), ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        return 0
-
-    if (SPECT_OP_DATA_OUT_SIZE != 0):
-        print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-        return 0
+    seq.add_op("eddsa_nonce_finish", insrc, outsrc, len(last_block_tmac), run_name=run_name, status=0, out_size=0)
 
     ########################################################################################################
     #   R Part
@@ -209,23 +140,11 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
     run_name = "eddsa_R_part" + run_name_suffix
     tc.print_run_name(run_name)
 
-    rng = [rn.randint(0, 2**256-1) for _ in range(10)]
-    tc.set_rng(test_dir, rng)
+    seq.set_rng([rn.randint(0, 2**256-1) for _ in range(10)])
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
-    ctx = tc.run_op(cmd_file, "eddsa_R_part", insrc, outsrc, 0, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-        return 0
-
-    if (SPECT_OP_DATA_OUT_SIZE != 0):
-        print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-        return 0
+    seq.add_op("eddsa_R_part", insrc, outsrc, 0, run_name=run_name, status=0, out_size=0)
 
     if len(message) < 64:
         ########################################################################################################
@@ -234,22 +153,11 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
         run_name = "eddsa_e_at_once" + run_name_suffix
         tc.print_run_name(run_name)
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, message, (insrc<<12))
 
-        ctx = tc.run_op(cmd_file, "eddsa_e_at_once", insrc, outsrc, len(message), ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-
-        if (SPECT_OP_DATA_OUT_SIZE != 0):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
+        seq.add_op("eddsa_e_at_once", insrc, outsrc, len(message), run_name=run_name, status=0, out_size=0)
     else:
         ########################################################################################################
         #   E Prep
@@ -259,22 +167,11 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
         run_name = "eddsa_e_prep" + run_name_suffix
         tc.print_run_name(run_name)
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, m_block_prep, (insrc<<12))
 
-        ctx = tc.run_op(cmd_file, "eddsa_e_prep", insrc, outsrc, 64, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-
-        if (SPECT_OP_DATA_OUT_SIZE != 0):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
+        seq.add_op("eddsa_e_prep", insrc, outsrc, 64, run_name=run_name, status=0, out_size=0)
 
         ########################################################################################################
         #   E Update
@@ -287,21 +184,10 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
             run_name = f"eddsa_e_update_{i}" + run_name_suffix
             tc.print_run_name(run_name)
 
-            cmd_file = tc.get_cmd_file(test_dir)
             tc.start(cmd_file)
 
             tc.write_bytes(cmd_file, block, (insrc<<12))
-            ctx = tc.run_op(cmd_file, "eddsa_e_update", insrc, outsrc, 128, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-            SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-            if (SPECT_OP_STATUS):
-                print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-                return 0
-
-            if (SPECT_OP_DATA_OUT_SIZE != 0):
-                print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-                return 0
+            seq.add_op("eddsa_e_update", insrc, outsrc, 128, run_name=run_name, status=0, out_size=0)
 
         ########################################################################################################
         #   E Finish
@@ -311,22 +197,11 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
 
         last_block = message_tmp[updates_cnt*128:]
 
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
 
         tc.write_bytes(cmd_file, last_block, (insrc<<12))
 
-        ctx = tc.run_op(cmd_file, "eddsa_e_finish", insrc, outsrc, len(last_block), ops_cfg, test_dir, run_name=run_name, old_context=ctx)
-
-        SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-        if (SPECT_OP_STATUS):
-            print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
-            return 0
-
-        if (SPECT_OP_DATA_OUT_SIZE != 0):
-            print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-            return 0
+        seq.add_op("eddsa_e_finish", insrc, outsrc, len(last_block), run_name=run_name, status=0, out_size=0)
 
     ########################################################################################################
     #   Finish
@@ -334,20 +209,38 @@ def eddsa_sequence(s, prefix, A, slot, sch, scn, message, run_name_suffix):
     run_name = "eddsa_finish" + run_name_suffix
     tc.print_run_name(run_name)
 
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
 
-    ctx = tc.run_op(cmd_file, "eddsa_finish", insrc, outsrc, 0, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
+    seq.add_op("eddsa_finish", insrc, outsrc, 0, run_name=run_name, status=0, out_size=80)
 
-    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
-
-    if (SPECT_OP_STATUS):
-        print("SPECT_OP_STATUS:", hex(SPECT_OP_STATUS))
+    ########################################################################################################
+    #   Run and check results of all ops
+    ########################################################################################################
+    if not seq.run():
         return 0
 
-    if (SPECT_OP_DATA_OUT_SIZE != 80):
-        print("SPECT_OP_DATA_OUT_SIZE:", SPECT_OP_DATA_OUT_SIZE)
-        return 0
+    if "ECC_KEY_RERANDOMIZE" in defines_set:
+        kmem_data, _ = tc.parse_key_mem(test_dir, set_context_run_name)
+
+        remasked_s1         = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k1"])
+        remasked_prefix     = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k2"])
+        remasked_s2         = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k3"])
+        remasked_prefixmask = tc.get_key(kmem_data, ktype=0x04, slot=(slot<<1), offset=tc.PRIV_SLOT_LAYOUT["k4"])
+
+        b1 = ((remasked_s1 + remasked_s2) % ed25519.q) == ((s1 + s2) % ed25519.q)
+        b2 = (remasked_s1 != s1) and (remasked_s2 != s2)
+        b3 = (remasked_prefix ^ remasked_prefixmask) == (prefix ^ prefix_mask)
+        b4 = (remasked_prefix != prefix) and (remasked_prefixmask != prefix_mask)
+
+        if not(b1 and b2):
+            print("Remasking of s failed.")
+            return 0
+
+        if not(b3 and b4):
+            print("Remasking of prefix failed.")
+            return 0
+
+    SPECT_OP_STATUS, SPECT_OP_DATA_OUT_SIZE = tc.get_res_word(test_dir, run_name)
 
     ########################################################################################################
     #   Read and Check
@@ -36,7 +36,9 @@ def run_op(cmd_file, cmd_id, test_dir, run_name, break_s=None):
     cmd += f" --shell --cmd-file={test_dir}/iss_cmd"
     cmd += f" > {test_dir}/{run_log}"
 
-    if os.system(cmd):
+    ret = os.system(cmd)
+    tc.invalidate_dumps(test_dir, run_name)
+    if ret:
         print("ISS FAILED")
         sys.exit(2)
 
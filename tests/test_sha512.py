@@ -5,6 +5,7 @@ import random as rn
 import os
 
 import test_common as tc
+from iss_sequence import OpSequence
 
 def sha512(s):
     return hashlib.sha512(s).digest()
@@ -20,7 +21,6 @@ if __name__ == "__main__":
     test_name = "sha512"
 
     test_dir = tc.make_test_dir(test_name)
-    cmd_file = tc.get_cmd_file(test_dir)
 
     msg_bitlen = rn.randint(2*128, 5*128)*8
     message = int.to_bytes(rn.getrandbits(msg_bitlen), msg_bitlen//8, 'big')
@@ -38,23 +38,29 @@ if __name__ == "__main__":
     for i in range(0, len(message_padded), 128):
         m_blocks.append(message_padded[i:i+128])
 
+    seq = OpSequence(test_dir, ops_cfg, test_name)
+    cmd_file = seq.cmd_file
+
     tc.print_run_name("sha512_init")
     tc.start(cmd_file)
-    ctx = tc.run_op(cmd_file, "sha512_init", 0x0, 0x1, 0, ops_cfg, test_dir)
+    seq.add_op("sha512_init", 0x0, 0x1, 0)
 
     for i in range(len(m_blocks)-1):
         tc.print_run_name(f"sha512_update_{i}")
-        cmd_file = tc.get_cmd_file(test_dir)
         tc.start(cmd_file)
         tc.write_bytes(cmd_file, m_blocks[i], 0x0010)
         run_name = "sha512_update" + f"_{i}"
-        ctx = tc.run_op(cmd_file, "sha512_update", 0x0, 0x1, 128, ops_cfg, test_dir, run_name=run_name, old_context=ctx)
+        seq.add_op("sha512_update", 0x0, 0x1, 128, run_name=run_name)
 
     tc.print_run_name("sha512_final")
-    cmd_file = tc.get_cmd_file(test_dir)
     tc.start(cmd_file)
     tc.write_bytes(cmd_file, m_blocks[-1], 0x0010)
-    ctx = tc.run_op(cmd_file, "sha512_final", 0x0, 0x1, 128, ops_cfg, test_dir, old_context=ctx)
+    seq.add_op("sha512_final", 0x0, 0x1, 128)
+
+    ctx = seq.run()
+    if ctx is None:
+        tc.print_failed()
+        sys.exit(1)
 
     digest = tc.read_output(test_dir, "sha512_final", 0x1010, 16)
 
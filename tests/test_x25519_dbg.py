@@ -25,7 +25,7 @@ if __name__ == "__main__":
 
     if args.testvec != "":
         print(f"Reading test vector from {args.testvec}")
-        data_dir, rng_list = tc.parse_testvec(args.testvec, tc.rng_luts[test_name])
+        data_dir, rng_list = tc.parse_testvec(args.testvec, tc.rng_luts[test_name], args.testvec_index)
         priv = tc.str2int(data_dir["priv"], 'little')
         priv_scalar = models.x25519.int2scalar(priv)
         pub = tc.str2int(data_dir["pub"], 'little')
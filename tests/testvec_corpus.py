@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Binary corpus of precomputed test vectors.
+
+Vectors of one op (as produced by testvec_gen.py) are stored as fixed-width
+records, so the corpus is loaded with np.memmap and any vector is decoded
+without parsing the rest of the file. Fields of variable length (messages)
+are kept in a blob region, each record holds their offset and length.
+
+File layout:
+    header      magic, version, count, offsets of the regions (HEADER)
+    schema      JSON list of [section, name, kind, size]
+    records     count * record size, NumPy structured dtype from schema
+    blob        concatenated variable length fields
+
+Field kinds:
+    int         256-bit unsigned integer, 32 bytes little-endian
+    bool        1 byte
+    bytes       fixed length byte string, `size` bytes
+    blob        variable length byte string, (offset, length) in record
+    rng         list of `size` 256-bit RNG words
+"""
+import sys
+import json
+import struct
+from argparse import ArgumentParser
+
+import numpy as np
+
+MAGIC = b"TSVC"
+VERSION = 1
+
+# magic, version, count, schema offset, schema size, records offset, blob offset
+HEADER = struct.Struct("<4sIQQQQQ")
+
+ALIGN = 64
+
+def align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def field_dtype(kind: str, size: int):
+    if kind == "int":
+        return ('u1', (32,))
+    if kind == "bool":
+        return 'u1'
+    if kind == "bytes":
+        return ('u1', (size,))
+    if kind == "blob":
+        return [("offset", '<u8'), ("length", '<u4')]
+    return ('u1', (size, 32))
+
+def record_dtype(schema: list) -> np.dtype:
+    return np.dtype([(f"{section}.{name}", field_dtype(kind, size)) for section, name, kind, size in schema])
+
+def infer_schema(vectors) -> list:
+    """Field kinds of vectors, hex string fields of varying length are blobs."""
+    fields = {}
+    for v in vectors:
+        for section in ["input", "output"]:
+            for name, val in v[section].items():
+                if isinstance(val, bool):
+                    kind, size = "bool", 1
+                elif isinstance(val, int):
+                    kind, size = "int", 32
+                else:
+                    kind, size = "bytes", len(val) // 2
+                old = fields.get((section, name))
+                if old and old != (kind, size):
+                    kind, size = "blob", 0
+                fields[(section, name)] = (kind, size)
+        rng = fields.get(("rng", "rng"), ("rng", 0))
+        fields[("rng", "rng")] = ("rng", max(rng[1], len(v["rng"])))
+    return [[section, name, kind, size] for (section, name), (kind, size) in fields.items()]
+
+def write_corpus(file_name: str, vectors, schema=None):
+    """
+    Writes `vectors` (re-iterable, e.g. list) of one op to corpus `file_name`.
+    Without `schema`, it is inferred by an extra pass over `vectors`.
+    """
+    if schema is None:
+        schema = infer_schema(vectors)
+    dtype = record_dtype(schema)
+    schema_raw = json.dumps(schema).encode()
+
+    records = []
+    blob = bytearray()
+    for v in vectors:
+        rec = np.zeros((), dtype=dtype)
+        for section, name, kind, size in schema:
+            key = f"{section}.{name}"
+            if section == "rng":
+                words = v["rng"]
+                rec[key][:len(words)] = np.frombuffer(
+                    b"".join(w.to_bytes(32, 'little') for w in words), dtype='u1'
+                ).reshape(len(words), 32)
+                continue
+            val = v[section][name]
+            if kind == "int":
+                rec[key] = np.frombuffer(val.to_bytes(32, 'little'), dtype='u1')
+            elif kind == "bool":
+                rec[key] = int(val)
+            elif kind == "bytes":
+                rec[key] = np.frombuffer(bytes.fromhex(val), dtype='u1')
+            else:
+                raw = bytes.fromhex(val)
+                rec[key]["offset"] = len(blob)
+                rec[key]["length"] = len(raw)
+                blob += raw
+        records.append(rec)
+
+    schema_off = HEADER.size
+    records_off = align(schema_off + len(schema_raw))
+    blob_off = align(records_off + len(records) * dtype.itemsize)
+
+    with open(file_name, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), schema_off, len(schema_raw), records_off, blob_off))
+        f.write(schema_raw)
+        f.seek(records_off)
+        if records:
+            f.write(np.array(records, dtype=dtype).tobytes())
+        f.seek(blob_off)
+        f.write(blob)
+
+def is_corpus(file_name: str) -> bool:
+    with open(file_name, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class Corpus:
+    """Memory-mapped corpus, `corpus[i]` decodes vector i."""
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        with open(file_name, 'rb') as f:
+            magic, version, count, schema_off, schema_size, records_off, blob_off = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise Exception(f"{file_name} is not a test vector corpus (version {VERSION})!")
+            f.seek(schema_off)
+            self.schema = json.loads(f.read(schema_size))
+
+        self.dtype = record_dtype(self.schema)
+        self.count = count
+        self.records = np.memmap(file_name, dtype=self.dtype, mode='r', offset=records_off, shape=(count,)) \
+            if count else np.zeros(0, dtype=self.dtype)
+        self.blob = np.memmap(file_name, dtype='u1', mode='r', offset=blob_off) \
+            if any(kind == "blob" for _, _, kind, _ in self.schema) else None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i: int) -> dict:
+        rec = self.records[i]
+        v = {"index": i, "input": {}, "rng": [], "output": {}}
+        for section, name, kind, size in self.schema:
+            val = rec[f"{section}.{name}"]
+            if kind == "rng":
+                v["rng"] = [int.from_bytes(w.tobytes(), 'little') for w in val]
+            elif kind == "int":
+                v[section][name] = int.from_bytes(val.tobytes(), 'little')
+            elif kind == "bool":
+                v[section][name] = bool(val)
+            elif kind == "bytes":
+                v[section][name] = val.tobytes().hex()
+            else:
+                off, length = int(val["offset"]), int(val["length"])
+                v[section][name] = self.blob[off:off+length].tobytes().hex()
+        return v
+
+    def testvec(self, i: int):
+        """(data_dir, rng_list) of vector i, as returned by parse_testvec"""
+        v = self[i]
+        return {**v["input"], **v["output"]}, v["rng"]
+
+parser = ArgumentParser(description='Build binary test vector corpus from testvec_gen.py output')
+parser.add_argument("vectors", help="JSON lines file of vectors of one op")
+parser.add_argument("corpus", help="Output corpus file")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    with open(args.vectors, 'r') as f:
+        vectors = [json.loads(line) for line in f if line.strip()]
+    if len(set(v["op"] for v in vectors)) > 1:
+        print("Corpus holds vectors of one op only.")
+        sys.exit(1)
+    write_corpus(args.corpus, vectors)
+    print(f"{len(vectors)} vectors written to {args.corpus}")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Parallel generation of reference test vectors.
+
+Every vector is computed by the models from its own random generator seeded
+by (seed, op, index), so a vector does not depend on the worker it runs on
+or on the number of workers. Vectors are computed in a ProcessPoolExecutor
+and streamed to the consumer as they are finished, with bounded number of
+vectors in flight.
+
+A vector is a dict in the layout of tests/testvec/*.yml:
+    {"op", "index", "input" : {name : value}, "rng" : [int], "output" : {name : value}}
+with bytes stored as hex strings.
+"""
+import os
+import sys
+import json
+import random
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import models.ed25519 as ed25519
+import models.p256 as p256
+import models.x25519 as x25519
+import models.random_point_generate_25519_model as rpg
+import models.random_point_generate_p256_model as rpg_p256
+from models.tmac import tmac_int_batch
+
+def gen_x25519(r: random.Random) -> tuple:
+    # Keys as little-endian strings, as in x25519_dbg_testvec.yml
+    priv = r.randbytes(32)
+    pub = x25519.x25519(x25519.int2scalar(r.getrandbits(256)), 9)
+    priv_scalar = x25519.int2scalar(int.from_bytes(priv, 'little'))
+    return (
+        {"priv": priv, "pub": pub.to_bytes(32, 'little')},
+        [r.getrandbits(256) for _ in range(8)],
+        {"R": x25519.x25519(priv_scalar, pub)}
+    )
+
+def gen_ecdsa_sign(r: random.Random) -> tuple:
+    d, w, Ax, Ay = p256.key_gen(r.randbytes(32))
+    z, sch, scn = r.randbytes(32), r.randbytes(32), r.randbytes(4)
+    sig_r, sig_s = p256.sign(d, w, sch, scn, z)
+    return (
+        {"z": z, "sch": sch, "scn": scn, "d": d, "w": w, "Ax": Ax, "Ay": Ay},
+        [r.getrandbits(256) for _ in range(16)],
+        {"r": sig_r, "s": sig_s}
+    )
+
+def gen_eddsa_sign(r: random.Random) -> tuple:
+    s, prefix, A = ed25519.key_gen(r.randbytes(32))
+    sch, scn = r.randbytes(32), r.randbytes(4)
+    m = r.randbytes(r.randint(0, 256))
+    return (
+        {"s": s, "prefix": prefix, "A": A, "sch": sch, "scn": scn, "m": m},
+        [r.getrandbits(256) for _ in range(10)],
+        {"signature": ed25519.sign(s, prefix, A, sch, scn, m)}
+    )
+
+def gen_eddsa_verify(r: random.Random) -> tuple:
+    secret, m = r.randbytes(32), r.randbytes(r.randint(0, 256))
+    signature, A = ed25519.sign_standard(secret, m)
+    return (
+        {"signature": signature, "A": A, "m": m},
+        [],
+        {"valid": ed25519.verify(A, m, signature)}
+    )
+
+def gen_point_generate_curve25519(r: random.Random) -> tuple:
+    dst, rng = r.randbytes(32), r.getrandbits(256)
+    x, y, z = rpg.point_generate_curve25519(dst, rng)
+    return (
+        {"dst": dst},
+        [rng],
+        {"x": x, "y": y, "z": z}
+    )
+
+def gen_point_generate_p256(r: random.Random) -> tuple:
+    dst, rng = r.randbytes(32), r.getrandbits(256)
+    x, y, z = rpg_p256.point_generate_p256(dst, rng)
+    return (
+        {"dst": dst},
+        [rng],
+        {"x": x, "y": y, "z": z}
+    )
+
+GENERATORS = {
+    "x25519"                    : gen_x25519,
+    "ecdsa_sign"                : gen_ecdsa_sign,
+    "eddsa_sign"                : gen_eddsa_sign,
+    "eddsa_verify"              : gen_eddsa_verify,
+    "point_generate_curve25519" : gen_point_generate_curve25519,
+    "point_generate_p256"       : gen_point_generate_p256
+}
+
+# op : (key input, message input, TMAC nonce, group order) of deterministic nonce derivation
+NONCE_OPS = {
+    "eddsa_nonce"   : ("prefix", "m", b"\x0C", ed25519.q),
+    "ecdsa_nonce"   : ("w", "z", b"\x0B", p256.q)
+}
+
+def gen_nonce_chunk(op: str, rs: list) -> list:
+    """
+    Deterministic nonces (ed25519.get_nonce, p256.get_nonce) of a whole chunk,
+    both TMAC rounds of all vectors are computed together by tmac_int_batch.
+    """
+    key_name, msg_name, tag, order = NONCE_OPS[op]
+    inputs = []
+    for r in rs:
+        key, sch, scn = r.getrandbits(256), r.randbytes(32), r.randbytes(4)
+        msg = r.randbytes(r.randint(0, 256)) if op == "eddsa_nonce" else r.randbytes(32)
+        inputs.append({key_name: key, "sch": sch, "scn": scn, msg_name: msg})
+
+    r1 = tmac_int_batch(
+        [i[key_name] for i in inputs], [i["sch"] + i["scn"] + i[msg_name] for i in inputs], tag
+    )
+    r2 = tmac_int_batch(r1, [b""] * len(r1), tag)
+    return [
+        (i, [], {"nonce": (a | (b << 256)) % order})
+        for i, a, b in zip(inputs, r1, r2)
+    ]
+
+def encode(values: dict) -> dict:
+    return {k: v.hex() if isinstance(v, bytes) else v for k, v in values.items()}
+
+def vector_rng(op: str, seed: int, index: int) -> random.Random:
+    return random.Random(f"{seed}:{op}:{index}")
+
+def to_vector(op: str, index: int, inputs: dict, rng: list, outputs: dict) -> dict:
+    return {
+        "op"        : op,
+        "index"     : index,
+        "input"     : encode(inputs),
+        "rng"       : rng,
+        "output"    : encode(outputs)
+    }
+
+def make_vector(op: str, seed: int, index: int) -> dict:
+    return make_chunk(op, seed, index, 1)[0]
+
+def make_chunk(op: str, seed: int, start: int, count: int) -> list:
+    indexes = range(start, start + count)
+    if op in NONCE_OPS:
+        vectors = gen_nonce_chunk(op, [vector_rng(op, seed, i) for i in indexes])
+    else:
+        vectors = [GENERATORS[op](vector_rng(op, seed, i)) for i in indexes]
+    return [to_vector(op, i, *v) for i, v in zip(indexes, vectors)]
+
+def generate(ops: list, count: int, seed: int, workers=None, chunk=64, ordered=True):
+    """
+    Yields `count` vectors of every op in `ops`. Work is split into chunks
+    of `chunk` vectors, at most 4 chunks per worker are in flight. With
+    `ordered`, vectors of each op are yielded in index order, otherwise in
+    order of completion.
+    """
+    if not workers:
+        workers = os.cpu_count()
+    jobs = [(op, start, min(chunk, count - start)) for op in ops for start in range(0, count, chunk)]
+    jobs.reverse()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        done = {}
+        submitted = 0
+        next_job = 0
+        while jobs or pending:
+            # Finished but not yet yielded chunks count as in flight
+            while jobs and len(pending) + len(done) < 4 * workers:
+                op, start, n = jobs.pop()
+                pending[pool.submit(make_chunk, op, seed, start, n)] = submitted
+                submitted += 1
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in finished:
+                job_id = pending.pop(f)
+                if not ordered:
+                    yield from f.result()
+                    continue
+                done[job_id] = f.result()
+            while next_job in done:
+                yield from done.pop(next_job)
+                next_job += 1
+
+parser = ArgumentParser(description='TS SPECT reference test vector generator')
+parser.add_argument("ops", nargs="+", choices=list(GENERATORS.keys()) + list(NONCE_OPS.keys()), help="Ops to generate vectors for")
+parser.add_argument("-n", "--count", type=int, default=1000, help="Vectors per op")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the vector set")
+parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
+parser.add_argument("--chunk", type=int, default=64, help="Vectors per worker task")
+parser.add_argument("--unordered", action="store_true", help="Output vectors in order of completion")
+parser.add_argument("-o", "--output", default=None, help="Output JSON lines file, default stdout")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    for vector in generate(args.ops, args.count, args.seed, args.jobs, args.chunk, not args.unordered):
+        out.write(json.dumps(vector) + "\n")
+    if args.output:
+        out.close()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("TS_REPO_ROOT", os.path.dirname(TESTS_DIR))
+sys.path.insert(0, TESTS_DIR)
@@ -0,0 +1,19 @@
+from bench_ops import summarize, compare_results
+
+def op(cycles):
+    return {"n": len(cycles), "cycles": summarize(cycles), "instructions": None}
+
+def test_summarize_missing_counter():
+    assert summarize([3, 1, 2]) == {"min": 1, "median": 2, "max": 3}
+    assert summarize([3, None, 2]) is None
+    assert summarize([]) is None
+
+def test_compare_results(capsys):
+    baseline = {"version": "v1", "ops": {"a": op([100]), "b": op([100]), "c": op([100])}}
+    ops = {"a": op([100]), "b": op([102]), "c": op([101]), "new": op([5])}
+    assert compare_results(ops, baseline, threshold=1.0) == 1
+    assert "not in baseline" in capsys.readouterr().out
+
+def test_compare_results_missing_counter():
+    baseline = {"version": "v1", "ops": {"a": op([100]), "b": op([None])}}
+    assert compare_results({"a": op([None]), "b": op([100])}, baseline, threshold=1.0) == 2
@@ -0,0 +1,48 @@
+import os
+import threading
+
+from iss_cache import IssCache
+
+def write_run(test_dir, run_name, data):
+    for suffix in ["_out.hex", ".ctx"]:
+        with open(f"{test_dir}/{run_name}{suffix}", 'w') as f:
+            f.write(data)
+
+def test_store_load(tmp_path):
+    cache = IssCache(str(tmp_path / "cache"))
+    test_dir = str(tmp_path)
+    write_run(test_dir, "a", "0000 00000001\n")
+    cache.store("k", test_dir, "a")
+
+    assert cache.load("k", test_dir, "b")
+    with open(f"{test_dir}/b.ctx") as f:
+        assert f.read() == "0000 00000001\n"
+    assert not os.path.exists(f"{test_dir}/b_keymem.hex")
+    assert not cache.load("missing", test_dir, "c")
+
+def test_evict_waits_for_load(tmp_path):
+    cache = IssCache(str(tmp_path / "cache"), size_mb=0)
+    test_dir = str(tmp_path)
+    write_run(test_dir, "a", "x" * 64)
+    cache.store("k", test_dir, "a")
+    # Size limit of zero evicts the entry right after it is stored
+    assert not cache.load("k", test_dir, "b")
+
+    cache.size_limit = 1 << 20
+    cache.store("k", test_dir, "a")
+    cache.size_limit = 0
+    evicted = threading.Event()
+
+    def evict():
+        with cache.locked(exclusive=True):
+            cache.evict()
+        evicted.set()
+
+    with cache.locked():
+        t = threading.Thread(target=evict)
+        t.start()
+        assert not evicted.wait(0.2)
+        assert os.path.isdir(f"{cache.cache_dir}/k")
+    t.join()
+    assert evicted.is_set()
+    assert not cache.load("k", test_dir, "b")
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from iss_dumps import parse_iss_log, iss_step_stats
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def split_log(tmp_path) -> list:
+    """Per-op logs of the fixture as written by OpSequence, split after every marker."""
+    with open(f"{FIXTURES}/iss_run_summary.log", 'r') as f:
+        lines = f.readlines()
+    ends = [i for i, l in enumerate(lines) if l.startswith("mem[0x0100]")]
+    logs = []
+    start = 0
+    for n, end in enumerate(ends):
+        logs.append(f"{tmp_path}/op{n}_iss.log")
+        with open(logs[-1], 'w') as log:
+            log.writelines(lines[start:end])
+        start = end + 1
+    return logs
+
+def test_parse_iss_log_summary_only():
+    # Trace lines and warnings mentioning cycles are not counters
+    assert parse_iss_log(f"{FIXTURES}/iss_run_summary.log") == {"cycles": 16, "instructions": 8}
+
+def test_parse_iss_log_no_summary(tmp_path):
+    with open(f"{tmp_path}/iss.log", 'w') as log:
+        log.write("0x8000: CALL 0x8010            ; cycle 1\n")
+    assert parse_iss_log(f"{tmp_path}/iss.log") == {"cycles": None, "instructions": None}
+
+def test_iss_step_stats(tmp_path):
+    stats = [parse_iss_log(log) for log in split_log(tmp_path)]
+    assert stats == [{"cycles": 8, "instructions": 4}, {"cycles": 16, "instructions": 8}]
+    assert iss_step_stats(stats) == [{"cycles": 8, "instructions": 4}, {"cycles": 8, "instructions": 4}]
+
+def test_iss_step_stats_restarted_counter():
+    stats = [{"cycles": 10, "instructions": None}, {"cycles": 4, "instructions": 2}, {"cycles": 9, "instructions": 3}]
+    assert iss_step_stats(stats) == [
+        {"cycles": 10, "instructions": None}, {"cycles": 4, "instructions": 2}, {"cycles": 5, "instructions": 1}
+    ]
+
+def write_out(file_name, words):
+    with open(file_name, 'w') as out:
+        for i, w in enumerate(words):
+            out.write("{:04X} {:08X}\n".format(0x1000 + 4*i, w))
+
+def test_cached_dump_reloaded_after_invalidate(tmp_path):
+    import test_common as tc
+    from iss_dumps import OutputMemory
+
+    file_name = f"{tmp_path}/op_out.hex"
+    write_out(file_name, [1, 2, 3, 4])
+    assert OutputMemory.load(file_name, 0x1000).read_int(0x1000, 1) == 1
+
+    # Not re-read until the writer invalidates the run
+    write_out(file_name, [5, 2, 3, 4])
+    assert OutputMemory.load(file_name, 0x1000).read_int(0x1000, 1) == 1
+    tc.invalidate_dumps(str(tmp_path), "op")
+    mem = OutputMemory.load(file_name, 0x1000)
+    assert mem.read_int(0x1000, 1) == 5
+    with pytest.raises(ValueError):
+        mem.data[0] = 0
+
+def test_context_load_returns_copy(tmp_path):
+    from iss_dumps import IssContext
+
+    file_name = f"{tmp_path}/op.ctx"
+    with open(file_name, 'w') as ctx:
+        ctx.write("GPR registers:\n" + "*" * 16 + "\n" + "".join(f"{i:064X}\n" for i in range(32)))
+
+    a = IssContext.load(file_name)
+    a["GPR"][0] = 0xFF
+    b = IssContext.load(file_name)
+    assert b["GPR"][0] == 0
+    assert a["GPR"][0] == 0xFF
+
+    a.write(file_name)
+    assert IssContext.load(file_name)["GPR"][0] == 0xFF
@@ -0,0 +1,50 @@
+import pytest
+
+from iss_profile import ProgramMap, Profile
+
+PROGRAM = """\
+main:
+0x8000: CALL sub
+0x8004: END
+sub:
+0x8010: ADDI r1, r1, 0x1
+0x8014: RET
+"""
+
+TRACE_CYCLES = """\
+0x8000: CALL sub                ; cycle 1
+0x8010: ADDI r1, r1, 0x1        ; cycle 3
+0x8014: RET                     ; cycle 6
+0x8004: END                     ; cycle 7
+"""
+
+TRACE_NO_CYCLES = "".join(l.split(';')[0] + "\n" for l in TRACE_CYCLES.splitlines())
+
+@pytest.fixture
+def program(tmp_path):
+    (tmp_path / "program_dump.s").write_text(PROGRAM)
+    (tmp_path / "symbols_dump.s").write_text("main 0x8000\nsub 0x8010\n")
+    return ProgramMap(f"{tmp_path}/program_dump.s", f"{tmp_path}/symbols_dump.s")
+
+def write_log(tmp_path, name, text) -> str:
+    (tmp_path / name).write_text(text)
+    return f"{tmp_path}/{name}"
+
+def test_profile_cycles(tmp_path, program):
+    profile = Profile(program)
+    assert profile.add_run("op", write_log(tmp_path, "op.log", TRACE_CYCLES)) == 7
+    assert profile.unit == "cycles"
+    assert profile.exclusive == {"op": 3, "sub": 4}
+
+def test_profile_without_cycles_counts_instructions(tmp_path, program, capsys):
+    profile = Profile(program)
+    assert profile.add_run("op", write_log(tmp_path, "op.log", TRACE_NO_CYCLES)) == 4
+    assert profile.unit == "instructions"
+    profile.print_table()
+    assert "excl instr" in capsys.readouterr().out
+
+def test_profile_does_not_mix_units(tmp_path, program):
+    profile = Profile(program)
+    profile.add_run("op", write_log(tmp_path, "op0.log", TRACE_CYCLES))
+    with pytest.raises(Exception):
+        profile.add_run("op", write_log(tmp_path, "op1.log", TRACE_NO_CYCLES))
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from iss_sequence import capture_commands, get_mem_word, parse_capture, capture_addrs
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+MARKER = 0x5EC7A11E
+
+@pytest.fixture
+def capture_log():
+    with open(f"{FIXTURES}/iss_capture.log", 'r') as f:
+        return f.readlines()
+
+def test_get_mem_word():
+    assert get_mem_word("mem[0x1000]: 0x0000ABCD\n") == (0x1000, 0xABCD)
+    assert get_mem_word("0x1004 12345678") == (0x1004, 0x12345678)
+    assert get_mem_word("> get mem[0x1000]") is None
+    assert get_mem_word("WARNING: read of uninitialized memory at 0x101C") is None
+    assert get_mem_word("SPECT Instruction Set Simulator") is None
+
+def test_capture_commands_order():
+    gets = [l for l in capture_commands(MARKER).splitlines() if l.startswith("get")]
+    assert len(gets) == 1 + 128 + 128
+    assert [int(l[len("get mem["):-1], 16) for l in gets[1:]] == capture_addrs()
+
+def test_parse_capture(capture_log):
+    idx, mems = parse_capture(capture_log, MARKER)
+    assert capture_log[idx].startswith("mem[0x0100]")
+    (out_suffix, out), (emem_suffix, emem) = mems
+    assert (out_suffix, emem_suffix) == ("_out.hex", "_emem_out.hex")
+    assert len(out) == 128 and len(emem) == 128
+    assert out[0] == (0x1000, 0x00C3B001)
+    assert out[8] == (0x1020, 0x11110008)
+    assert emem[127] == (0x51FC, 0x2222007F)
+
+def test_parse_capture_other_marker(capture_log):
+    assert parse_capture(capture_log, MARKER + 1) == (None, None)
+
+def test_parse_capture_incomplete(capture_log):
+    assert parse_capture(capture_log[:-10], MARKER) == (None, None)
+
+def test_parse_capture_missing_word(capture_log):
+    lines = [l for l in capture_log if not l.startswith("mem[0x1010]")]
+    assert parse_capture(lines, MARKER) == (None, None)
+
+OPS_CFG = [{"name": "op_a", "id": 0xA1}, {"name": "op_b", "id": 0xB2}]
+
+@pytest.fixture
+def fake_iss(monkeypatch):
+    """spect_iss replaced by a shell interpreting only `set mem` and `get mem`."""
+    import test_common as tc
+    runs = []
+
+    def run_iss(image, test_dir, run_name, old_context=None, keymem=None):
+        with open(f"{test_dir}/iss_cmd", 'r') as f:
+            cmds = f.read()
+        with open(f"{test_dir}/rng.hex", 'r') as f:
+            rng = f.read().split()
+        runs.append((run_name, old_context, keymem, cmds, rng))
+        mem = {}
+        with open(f"{test_dir}/{run_name}_iss.log", 'w') as log:
+            for line in cmds.splitlines():
+                cmd, _, args = line.partition(" ")
+                if cmd == "set":
+                    addr, val = args.split()
+                    mem[int(addr[len("mem["):-1], 16)] = int(val, 16)
+                elif cmd == "get":
+                    addr = int(args[len("mem["):-1], 16)
+                    log.write("mem[0x{:04X}]: 0x{:08X}\n".format(addr, mem.get(addr, 0)))
+
+    monkeypatch.setattr(tc, "run_iss", run_iss)
+    monkeypatch.setattr(tc, "get_iss_image", lambda *args: "")
+    return runs
+
+def add_op(seq, op_name, run_name, res_word=0, rng=(), **kwargs):
+    seq.set_rng(list(rng))
+    seq.cmd_file.write("set mem[0x1100] 0x{:08X}\n".format(res_word))
+    seq.add_op(op_name, 0x4, 0x5, 0, run_name=run_name, **kwargs)
+
+def test_op_sequence_dump_splits_run(tmp_path, fake_iss):
+    import test_common as tc
+    from iss_sequence import OpSequence
+
+    seq = OpSequence(str(tmp_path), OPS_CFG, "seq", keymem="initial_keymem.hex")
+    add_op(seq, "op_a", "first", rng=[1, 2], status=0, dump=True)
+    add_op(seq, "op_b", "second", rng=[3], status=0)
+    add_op(seq, "op_b", "third", res_word=0x00500000, status=0, out_size=0x50)
+
+    assert seq.run() == "seq.ctx"
+    assert [r[:3] for r in fake_iss] == [
+        ("first", None, "initial_keymem.hex"),
+        ("seq", "first.ctx", f"{tmp_path}/first_keymem.hex")
+    ]
+    assert fake_iss[0][3].count("\nrun\n") == 1 and fake_iss[0][3].endswith("exit\n")
+    assert fake_iss[1][3].count("\nrun\n") == 2 and fake_iss[1][3].endswith("exit\n")
+    # rng.hex holds 8 lines per random number, every run gets only numbers of its own ops
+    assert [len(r[4]) // 8 for r in fake_iss] == [2, 1]
+    assert tc.get_res_word(str(tmp_path), "third") == (0x00, 0x50)
+
+def test_op_sequence_stops_on_first_failed_op(tmp_path, fake_iss, capsys):
+    from iss_sequence import OpSequence
+
+    seq = OpSequence(str(tmp_path), OPS_CFG, "seq")
+    add_op(seq, "op_a", "first", rng=[1], status=0)
+    add_op(seq, "op_b", "second", res_word=0xF2, status=0, dump=True)
+    add_op(seq, "op_b", "third", res_word=0xF4, status=0)
+
+    assert seq.run() is None
+    assert [r[0] for r in fake_iss] == ["second"]
+    assert "second SPECT_OP_STATUS: 0xf2" in capsys.readouterr().out
+
+def test_op_sequence_iss_cmd_is_deterministic(tmp_path, fake_iss):
+    from iss_sequence import OpSequence
+
+    for name in ["a", "b"]:
+        seq = OpSequence(str(tmp_path), OPS_CFG, name)
+        add_op(seq, "op_a", "first", rng=[1], dump=True)
+        add_op(seq, "op_b", "second")
+        seq.run()
+    assert [r[3] for r in fake_iss[:2]] == [r[3] for r in fake_iss[2:]]
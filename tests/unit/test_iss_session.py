@@ -0,0 +1,162 @@
+import os
+import sys
+import stat
+
+import pytest
+
+import test_common as tc
+from iss_session import IssSession, IssSessionPool
+
+# spect_iss replaced by a shell interpreting `set mem`, `get mem` and `run`,
+# which moves the next GRV word to 0x1104. Memory is the whole context.
+FAKE_ISS = '''#!{python}
+import os
+import sys
+
+args = dict(a[2:].split("=", 1) for a in sys.argv[1:] if "=" in a)
+with open(os.environ["FAKE_ISS_STARTS"], 'a') as f:
+    f.write(" ".join(sorted(k for k in args if k.startswith("load"))) + "\\n")
+
+mem = {{}}
+if "load-context" in args:
+    with open(args["load-context"]) as f:
+        for line in f:
+            addr, val = line.split()
+            mem[int(addr, 16)] = int(val, 16)
+keymem = ""
+if "load-keymem" in args:
+    with open(args["load-keymem"]) as f:
+        keymem = f.read()
+with open(args["grv-hex"]) as f:
+    grv = f.read().split()
+
+for line in sys.stdin:
+    cmd, _, arg = line.strip().partition(" ")
+    if cmd == "set":
+        addr, val = arg.split()
+        mem[int(addr[len("mem["):-1], 16)] = int(val, 16)
+    elif cmd == "get":
+        addr = int(arg[len("mem["):-1], 16)
+        print("mem[0x{{:04X}}]: 0x{{:08X}}".format(addr, mem.get(addr, 0)), flush=True)
+    elif cmd == "run":
+        mem[0x1104] = int(grv.pop(0), 16)
+        keymem += "run\\n"
+    elif cmd == "exit":
+        break
+
+with open(args["dump-context"], 'w') as f:
+    for addr, val in sorted(mem.items()):
+        f.write("{{:04X}} {{:08X}}\\n".format(addr, val))
+with open(args["dump-keymem"], 'w') as f:
+    f.write(keymem)
+'''
+
+@pytest.fixture
+def fake_iss(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    iss = bin_dir / "spect_iss"
+    iss.write_text(FAKE_ISS.format(python=sys.executable))
+    iss.chmod(iss.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_ISS_STARTS", str(tmp_path / "starts"))
+
+    test_dir = tmp_path / "test"
+    test_dir.mkdir()
+    return str(test_dir)
+
+def starts(test_dir):
+    with open(f"{test_dir}/../starts") as f:
+        return f.read().splitlines()
+
+def write_op(test_dir, value):
+    with open(f"{test_dir}/iss_cmd", 'w') as f:
+        f.write("set mem[0x1000] 0x{:08X}\nrun\n".format(value))
+
+def test_session_continues_ops(fake_iss):
+    test_dir = fake_iss
+    tc.set_rng(test_dir, [0x0000000200000001])
+    with IssSession() as s:
+        write_op(test_dir, 0xA)
+        s.run_op("", test_dir, "first")
+        write_op(test_dir, 0xB)
+        s.run_op("", test_dir, "second", old_context="first.ctx", keymem=f"{test_dir}/first_keymem.hex")
+
+        # Second op continues the GRV queue and state of the first one
+        assert tc.read_output(test_dir, "first", 0x1000, 1) == 0xA
+        assert tc.read_output(test_dir, "second", 0x1000, 1) == 0xB
+        assert not os.path.exists(f"{test_dir}/first.ctx")
+        assert not os.path.exists(f"{test_dir}/second.ctx")
+    assert starts(test_dir) == [""]
+
+    with open(f"{test_dir}/second.ctx") as f:
+        assert "1104 00000002\n" in f.read()
+    with open(f"{test_dir}/second_keymem.hex") as f:
+        assert f.read() == "run\nrun\n"
+
+def test_session_restarts_on_other_state(fake_iss):
+    test_dir = fake_iss
+    tc.set_rng(test_dir, [0x0000000200000001])
+    with IssSession() as s:
+        write_op(test_dir, 0xA)
+        s.run_op("", test_dir, "first")
+        write_op(test_dir, 0xB)
+        s.run_op("", test_dir, "second", old_context="first.ctx")
+
+        # Not continued, context of the first op is dumped for the second one
+        assert os.path.exists(f"{test_dir}/first.ctx")
+        assert tc.read_output(test_dir, "second", 0x1000, 1) == 0xB
+
+        tc.set_rng(test_dir, [0x7])
+        write_op(test_dir, 0xC)
+        s.run_op("", test_dir, "third", old_context="second.ctx", keymem=f"{test_dir}/second_keymem.hex")
+    assert starts(test_dir) == ["", "load-context", "load-context load-keymem"]
+    with open(f"{test_dir}/third.ctx") as f:
+        assert "1104 00000007\n" in f.read()
+
+def test_session_keeps_iss_cmd(fake_iss):
+    test_dir = fake_iss
+    tc.set_rng(test_dir, [1])
+    with IssSession() as s:
+        write_op(test_dir, 0xA)
+        s.run_op("", test_dir, "first")
+    with open(f"{test_dir}/iss_cmd") as f:
+        assert f.read() == "set mem[0x1000] 0x0000000A\nrun\n"
+    with open(f"{test_dir}/first_iss.log") as f:
+        assert f.read() == ""
+
+def test_op_sequence_in_session(fake_iss, monkeypatch):
+    from iss_sequence import OpSequence
+
+    test_dir = fake_iss
+    session = IssSession()
+    monkeypatch.setattr(tc, "get_session", lambda: session)
+    monkeypatch.setattr(tc, "get_iss_image", lambda *args: "")
+
+    ops_cfg = [{"name": "op_a", "id": 0xA1}]
+    seq = OpSequence(test_dir, ops_cfg, "seq")
+    for run_name, dump in [("first", True), ("second", False)]:
+        seq.set_rng([0x5])
+        seq.cmd_file.write("set mem[0x1100] 0x00000000\n")
+        seq.add_op("op_a", 0x0, 0x1, 0, run_name=run_name, status=0, dump=dump)
+
+    assert seq.run() == "seq.ctx"
+    session.stop()
+    # rng.hex is rewritten for the second segment, the simulator restarts from the dump
+    assert starts(test_dir) == ["", "load-context load-keymem"]
+    assert os.path.exists(f"{test_dir}/first.ctx") and os.path.exists(f"{test_dir}/seq.ctx")
+    assert tc.get_res_word(test_dir, "second") == (0, 0)
+
+def test_pool_slots_shared_by_lock_dir(tmp_path):
+    lock_dir = str(tmp_path / "pool")
+    a = IssSessionPool(1, lock_dir)
+    b = IssSessionPool(1, lock_dir)
+
+    s = a.borrow(block=False)
+    assert s is not None
+    assert b.borrow(block=False) is None
+    a.give_back(s)
+
+    with b.session(block=False) as s:
+        assert s is not None
+        assert a.borrow(block=False) is None
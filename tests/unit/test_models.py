@@ -0,0 +1,188 @@
+import random
+import hashlib
+
+import models.p256 as p256
+import models.ed25519 as ed25519
+import models.x25519 as x25519
+import models.random_point_generate_p256_model as rpg_p256
+import models.random_point_generate_25519_model as rpg
+from models.field import inv, batch_inv, batch_affine
+from models.batch import hash_to_field_batch
+
+r = random.Random(0)
+
+def rand_scalars(n, bits=256):
+    return [r.getrandbits(bits) for _ in range(n)]
+
+##################################################################
+#   Field
+##################################################################
+
+def test_batch_inv_matches_inv():
+    p = p256.p
+    xs = rand_scalars(20) + [0, p, p + 5, 1]
+    assert batch_inv(xs, p) == [inv(x % p, p) for x in xs]
+    assert batch_inv([], p) == []
+
+def test_batch_affine_matches_inv():
+    p = p256.p
+    points = [p256.spm_jac(k, (p256.xG, p256.yG, 1)) for k in rand_scalars(4)] + [p256.INF]
+    affine = batch_affine(points, p, jacobian=True)
+    assert affine[:-1] == [p256.to_affine(P) for P in points[:-1]]
+    assert affine[-1] is None
+
+##################################################################
+#   P-256
+##################################################################
+
+# RFC 6979 A.2.5, key pair and SHA-256 signature of "sample"
+P256_D = 0xC9AFA9D845BA75166B5C215767B1D6934E50C3DB36E89B127B8A622B120F6721
+P256_Q = (
+    0x60FED4BA255A9D31C961EB74C6356D68C049B8923B61FA6CE669622E60F29FB6,
+    0x7903FE1008B8BC99A41AE9E95628BC64F2F1B20C2D7E9F5177A3C294D4462299
+)
+P256_SIG = (
+    0xEFD48B2AACB6A8FD1140DD9CD45E81D69D2C877B56AAF991C34D0EA84EAF3716,
+    0xF7CB1C942D657C41D436C7A1B6E29F65F3E900DBB9AFF4064DC4AB2F843ACDA8
+)
+
+def test_p256_wnaf_digits():
+    for k in rand_scalars(10) + [1, 2**256 - 1]:
+        digits = p256.wnaf(k)
+        assert sum(d << i for i, d in enumerate(digits)) == k
+        nonzero = [i for i, d in enumerate(digits) if d]
+        assert all(digits[i] % 2 and abs(digits[i]) < 2**(p256.WNAF_WIDTH - 1) for i in nonzero)
+        assert all(b - a >= p256.WNAF_WIDTH for a, b in zip(nonzero, nonzero[1:]))
+
+def test_p256_spm_matches_affine_reference():
+    assert p256.spm(P256_D, p256.xG, p256.yG) == P256_Q
+    assert p256.spm(p256.q - 1, p256.xG, p256.yG) == (p256.xG, p256.p - p256.yG)
+    for k in rand_scalars(3):
+        assert p256.spm(k, p256.xG, p256.yG) == p256.spm_affine(k, p256.xG, p256.yG)
+        assert p256.spm(k, *P256_Q) == p256.spm_affine(k, *P256_Q)
+
+def test_p256_spm_double_matches_sum():
+    u1, u2 = rand_scalars(2)
+    joint = p256.to_affine(p256.spm_double_jac(u1, u2, (P256_Q[0], P256_Q[1], 1)))
+    assert joint == p256.ec_add(*p256.spm(u1, p256.xG, p256.yG), *p256.spm(u2, *P256_Q))
+
+def test_p256_verify_rfc6979():
+    z = hashlib.sha256(b"sample").digest()
+    assert p256.verify(*P256_Q, z, *P256_SIG)
+    assert not p256.verify(*P256_Q, z, P256_SIG[0], P256_SIG[1] ^ 1)
+    assert not p256.verify(*P256_Q, hashlib.sha256(b"test").digest(), *P256_SIG)
+
+def test_p256_verify_batch_matches_verify():
+    z = hashlib.sha256(b"sample").digest()
+    items = [
+        (*P256_Q, z, *P256_SIG),
+        (*P256_Q, z, P256_SIG[0], P256_SIG[1] ^ 1),
+        (*P256_Q, z, 0, P256_SIG[1]),
+        (P256_Q[0], P256_Q[1] ^ 1, z, *P256_SIG)
+    ]
+    for _ in range(3):
+        d, w, Ax, Ay = p256.key_gen(r.randbytes(32))
+        z2, sch, scn = r.randbytes(32), r.randbytes(32), r.randbytes(4)
+        items.append((Ax, Ay, z2, *p256.sign(d, w, sch, scn, z2)))
+    assert p256.verify_batch(items) == [p256.verify(*i) for i in items] == [True, False, False, False, True, True, True]
+
+# RFC 9380 J.1.1, P256_XMD:SHA-256_SSWU_RO_, msg = "": u[0] and Q0
+SSWU_U = 0xad5342c66a6dd0ff080df1da0ea1c04b96e0330dd89406465eeba11582515009
+SSWU_Q0 = (
+    0xab640a12220d3ff283510ff3f4b1953d09fad35795140b1c5d64f313967934d5,
+    0xdccb558863804a881d4fff3455716c836cef230e5209594ddd33d85c565b19b1
+)
+
+def test_p256_sswu_rfc9380():
+    assert batch_affine([rpg_p256.map_to_curve_simple_swu(SSWU_U)], rpg_p256.p) == [SSWU_Q0]
+
+def test_p256_point_generate_batch_matches_scalar():
+    dst, rngs = r.randbytes(32), rand_scalars(10)
+    points = [rpg_p256.point_generate_p256(dst, rng) for rng in rngs]
+    assert rpg_p256.point_generate_p256_batch(dst, rngs, chunk=3) == points
+    assert rpg_p256.point_generate_p256_batch(dst, rngs, affine=True) == batch_affine(points, rpg_p256.p)
+    assert all(rpg_p256.is_on_p256(*P) for P in points)
+
+def test_hash_to_field_batch_matches_scalar():
+    dst, msgs = r.randbytes(32), [r.randbytes(32) for _ in range(5)]
+    assert hash_to_field_batch(msgs, dst, rpg_p256.p, rpg_p256.EXP_TAG) == [rpg_p256.hash_to_field(m, dst) for m in msgs]
+    assert hash_to_field_batch(msgs, dst, rpg.p, rpg.EXP_TAG) == [rpg.hash_to_field(m, dst) for m in msgs]
+
+##################################################################
+#   Curve25519 / Ed25519
+##################################################################
+
+# RFC 8032 7.1, TEST 1
+ED25519_SECRET = bytes.fromhex("9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60")
+ED25519_PUBLIC = bytes.fromhex("d75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a")
+ED25519_SIG = bytes.fromhex(
+    "e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555fb8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b"
+)
+
+def test_ed25519_sign_rfc8032():
+    assert ed25519.sign_standard(ED25519_SECRET, b"") == (ED25519_SIG, ED25519_PUBLIC)
+    assert ed25519.verify(ED25519_PUBLIC, b"", ED25519_SIG)
+    assert not ed25519.verify(ED25519_PUBLIC, b"\x00", ED25519_SIG)
+
+def test_ed25519_point_mul_matches_reference():
+    for s in rand_scalars(3):
+        assert ed25519.point_equal(ed25519.point_mul_base(s), ed25519.point_mul_var(s, ed25519.G))
+
+def naive_msm(scalars, points):
+    Q = ed25519.O
+    for s, P in zip(scalars, points):
+        Q = ed25519.point_add(Q, ed25519.point_mul_var(s, P))
+    return Q
+
+def test_ed25519_straus_and_pippenger_match_naive():
+    points = [ed25519.point_mul_base(s) for s in rand_scalars(ed25519.PIPPENGER_MIN)]
+    scalars = rand_scalars(len(points), 253)
+    ref = naive_msm(scalars, points)
+    assert ed25519.point_equal(ed25519.straus(scalars, points), ref)
+    assert ed25519.point_equal(ed25519.pippenger(scalars, points), ref)
+    assert ed25519.point_equal(ed25519.multi_scalar_mul(scalars[:3], points[:3]), naive_msm(scalars[:3], points[:3]))
+
+def test_ed25519_verify_batch():
+    items = [(ED25519_PUBLIC, b"", ED25519_SIG)]
+    for _ in range(3):
+        m = r.randbytes(40)
+        sig, A = ed25519.sign_standard(r.randbytes(32), m)
+        items.append((A, m, sig))
+    assert ed25519.verify_batch(items)
+    A, m, sig = items[2]
+    assert not ed25519.verify_batch(items[:2] + [(A, m + b"\x00", sig)] + items[3:])
+
+# RFC 7748 5.2, first X25519 test vector
+X25519_K = bytes.fromhex("a546e36bf0527c9d3b16154b82465edd62144c0ac1fc5a18506a2244ba449ac4")
+X25519_U = bytes.fromhex("e6db6867583030db3594c1a424b15f7c726624ec26b3353b10a903a6d0ab1c4c")
+X25519_OUT = bytes.fromhex("c3da55379de9c6908e94ea4df28d084f32eccf03491c71f754b4075577a28552")
+
+def test_x25519_rfc7748():
+    u = int.from_bytes(X25519_U, 'little') & (2**255 - 1)
+    assert x25519.x25519(x25519.bytes2scalar(X25519_K), u).to_bytes(32, 'little') == X25519_OUT
+
+def test_x25519_batch_matches_scalar():
+    ks = [x25519.int2scalar(k) for k in rand_scalars(7)]
+    us = rand_scalars(7, 255) + [0]
+    ks.append(ks[0])
+    assert x25519.x25519_batch(ks, us, chunk=3) == [x25519.x25519(k, u) for k, u in zip(ks, us)]
+
+# RFC 9380 J.4.2, curve25519_XMD:SHA-512_ELL2_NU_, msg = "": u[0] and x of Q = 8 * map(u[0])
+ELL2_U = 0x608d892b641f0328523802a6603427c26e55e6f27e71a91a478148d45b5093cd
+ELL2_QX = 0x1bb913f0c9daefa0b3375378ffa534bda5526c97391952a7789eb976edfe4d08
+
+def test_elligator2_rfc9380():
+    xn, xd, yn, yd = rpg.map_to_curve_elligator2_curve25519(ELL2_U)
+    assert rpg.is_on_curve25519(xn * inv(xd, rpg.p) % rpg.p, yn * inv(yd, rpg.p) % rpg.p)
+    x, z = x25519.x25519_ladder(8, xn * inv(xd, rpg.p))
+    assert x * inv(z, rpg.p) % rpg.p == ELL2_QX
+
+def test_elligator2_point_generate_batch_matches_scalar():
+    dst, rngs = r.randbytes(32), rand_scalars(10)
+    mont = [rpg.point_generate_curve25519(dst, rng) for rng in rngs]
+    ed = [rpg.point_generate_ed25519(dst, rng) for rng in rngs]
+    assert rpg.point_generate_curve25519_batch(dst, rngs, chunk=4) == mont
+    assert rpg.point_generate_ed25519_batch(dst, rngs, chunk=4) == ed
+    assert rpg.point_generate_ed25519_batch(dst, rngs, affine=True) == batch_affine(ed, rpg.p)
+    assert all(rpg.is_on_curve25519(*P) for P in mont)
+    assert all(rpg.is_on_ed25519(*P) for P in ed)
@@ -0,0 +1,68 @@
+import random
+import struct
+
+import models.tmac as tmac
+from iss_dumps import IssContext
+
+def write_tmac_ctx(file_name, state: bytes, byte_io_index=0):
+    """Context with the TMAC section as dumped by spect_iss, 5 lines of 10 bytes."""
+    h = state.hex().upper()
+    with open(file_name, 'w') as ctx:
+        ctx.write("TMAC context:\n" + "*" * 16 + "\n")
+        ctx.write("".join(h[i*20:(i+1)*20] + "\n" for i in range(5)))
+        ctx.write(f"{tmac.TMAC_RATE}\n{byte_io_index}\n0\n")
+
+def test_sponge_state_round_trips_context(tmp_path):
+    h = tmac.tmac_stream(b"\x5A" * 32, b"\x01")
+    h.update(bytes(range(3 * tmac.TMAC_RATE)))
+    state = h.state()
+    assert len(state) == 50
+
+    file_name = f"{tmp_path}/op.ctx"
+    write_tmac_ctx(file_name, state)
+    ctx = IssContext.load(file_name)
+    assert ctx["TMAC"] == state
+    assert list(struct.unpack("<25H", ctx["TMAC"])) == h.lanes
+
+    ctx.write(file_name)
+    assert IssContext.load(file_name)["TMAC"] == state
+
+def test_sponge_continues_from_context_state(tmp_path):
+    key, nonce = b"\xA5" * 32, b"\x02"
+    data = bytes(range(256)) * 2
+    h = tmac.tmac_stream(key, nonce)
+    states = list(h.block_states(data))
+
+    # Sponge restored from the TMAC section of the first block continues to the same digest
+    file_name = f"{tmp_path}/op.ctx"
+    write_tmac_ctx(file_name, states[0])
+    # Key, nonce and the first block end on a rate boundary, nothing is buffered
+    assert (len(nonce) + 1 + len(key) + 2 + tmac.TMAC_FW_BLOCK) % tmac.TMAC_RATE == 0
+    r = tmac.TmacSponge()
+    r.lanes = list(struct.unpack("<25H", IssContext.load(file_name)["TMAC"]))
+    r.update(data[tmac.TMAC_FW_BLOCK:])
+    assert r.digest() == tmac.tmac(key, data, nonce)
+
+def test_tmac_batch_matches_scalar():
+    r = random.Random(1)
+    # 20 inputs of one length use the lockstep path, the rest are below TMAC_BATCH_MIN
+    datas = [r.randbytes(100) for _ in range(20)] + [r.randbytes(r.randint(0, 300)) for _ in range(5)]
+    keys = [r.randbytes(32) for _ in datas]
+    assert tmac.tmac_batch(keys, datas, b"\x0C") == [tmac.tmac(k, d, b"\x0C") for k, d in zip(keys, datas)]
+
+    int_keys = [r.getrandbits(256) for _ in range(tmac.TMAC_BATCH_MIN)]
+    assert tmac.tmac_int_batch(int_keys, [b""] * len(int_keys), b"\x0A") == \
+        [tmac.tmac_int(k, b"", b"\x0A") for k in int_keys]
+
+def test_testvec_gen_nonce_matches_models():
+    import models.ed25519 as ed25519
+    import models.p256 as p256
+    from testvec_gen import make_chunk
+
+    for v in make_chunk("eddsa_nonce", 1, 0, 2 * tmac.TMAC_BATCH_MIN):
+        i = {k: bytes.fromhex(x) if isinstance(x, str) else x for k, x in v["input"].items()}
+        assert v["output"]["nonce"] == ed25519.get_nonce(i["m"], i["sch"], i["scn"], i["prefix"])
+
+    for v in make_chunk("ecdsa_nonce", 1, 0, 2 * tmac.TMAC_BATCH_MIN):
+        i = {k: bytes.fromhex(x) if isinstance(x, str) else x for k, x in v["input"].items()}
+        assert v["output"]["nonce"] == p256.get_nonce(i["z"], i["sch"], i["scn"], i["w"])